@@ -1,16 +1,34 @@
+import time  # Used to time how long the game takes to start
+started = time.perf_counter()  # When the game started loading
 import pygame
 import random
 import os  # Used to save files
 import shutil  # Used to delete folders
+import bisect  # Used to keep the custom level list sorted
 import math  # Used to find distance between points
-import datetime  # Used for the timer
-pygame.init()  # Initialises python
+import datetime  # Used to time autosaves
+import concurrent.futures  # Used to save levels in the background
+import threading  # Used to share images between threads
+import sqlite3  # Used to store personal bests and progress
+import atexit  # Used to write any unsaved records when the game closes
+import argparse  # Used to read command line options
+import json  # Used to store compiled levels
+import hashlib  # Used to give each compiled level a content hash
+import tempfile  # Used to hold the levels made for benchmarks
+import platform  # Used to describe the computer in benchmark results
+import gc  # Used to clean up memory before each benchmark
+import itertools  # Used to play part of a replay
+import collections  # Used to keep the recent frame times
+import sys  # Used to look at the stack while profiling
+import cProfile  # Used to profile levels
+import pstats  # Used to print profiles
+import tracemalloc  # Used to measure memory
+import types  # Used to skip classes and functions when measuring memory
+import multiprocessing  # Used to run bot training worlds in other processes
+import queue  # Used to hand snapshots of the world to the render thread
 
 title = "Pacman Platformer"  # Window title
 
-with open("game_data/progress.txt") as p:  # Loads progress from the progress text file
-    progress = int(p.read())  # Saves progress in progress variable
-
 
 class Window:  # Responsible for the main python window
     LENGTH = 1280  # Window dimensions
@@ -21,10 +39,97 @@ class Window:  # Responsible for the main python window
         pygame.display.set_caption(title)  # The window is named
 
 
-class Button:  # Used for most buttons in the game
-    click_sound = pygame.mixer.Sound("sounds/click.mp3")  # Button click sound
-    click_sound.set_volume(2)  # volume is set to 2
+class Startup:  # Starts each part of the game only when it is needed and times how long each part takes
+    times = []  # (part, seconds) in the order each part was started
+    last = started  # When the previous part finished
+    deferred = []  # Parts that are started after the first frame has been shown
+    first_frame = None  # Seconds from launch until the first frame was shown
+    report_enabled = False  # Prints the report once everything has started
+
+    @staticmethod
+    def mark(name):  # Records the time taken since the previous part finished
+        now = time.perf_counter()
+        Startup.times.append((name, now - Startup.last))
+        Startup.last = now
+
+    @staticmethod
+    def defer(name, func):  # Runs "func" after the first frame instead of before it
+        Startup.deferred.append((name, func))
+
+    @staticmethod
+    def frame_shown():  # Called after each home screen frame. Only the first call does anything
+        if Startup.first_frame is not None:
+            return
+        Startup.mark("first frame")
+        Startup.first_frame = time.perf_counter() - started
+        for name, func in Startup.deferred:
+            func()
+            Startup.mark(name)
+        Startup.deferred = []
+        if Startup.report_enabled:
+            print(Startup.report())
+
+    @staticmethod
+    def start_sound():  # Starts the mixer and the background music
+        pygame.mixer.init()  # Initializes pygame's mixer used for sound
+        if os.path.exists("sounds/Dance_of_the_Pixies.mp3"):  # The music isn't included with the source code
+            pygame.mixer.music.load("sounds/Dance_of_the_Pixies.mp3")  # Loads the background music
+            pygame.mixer.music.play(-1)  # Plays music infinitely
+        Assets.sound("click")  # The click sound is decoded now so the first click isn't delayed
+
+    @staticmethod
+    def report():  # Returns a table of how long each part took
+        lines = ["Start up time (ms)"]
+        lines += [f"  {name:<14}{seconds * 1000:8.1f}" for name, seconds in Startup.times]
+        if Startup.first_frame is not None:
+            lines.append(f"  {'first frame at':<14}{Startup.first_frame * 1000:8.1f}")
+        return "\n".join(lines)
+
+
+class Assets:  # Loads each image once and shares it between every object that uses it
+    images = {}  # (file, size) -> image
+    sounds = {}  # Name -> sound effect
+    lock = threading.Lock()  # Images can be loaded by the preloader thread at the same time
+
+    @staticmethod
+    def image(file, size=None):  # Returns an image, scaled to "size" if it is given
+        key = (file, size)
+        if key not in Assets.images:
+            with Assets.lock:
+                if key not in Assets.images:
+                    img = pygame.image.load(file)
+                    Assets.images[key] = img if size is None else pygame.transform.scale(img, size)
+        return Assets.images[key]
+
+    @staticmethod
+    def flipped(file, size):  # Returns an image and a flipped copy of it (facing right and left)
+        key = (file, size, "flipped")
+        if key not in Assets.images:
+            img = Assets.image(file, size)
+            with Assets.lock:
+                Assets.images[key] = (img, pygame.transform.flip(img, True, False))
+        return Assets.images[key]
+
+    @staticmethod
+    def ghost(colour, size=50):  # Ghost images for a colour (0, 1, 2 or 3)
+        return Assets.flipped("assets/ghosts/" + ("red", "orange", "pink", "blue")[colour] + ".png", (size, size))
+
+    @staticmethod
+    def sound(name):  # Returns a sound effect from the sounds folder, loading it the first time it is played
+        if name not in Assets.sounds:
+            if not pygame.mixer.get_init():  # The mixer is normally started after the first frame
+                pygame.mixer.init()
+            sound = pygame.mixer.Sound(f"sounds/{name}.mp3")
+            sound.set_volume(2)  # Volume is set to 2
+            Assets.sounds[name] = sound
+        return Assets.sounds[name]
+
+    @staticmethod
+    def pacman(size=50):  # Pacman's full animation from open to closed and back to open
+        return [Assets.flipped(f"assets/pacman_{i}.png", (size, size)) for i in (0, 1, 2, 3, 3, 2, 1)]
+
 
+class Button:  # Used for most buttons in the game
     def __init__(self, win, img, pos, command, size_increase=15, select=False):  # Requires a few parameters
         self.win = win
         self.img = img  # Button image
@@ -61,29 +166,31 @@ class Button:  # Used for most buttons in the game
         self.pos = pos  # Resets position then updates hit box
         self.hit_box = pygame.Rect(self.pos[0], self.pos[1], self.img[0].get_width(), self.img[0].get_height())
 
-    def update(self, mouse, pressed):  # Responsible for hover and click detection
+    def update(self, mouse, pressed, draw=True):  # Responsible for hover and click detection
         if not pressed:
             self.active = True  # Activates buttons. This was done to fix a bug.
 
         if not self.active:  # If a button is not active
-            self.draw()
+            if draw:
+                self.draw()
             return  # This prevents further code from running
         if self.hit_box.colliderect(pygame.Rect(mouse[0], mouse[1], 1, 1)) and not self.disable:  # If touching mouse
             self.mode = "large"  # Grows larger
             if pressed:  # If the button is clicked
-                Button.click_sound.play(0)  # Sound is played
+                Assets.sound("click").play(0)  # Sound is played
                 if self.command == 0:  # If there is no command then nothing happens
                     return True
                 else:
                     self.command()  # Command is run
         else:
             self.mode = "small"  # If not touching mouse then mode is small
-        self.draw()  # Button is drawn
+        if draw:  # Buttons in a game are drawn by the render thread when there is one
+            self.draw()  # Button is drawn
 
 
 class LevelBtn:  # Responsible for the built-in and custom buttons
-    click_sound = pygame.mixer.Sound("sounds/click.mp3")  # Sound effect
-    click_sound.set_volume(2)  # Volume is set to 2
+    pb_font = None  # Font used to render PB text (created when the first button is drawn)
+    images = None  # Play, edit and delete images shared by every custom button
 
     def __init__(self, win, x, y, main, delete, num=1, name=""):  # Requires a few parameters to initialise
         self.win = win
@@ -94,12 +201,11 @@ class LevelBtn:  # Responsible for the built-in and custom buttons
         self.name = name  # The file location of the game data
         self.name_full = name  # Backup of file location is saved here
 
-        if main == "custom":  # Find the personal best time from the game data
-            self.pb = GameData.get_pb("game_data/custom/" + str(self.name_full))  # Uses get_pb function
+        if main == "custom":  # The location of the level's game data
+            self.location = "game_data/custom/" + str(self.name_full)
         else:
-            self.pb = GameData.get_pb("game_data/built_in/level" + str(num))
-        if self.pb == "0":  # A PB of 0 is treated as N/A
-            self.pb = "N/A"
+            self.location = "game_data/built_in/level" + str(num)
+        self.pb = None  # The PB text is rendered the first time the button is updated
 
         self.delete = delete
         self.delete_cooldown = 180  # Prevents levels being deleted accidentally
@@ -109,7 +215,7 @@ class LevelBtn:  # Responsible for the built-in and custom buttons
 
         self.selected = False  # If the button is seleted
         if main == "main":  # If it is a normal built-in button
-            self.disabled = num > (progress + 1)  # It is disabled if that level isn't unlocked
+            self.disabled = num > (Records.get_progress() + 1)  # It is disabled if that level isn't unlocked
         else:
             self.disabled = False  # All custom levels are enabled
             if len(name) > 10:  # ... is used if names are greater than 10 characters
@@ -119,8 +225,6 @@ class LevelBtn:  # Responsible for the built-in and custom buttons
         self.selected_colour = (255, 255, 0)  # Selected colour: yellow
         self.disabled_colour = (66, 66, 66)  # Disabled colour: grey
 
-        font = pygame.font.Font('freesansbold.ttf', 18)  # Font used to render PB text
-        self.pb_text = font.render("PB: " + str(self.pb), True, self.selected_colour)  # Generates PB text
         if self.main == "main":  # A built-in level
             font = pygame.font.Font('freesansbold.ttf', 64)  # Font used to render level text
             self.text = font.render(str(num), True, self.colour)  # Default text
@@ -132,34 +236,34 @@ class LevelBtn:  # Responsible for the built-in and custom buttons
             self.selected_text = font.render(self.name, True, self.selected_colour)  # Selected text
             self.disabled_text = font.render(self.name, True, self.disabled_colour)  # Disabled text
 
-            img = pygame.image.load("assets/play.png")
+            if LevelBtn.images is None:  # The play, edit and delete images are loaded once for every button
+                LevelBtn.images = [pygame.image.load(f"assets/{i}.png") for i in ("play", "edit", "delete")]
+            img = LevelBtn.images[0]
             self.play_btn = Button(self.win, img, (self.x + self.length/2 - img.get_width()/2, self.y+5), self.play)
-            img = pygame.image.load("assets/edit.png")
+            img = LevelBtn.images[1]
             self.edit_btn = Button(self.win, img, (self.x + self.length/2 - img.get_width()/2, self.y+55), self.edit)
-            img = pygame.image.load("assets/delete.png")
+            img = LevelBtn.images[2]
             self.delete_btn = Button(self.win, img, (self.x + self.length/2 - img.get_width()/2, self.y+105),
                                      self.remove)
 
     def play(self):  # When the play button has been pressed
-        Game("game_data/custom/" + str(self.name_full), "normal")  # Creates a game class with the file location
+        Scenes.push(Game(self.location, "normal"))  # Creates a game class with the file location
 
     def edit(self):  # When edit button is pressed. Creates a game class in custom mode with the file location
-        Game("game_data/custom/" + str(self.name_full), "custom")
+        Scenes.push(Game(self.location, "custom"))
 
     def remove(self):  # Removes the button
         if self.delete_cooldown <= 0:  # Cooldown prevents accidental deleting of buttons
             self.delete(self.name_full)
 
     def update(self, mouse, pressed):  # Main update of the button
-        # Updates the PB time
-        if self.main == "custom":  # Find the personal best time from the game data
-            self.pb = GameData.get_pb("game_data/custom/" + str(self.name_full))  # Uses get_pb function
-        else:
-            self.pb = GameData.get_pb("game_data/built_in/level" + str(self.num))
-        if self.pb == "0":  # A PB of 0 is treated as N/A
-            self.pb = "N/A"
-        font = pygame.font.Font('freesansbold.ttf', 18)  # Font used to render PB text
-        self.pb_text = font.render("PB: " + str(self.pb), True, self.selected_colour)  # Generates PB text
+        # Updates the PB time. This comes from the records cache so no file is read
+        pb = GameData.get_pb(self.location)
+        if pb != self.pb:  # The PB text is only rendered again when the time changes
+            self.pb = pb
+            if LevelBtn.pb_font is None:  # One font is shared by every button
+                LevelBtn.pb_font = pygame.font.Font('freesansbold.ttf', 18)
+            self.pb_text = LevelBtn.pb_font.render("PB: " + str(pb or "N/A"), True, self.selected_colour)  # 0 is N/A
 
         if self.disabled:  # Draws the button and its contents in gray
             pygame.draw.rect(self.win, self.disabled_colour, (self.x, self.y, self.length, self.length), 5)
@@ -183,6 +287,8 @@ class LevelBtn:  # Responsible for the built-in and custom buttons
                 self.win.blit(self.text, (self.x + self.length / 2 - self.text.get_width() / 2, self.y + self.length))
 
         if self.hit_box.colliderect(pygame.Rect(mouse[0], mouse[1], 1, 1)) and not self.disabled:  # Touching mouse
+            if not self.selected:  # The level is read in the background in case it is clicked
+                Preloader.request(self.location)
             self.selected = True  # Selected is true and the button will therfore be drawn in yellow next frame
             if self.main == "custom":  # Three buttons are shown within the custom button
                 self.play_btn.update(mouse, pressed)  # Each button is updated (and drawn)
@@ -191,12 +297,12 @@ class LevelBtn:  # Responsible for the built-in and custom buttons
 
             if pressed:
                 if self.main == "main":
-                    LevelBtn.click_sound.play(0)
-                    Game("game_data/built_in/level" + str(self.num), "normal", self.num)
+                    Assets.sound("click").play(0)
+                    Scenes.push(Game(self.location, "normal", self.num))
         else:  # If not touching mouse
             self.selected = False  # Selected is false
 
-        self.disabled = self.num > (progress + 1)  # Checks that the player still hasn't unlocked the level
+        self.disabled = self.num > (Records.get_progress() + 1)  # Checks that the player still hasn't unlocked the level
 
         if self.delete_cooldown > 0:  # Delete cooldown is decreased
             self.delete_cooldown -= 1
@@ -206,7 +312,7 @@ class FallingGhost:  # Responsible for the falling ghosts on the home screen
     def __init__(self, win):  # Only requires the window to initialise
         self.win = win
         # A random ghost in chosen using random.choice()
-        self.img = pygame.image.load(f"assets/ghosts/{random.choice(['red', 'blue', 'orange', 'pink'])}.png")
+        self.img = Assets.image(f"assets/ghosts/{random.choice(['red', 'blue', 'orange', 'pink'])}.png")
         size = random.randint(20, 40)  # Random size from 20 to 40
         self.img = pygame.transform.scale(self.img, (size, size))  # Image is scaled to the given size
         self.x = random.randint(0, Window.LENGTH)  # X and Y are randomized
@@ -226,31 +332,41 @@ class FallingGhost:  # Responsible for the falling ghosts on the home screen
 
 
 class Particle:  # Responsible for death effect particles
-    def __init__(self, x, y, colour):  # Requires an x, y and colour
+    __slots__ = ("world", "x", "y", "colour", "x_vel", "y_vel")  # No per-instance __dict__ (there can be a lot)
+    r = 10  # Default radius for the particles is 10 pixels
+
+    def __init__(self, world, x, y, colour):  # Requires the world it is in, an x, y and colour
+        self.world = world
         self.x = x
         self.y = y
         self.colour = colour
-        self.r = 10  # Default radius for the particles is 10 pixels
 
-        self.x_vel = random.randint(-13, 13)  # A random x velocity and y velocity is chosen
-        self.y_vel = random.randint(-17, -10)
+        self.x_vel = world.rng.randint(-13, 13)  # A random x velocity and y velocity is chosen (seeded by each world)
+        self.y_vel = world.rng.randint(-17, -10)
 
-    def draw(self, win):  # Draws and updates the particle
-        pygame.draw.circle(win, self.colour, (self.x - Game.SCROLL_X, self.y - Game.SCROLL_Y), self.r)
+    def draw(self, win):  # Draws the particle
+        pygame.draw.circle(win, self.colour, (self.x - self.world.scroll_x, self.y - self.world.scroll_y), self.r)
 
+    def update(self):  # Moves the particle
         self.y += self.y_vel  # Applies gravity to the y values
         self.y_vel += 1
         self.x += self.x_vel  # Moves on the x and reduces the x velocity by 10%
         self.x_vel *= 0.9
 
-        if (self.y - Game.SCROLL_Y) < Window.WIDTH + self.r:  # Detects if the particle is on screen or not
+        if (self.y - self.world.scroll_y) < Window.WIDTH + self.r:  # Detects if the particle is on screen or not
             return "alive"
         else:
             return "dead"  # If not the particle is considered dead
 
 
 class Collectable:  # Responsible for collectables
-    def __init__(self, x, y):  # Requires and x and y position
+    __slots__ = ("world", "x", "y", "eaten", "counter", "start_y", "hit_box")  # Values that change per collectable
+    r = 7  # Constants are shared by every collectable
+    colour = (255, 255, 0)  # Yellow
+    hit_box_colour = (0, 255, 0)  # Green
+
+    def __init__(self, world, x, y):  # Requires the world it is in and an x and y position
+        self.world = world
         self.x = x
         self.y = y
         self.eaten = False  # Keeps track of whether it is eaten or not
@@ -258,21 +374,20 @@ class Collectable:  # Responsible for collectables
         self.counter = 0
         self.start_y = self.y  # Remembers the original y
 
-        self.r = 7
-        self.colour = (255, 255, 0)  # Yellow
-
         self.hit_box = (self.x - self.r, self.y - self.r, self.r * 2, self.r * 2)  # Collectable hit-box
-        self.hit_box_colour = (0, 255, 0)  # Green
+
+    def prepare(self, edit=False):  # Resets the hit-box for the current scroll (before the collectable is drawn)
+        scroll_x, scroll_y = self.world.scroll_x, self.world.scroll_y  # Scroll of the world that the object is in
+        if not self.eaten or edit:
+            self.hit_box = (self.x - scroll_x - self.r, self.y - scroll_y - self.r, self.r * 2, self.r * 2)
 
     def draw(self, win, hit_box=False, edit=False):  # Draws the collectable and hit box if "hit_box" is true
+        scroll_x, scroll_y = self.world.scroll_x, self.world.scroll_y
         if not self.eaten or edit:  # Only drawn if collectable is not eaten
-            # Resets the hit-box
-            self.hit_box = (self.x - Game.SCROLL_X - self.r, self.y - Game.SCROLL_Y - self.r, self.r * 2, self.r * 2)
-
             if self.eaten:
-                pygame.draw.circle(win, (200, 200, 200), (self.x - Game.SCROLL_X, self.y - Game.SCROLL_Y), self.r)
+                pygame.draw.circle(win, (200, 200, 200), (self.x - scroll_x, self.y - scroll_y), self.r)
             else:
-                pygame.draw.circle(win, self.colour, (self.x - Game.SCROLL_X, self.y - Game.SCROLL_Y), self.r)  # draws
+                pygame.draw.circle(win, self.colour, (self.x - scroll_x, self.y - scroll_y), self.r)  # draws
 
             if hit_box:  # If his_box is true then it draws the hit-box
                 pygame.draw.rect(win, self.hit_box_colour, self.hit_box, 1)
@@ -284,14 +399,16 @@ class Collectable:  # Responsible for collectables
         return rect2.colliderect(rect1)  # Uses built int colliderect() method to detect collision
 
     def touching_pacman(self, rect):  # Detects if touching pacman
+        scroll_x, scroll_y = self.world.scroll_x, self.world.scroll_y
         if self.eaten:  # If eaten then just return False
             return False
         rect2 = pygame.Rect(self.hit_box)  # Creates a pygame Rect object
-        rect = rect[0] - Game.SCROLL_X, rect[1] - Game.SCROLL_Y, rect[2], rect[3]  # Adjusts rect for scroll x and y
+        rect = rect[0] - scroll_x, rect[1] - scroll_y, rect[2], rect[3]  # Adjusts rect for scroll x and y
         return rect2.colliderect(rect)  # Uses built int colliderect() method to detect collision
 
     def update(self):  # Updates the collectable (moves it up and down)
-        if Window.LENGTH > (self.x - Game.SCROLL_X) > (self.r * -2) and Window.WIDTH > (self.y - Game.SCROLL_Y) > \
+        scroll_x, scroll_y = self.world.scroll_x, self.world.scroll_y
+        if Window.LENGTH > (self.x - scroll_x) > (self.r * -2) and Window.WIDTH > (self.y - scroll_y) > \
                 (self.r * -2) and not self.eaten:  # For efficiency it checks if the collectable is on screen
             self.y = self.start_y + math.sin(self.counter / 15) * 10
             self.counter += 1
@@ -301,103 +418,124 @@ class Collectable:  # Responsible for collectables
 
 
 class Platform:  # Base class for platform, bouncy, jump through and wall
-    def __init__(self, x, y, length, width):  # Requires x, y, length and width
+    __slots__ = ("world", "x", "y", "length", "width", "hit_box")  # Only the values that change per platform
+    colour = (0, 0, 255)  # Blue
+    hit_box_colour = (0, 255, 0)  # Green
+
+    def __init__(self, world, x, y, length, width):  # Requires the world it is in, x, y, length and width
+        self.world = world
         self.x = x
         self.y = y
         self.length = length
         self.width = width
-        self.colour = (0, 0, 255)  # Blue
         self.hit_box = pygame.Rect(self.x, self.y, self.length, self.width)  # Creates the hit-box
-        self.hit_box_colour = (0, 255, 0)  # Green
 
-    def draw(self, win, hit_box=False):  # Draws the platform
+    def draw(self, win, hit_box=False, scroll=None):  # Draws the platform. "scroll" is used instead of the world's
+        scroll_x, scroll_y = scroll or (self.world.scroll_x, self.world.scroll_y)
         # Draws the platform and two circles that make it look like rounded edges
-        pygame.draw.rect(win, self.colour, (self.x-Game.SCROLL_X, self.y-Game.SCROLL_Y, self.length, self.width))
-        pygame.draw.circle(win, self.colour, (self.x-Game.SCROLL_X, self.y-Game.SCROLL_Y+self.width / 2), self.width/2)
-        pygame.draw.circle(win, self.colour, (self.x+self.length-Game.SCROLL_X, self.y+self.width/2-Game.SCROLL_Y),
+        pygame.draw.rect(win, self.colour, (self.x-scroll_x, self.y-scroll_y, self.length, self.width))
+        pygame.draw.circle(win, self.colour, (self.x-scroll_x, self.y-scroll_y+self.width / 2), self.width/2)
+        pygame.draw.circle(win, self.colour, (self.x+self.length-scroll_x, self.y+self.width/2-scroll_y),
                            self.width/2)
         if hit_box:  # Will draw the hit-box if "hit_box" is True
-            pygame.draw.rect(win, self.hit_box_colour, (self.hit_box[0] - Game.SCROLL_X, self.hit_box[1] -
-                                                        Game.SCROLL_Y, self.hit_box[2], self.hit_box[3]), 1)
+            pygame.draw.rect(win, self.hit_box_colour, (self.hit_box[0] - scroll_x, self.hit_box[1] -
+                                                        scroll_y, self.hit_box[2], self.hit_box[3]), 1)
 
     def touching_pacman(self, rect):  # Uses built in colliderect to test if two rectangles collide
         return self.hit_box.colliderect(rect)
 
     def touching_rect(self, rect1):  # Tests for the collision of two rectangles (accounts for scrolling)
-        rect2 = pygame.Rect((self.hit_box[0] - Game.SCROLL_X, self.hit_box[1] - Game.SCROLL_Y, self.hit_box[2],
+        scroll_x, scroll_y = self.world.scroll_x, self.world.scroll_y
+        rect2 = pygame.Rect((self.hit_box[0] - scroll_x, self.hit_box[1] - scroll_y, self.hit_box[2],
                              self.hit_box[3]))  # Updates rect for scrolling
         return rect2.colliderect(rect1)  # Uses builtin colliderect method
 
 
 class Bouncy(Platform):  # Responsible for bouncy platforms (inherits from platform class)
-    def __init__(self, x, y, length, width):
-        super().__init__(x, y, length, width)  # Runs the __init__ method of the super class (ie Platform.__init__())
-        self.colour = (255, 255, 0)  # Overwrites the colour to be yellow
+    __slots__ = ()  # Empty so that subclasses don't get a __dict__ either
+    colour = (255, 255, 0)  # Overwrites the colour to be yellow
 
 
 class JumpThrough(Platform):  # Responsible for jump through platforms (inherits from platform class)
-    def __init__(self, x, y, length, width):
-        super().__init__(x, y, length, width)  # Runs the __init__ method of the super class (ie Platform.__init__())
-        self.colour = (140, 137, 129)  # Overwrites the colour to be grey
+    __slots__ = ()
+    colour = (140, 137, 129)  # Overwrites the colour to be grey
 
 
 class Wall(Platform):  # Responsible for walls (inherits from platform class)
-    def draw(self, win, hit_box=False):  # Overwrites the draw method
+    __slots__ = ()
+
+    def draw(self, win, hit_box=False, scroll=None):  # Overwrites the draw method
+        scroll_x, scroll_y = scroll or (self.world.scroll_x, self.world.scroll_y)
         # Doesn't have rounded edges like other platforms
-        pygame.draw.rect(win, self.colour, (self.x - Game.SCROLL_X, self.y - Game.SCROLL_Y, self.length, self.width))
+        pygame.draw.rect(win, self.colour, (self.x - scroll_x, self.y - scroll_y, self.length, self.width))
         if hit_box:  # Draws hit-box like in the Platform class
-            pygame.draw.rect(win, self.hit_box_colour, (self.hit_box[0] - Game.SCROLL_X, self.hit_box[1] -
-                                                        Game.SCROLL_Y, self.hit_box[2], self.hit_box[3]), 1)
+            pygame.draw.rect(win, self.hit_box_colour, (self.hit_box[0] - scroll_x, self.hit_box[1] -
+                                                        scroll_y, self.hit_box[2], self.hit_box[3]), 1)
 
 
 class Spike:  # Responsible for spikes in the game
-    def __init__(self, x, y, num, flip=0):  # Requires an x, y, num and flip (which is 0 or 1)
+    __slots__ = ("world", "x", "y", "num", "flip", "spike_height", "hit_box")  # Values that change per spike
+    spike_len = 30  # Default size of a spike is 30 base and 30 height
+    colour = (255, 255, 255)  # White
+    hit_box_variance = 3  # Hit-box has a variance of 3 (Helps to make it more user friendly)
+    hit_box_colour = (0, 255, 0)  # Green
+
+    def __init__(self, world, x, y, num, flip=0, hit_box=None):  # Requires the world, x, y, num and flip (0 or 1)
+        self.world = world
         self.x = x
         self.y = y
         self.num = int(num)  # the number of spikes must be an integer
         self.flip = flip
 
-        self.spike_len = 30  # Default size of a spike is 30 base and 30 height
         self.spike_height = 30
         if flip:  # If flip is true (ie a 1) then the height is negative because the spike goes down
             self.spike_height *= -1
 
-        self.colour = (255, 255, 255)  # White
-
-        self.hit_box_variance = 3  # Hit-box has a variance of 3 (Helps to make it more user friendly)
-        self.hit_box_colour = (0, 255, 0)  # Green
-
-        # Defines the hit-box taking into account the variance
-        self.hit_box = pygame.Rect(self.x+self.hit_box_variance, self.y - self.spike_height,
-                                   self.spike_len * self.num - (self.hit_box_variance*2), self.spike_height)
+        # Defines the hit-box taking into account the variance (unless it was already worked out by GameData.compile)
+        self.hit_box = pygame.Rect(hit_box or Spike.box(self.x, self.y, self.num, self.flip))
 
-    def draw(self, win, hit_box=False):  # Draws the spikes
-        pygame.draw.line(win, self.colour, (self.x - Game.SCROLL_X, self.y - Game.SCROLL_Y),
-                         (self.x + (self.num * self.spike_len) - Game.SCROLL_X, self.y -
-                          Game.SCROLL_Y), 5)  # Lines underneath the spikes
+    @staticmethod
+    def box(x, y, num, flip):  # Returns the hit-box of a row of spikes, taking into account the variance
+        spike_height = -30 if flip else 30
+        return pygame.Rect(x + Spike.hit_box_variance, y - spike_height,
+                           Spike.spike_len * int(num) - (Spike.hit_box_variance * 2), spike_height)
+
+    def draw(self, win, hit_box=False, scroll=None):  # Draws the spikes ("scroll" is used instead of the world's)
+        scroll_x, scroll_y = scroll or (self.world.scroll_x, self.world.scroll_y)
+        pygame.draw.line(win, self.colour, (self.x - scroll_x, self.y - scroll_y),
+                         (self.x + (self.num * self.spike_len) - scroll_x, self.y -
+                          scroll_y), 5)  # Lines underneath the spikes
         for i in range(self.num):  # Loops over the number of spikes and draws the left side of the spike
-            pygame.draw.line(win, self.colour, (self.x + (self.spike_len * i) - Game.SCROLL_X, self.y - Game.SCROLL_Y),
-                             (self.x + (self.spike_len * i) + self.spike_len / 2 - Game.SCROLL_X, self.y -
-                              self.spike_height - Game.SCROLL_Y), 5)
+            pygame.draw.line(win, self.colour, (self.x + (self.spike_len * i) - scroll_x, self.y - scroll_y),
+                             (self.x + (self.spike_len * i) + self.spike_len / 2 - scroll_x, self.y -
+                              self.spike_height - scroll_y), 5)
         for i in range(self.num):    # Loops over the number of spikes and draws the right side of the spike
-            pygame.draw.line(win, self.colour, (self.x + (self.spike_len * i) + self.spike_len / 2 - Game.SCROLL_X,
-                                                self.y - self.spike_height - Game.SCROLL_Y),
-                             (self.x + (self.spike_len * (i+1)) - Game.SCROLL_X, self.y - Game.SCROLL_Y), 5)
+            pygame.draw.line(win, self.colour, (self.x + (self.spike_len * i) + self.spike_len / 2 - scroll_x,
+                                                self.y - self.spike_height - scroll_y),
+                             (self.x + (self.spike_len * (i+1)) - scroll_x, self.y - scroll_y), 5)
         if hit_box:  # If hit-box is true then it draws the hit-box
-            pygame.draw.rect(win, self.hit_box_colour, (self.hit_box[0] - Game.SCROLL_X, self.hit_box[1] -
-                                                        Game.SCROLL_Y, self.hit_box[2], self.hit_box[3]), 1)
+            pygame.draw.rect(win, self.hit_box_colour, (self.hit_box[0] - scroll_x, self.hit_box[1] -
+                                                        scroll_y, self.hit_box[2], self.hit_box[3]), 1)
 
     def touching_pacman(self, rect):  # Uses builtin colliderect method to test it ghost touches pacman
         return self.hit_box.colliderect(rect)  # Returns the collision result
 
     def touching_rect(self, rect1):  # Detects if collision with a rectangle
-        rect2 = pygame.Rect(self.hit_box[0] - Game.SCROLL_X, self.hit_box[1] - Game.SCROLL_Y,
+        rect2 = pygame.Rect(self.hit_box[0] - self.world.scroll_x, self.hit_box[1] - self.world.scroll_y,
                             self.hit_box[2], self.hit_box[3])  # Accounts for scroll x and scroll y
         return rect2.colliderect(rect1)  # Returns the collision result
 
 
 class MovingPlatform:  # Responsible for moving platforms in the game
-    def __init__(self, pos1, pos2, length, width, speed):  # Initialises the moving platform
+    __slots__ = ("world", "pos1", "pos2", "length", "width", "speed", "direction", "div_0", "step", "pause", "x",
+                 "y", "hit_box")  # Only the values that change per moving platform
+    end_pause = 15  # Number of frames to wait at each end of the path
+    colour = (255, 200, 0)  # Orange
+    colour2 = (179, 179, 179)  # Grey
+    hit_box_colour = (0, 255, 0)  # Green
+
+    def __init__(self, world, pos1, pos2, length, width, speed, path=None):  # Initialises the moving platform
+        self.world = world  # The world that the platform is in
         self.pos1 = pos1  # Start position
         self.pos2 = pos2  # End position
         self.length = length  # Platform length and width
@@ -405,55 +543,62 @@ class MovingPlatform:  # Responsible for moving platforms in the game
         self.speed = speed  # The speed that the platform moves
 
         self.direction = 1  # Either 1 or -1
-        self.div_0 = self.pos2[0] - self.pos1[0] == 0  # Detects whether the two x's are the same: stop division 0 error
+        # div_0 is True if the two x's are the same. step is the x and y change for a speed of 1
+        self.div_0, self.step = path or MovingPlatform.path(self.pos1, self.pos2)
         self.pause = 0
-        self.end_pause = 15
-
-        self.colour = (255, 200, 0)  # Orange
-        self.colour2 = (179, 179, 179)  # Grey
 
         self.x = pos1[0]  # X and Y are originally set to the position 1 coordinates
         self.y = pos1[1]
 
         self.hit_box = (self.x, self.y, self.length, self.width)  # Platform hit box
-        self.hit_box_colour = (0, 255, 0)  # Green
+
+    def prepare(self):  # Updates the hit box for the current scroll (before the platform is drawn)
+        self.hit_box = pygame.Rect(self.x - self.world.scroll_x, self.y - self.world.scroll_y, self.length, self.width)
 
     def draw(self, win, hit_box=False):  # Draws the platform on the screen
         self.draw_platform(win, self.x, self.y, self.colour)  # Platform is drawn
-        # Updates hit box
-        self.hit_box = pygame.Rect(self.x - Game.SCROLL_X, self.y - Game.SCROLL_Y, self.length, self.width)
 
         if hit_box:  # If "hit_box" is True then it will draw the hit-box
             pygame.draw.rect(win, self.hit_box_colour, self.hit_box, 1)
 
     def draw_platform(self, win, x, y, colour):  # Draws the actual moving platform
+        scroll_x, scroll_y = self.world.scroll_x, self.world.scroll_y
         # Consists of a rectangle with two circles that act as rounded corners
-        pygame.draw.rect(win, colour, (x - Game.SCROLL_X, y - Game.SCROLL_Y, self.length, self.width))
-        pygame.draw.circle(win, colour, (x - Game.SCROLL_X, y - Game.SCROLL_Y + self.width / 2), self.width / 2)
-        pygame.draw.circle(win, colour, (x + self.length - Game.SCROLL_X, y + self.width / 2 - Game.SCROLL_Y),
+        pygame.draw.rect(win, colour, (x - scroll_x, y - scroll_y, self.length, self.width))
+        pygame.draw.circle(win, colour, (x - scroll_x, y - scroll_y + self.width / 2), self.width / 2)
+        pygame.draw.circle(win, colour, (x + self.length - scroll_x, y + self.width / 2 - scroll_y),
                            self.width / 2)
 
     def draw_path(self, win, hit_box=False):  # Draws the path that the moving platform follows
+        scroll_x, scroll_y = self.world.scroll_x, self.world.scroll_y
         self.draw_platform(win, self.pos1[0], self.pos1[1], self.colour2)  # Starting position is drawn in gray
         self.draw_platform(win, self.pos2[0], self.pos2[1], self.colour2)  # Ending position is drawn in gray
         # Path line is drawn
-        pygame.draw.line(win, self.colour2, (self.pos1[0] - Game.SCROLL_X + self.length/2, self.pos1[1] - Game.SCROLL_Y
-                                             + self.width/2), (self.pos2[0] - Game.SCROLL_X + self.length/2,
-                                                               self.pos2[1] - Game.SCROLL_Y + self.width/2))
+        pygame.draw.line(win, self.colour2, (self.pos1[0] - scroll_x + self.length/2, self.pos1[1] - scroll_y
+                                             + self.width/2), (self.pos2[0] - scroll_x + self.length/2,
+                                                               self.pos2[1] - scroll_y + self.width/2))
         self.draw_platform(win, self.x, self.y, self.colour)  # The actual platform is drawn
-        # Hit box is updated
-        self.hit_box = pygame.Rect(self.x - Game.SCROLL_X, self.y - Game.SCROLL_Y, self.length, self.width)
         if hit_box:  # If "hit_box" is True then it will draw the hit-box
             pygame.draw.rect(win, self.hit_box_colour, self.hit_box, 1)
 
+    @staticmethod
+    def path(pos1, pos2):  # Returns whether the path is vertical and the x and y change for a speed of 1
+        if pos2[0] - pos1[0] == 0:  # Detects whether the two x's are the same: stop division 0 error
+            return True, (0, 1)
+        # Note Sanjay Hingorani and Luke Sivyer helped me with the formula below
+        # Uses trigonometry to calculated the required x and y change
+        angle = math.atan((pos2[1] - pos1[1]) / (pos2[0] - pos1[0]))
+        return False, (math.cos(angle), math.sin(angle))
+
     def move_end(self, x, y):  # Moves the end position of the platform
         self.pos2 = x, y  # New end position is updated
         self.x, self.y = self.pos1  # Resets the platform at the start position
-        self.div_0 = self.pos2[0] - self.pos1[0] == 0  # Detects whether the two x's are the same: stop division 0 error
+        self.div_0, self.step = MovingPlatform.path(self.pos1, self.pos2)  # The direction of the path is updated
 
     def touching_pacman(self, rect):  # Checks if the platform touches pacman
+        scroll_x, scroll_y = self.world.scroll_x, self.world.scroll_y
         rect2 = pygame.Rect(self.hit_box)  # Creates a pygame Rect object
-        rect = rect[0] - Game.SCROLL_X, rect[1] - Game.SCROLL_Y, rect[2], rect[3]  # Updates rect for scroll x and y
+        rect = rect[0] - scroll_x, rect[1] - scroll_y, rect[2], rect[3]  # Updates rect for scroll x and y
         return rect2.colliderect(rect)  # Returns collision using the builtin colliderect method
 
     def touching_rect(self, rect1):  # Checks for collision with a rectangle
@@ -468,12 +613,9 @@ class MovingPlatform:  # Responsible for moving platforms in the game
         if self.div_0:  # Prevents a division 0 error
             self.y += self.speed * self.direction
             change_x, change_y = 0, self.speed * self.direction  # Necessary change in x and y is calculated
-        else:  # Note Sanjay Hingorani and Luke Sivyer helped me with the formula below
-            # Uses trigonometry to calculated the required x and y change
-            change_x = self.speed * math.cos(math.atan((self.pos2[1] - self.pos1[1]) / (self.pos2[0] - self.pos1[0])))\
-                      * self.direction
-            change_y = self.speed * math.sin(math.atan((self.pos2[1] - self.pos1[1]) /
-                                                       (self.pos2[0] - self.pos1[0]))) * self.direction
+        else:  # The required x and y change is the path direction multiplied by the speed
+            change_x = self.speed * self.step[0] * self.direction
+            change_y = self.speed * self.step[1] * self.direction
             self.x += change_x  # x and y is updated accordingly
             self.y += change_y
 
@@ -515,14 +657,15 @@ class MovingPlatform:  # Responsible for moving platforms in the game
                 change_x, change_y = self.x - self.pos2[0], self.y - self.pos2[1]  # Change is calculated
                 self.x, self.y = self.pos2
 
-        if self.touching_pacman(Game.pacman.hit_box):  # If the platform touches pacman
+        if self.touching_pacman(self.world.pacman.hit_box):  # If the platform touches pacman
             return change_x, change_y  # The necessary movements that pacman must make are returned
         else:
             return 0, 0  # Pacman is not moved
 
 
 class Ghost:  # Responsible for all ghosts
-    def __init__(self, x, y, colour):  # Requires x, y and colour (colour is either 0, 1, 2, of 3)
+    def __init__(self, world, x, y, colour):  # Requires the world, x, y and colour (colour is either 0, 1, 2, of 3)
+        self.world = world
         self.is_dead = False
         self.type = int(colour)  # Colour must be an integer
         self.x = x
@@ -534,51 +677,56 @@ class Ghost:  # Responsible for all ghosts
         self.r = 50
         self.max_wall = 20  # Max wall height that it can climb is 20 pixels
 
-        self.colours = {0: "red", 1: "orange", 2: "pink", 3: "blue"}
         self.particles = []
         self.particle_colour = ((236, 28, 36), (255, 202, 24), (255, 174, 200), (0, 168, 243))[self.type]
         # particle colour is dependant on the colour of the ghost
 
-        self.image = pygame.image.load("assets/ghosts/" + self.colours[self.type] + ".png")  # Load correct image
-        self.image = pygame.transform.scale(self.image, (self.r, self.r))  # Scale the image down
-        self.image = (self.image, pygame.transform.flip(self.image, True, False))  # Copy it and make a flipped version
+        self.image = Assets.ghost(self.type, self.r)  # Scaled image and a flipped version (shared by each ghost)
 
         self.hit_box = (self.x, self.y, self.r, self.r)  # Creates the hit-box
         self.hit_box_colour = (0, 255, 0)  # Green
 
-    def draw_particles(self, win):  # Will draw the ghost's particles when it dies
+    def update_particles(self):  # Moves the ghost's particles when it dies
         states = []  # Keeps track of the state of each particle
         for particle in self.particles:  # Loops over particles
-            state = particle.draw(win)
+            state = particle.update()
             states.append(state)  # If the particle is still on screen
         if "alive" not in states:  # If none of the particles are alive then it empties the particles list
             self.particles = []
 
+    def prepare(self):  # Moves the death particles or resets the hit-box (before the ghost is drawn)
+        if self.is_dead:
+            self.update_particles()
+            if len(self.particles) == 0:  # If the list has been emptied then the ghost it dead and removed
+                self.world.remove(self, changed=False)
+                return True  # Tells the world that this ghost has gone
+            return
+        self.hit_box = pygame.Rect(self.x - self.world.scroll_x, self.y - self.world.scroll_y, self.r, self.r)
+
     def draw(self, win, hit_box=False):  # Draws the ghost
         if self.is_dead:  # If the ghost is dead then it won't be drawn but instead the particles will be
-            self.draw_particles(win)
-            if len(self.particles) == 0:  # If the list has been emptied then the ghost it dead and removed
-                Game.ghosts.remove(self)
+            for particle in self.particles:
+                particle.draw(win)
             return  # Prevents further code from running
 
-        # Redefines the hit-box and draws the ghost on the screen
-        self.hit_box = pygame.Rect(self.x - Game.SCROLL_X, self.y - Game.SCROLL_Y, self.r, self.r)
-        win.blit(self.image[self.direction], (self.x - Game.SCROLL_X, self.y - Game.SCROLL_Y))
+        win.blit(self.image[self.direction], (self.x - self.world.scroll_x, self.y - self.world.scroll_y))
 
         if hit_box:  # If "hit_box" is True then it will draw the hit-box
             pygame.draw.rect(win, self.hit_box_colour, self.hit_box, 1)
 
     def touching_platform(self):  # Detects if the ghost touches a platform
-        self.hit_box = pygame.Rect(self.x - Game.SCROLL_X, self.y - Game.SCROLL_Y, self.r, self.r)  # Redefines hit-box
+        scroll_x, scroll_y = self.world.scroll_x, self.world.scroll_y
+        self.hit_box = pygame.Rect(self.x - scroll_x, self.y - scroll_y, self.r, self.r)  # Redefines hit-box
         if self.y >= Window.WIDTH - self.r - 70:  # If the ghost is below the ground this counts as touching a platform
             return True
-        for platform in Game.platforms:  # Loops over platforms and checks for collision
+        area = (self.x - 2, self.y - 2, self.r + 4, self.r + 4)  # Area around the ghost (not affected by scrolling)
+        for platform in self.world.grids["platforms"].query(area):  # Checks the nearby platforms for collision
             if platform.touching_rect(self.hit_box):
                 return platform  # returns that platform that was touched
-        for platform in Game.jump_through:  # Loops over platforms and checks for collision
+        for platform in self.world.grids["jump_through"].query(area):  # Checks the nearby platforms for collision
             if platform.touching_rect(self.hit_box):
                 return platform  # returns that platform that was touched
-        for platform in Game.moving_platforms:  # Loops over platforms and checks for collision
+        for platform in self.world.moving_platforms:  # Loops over platforms and checks for collision
             if platform.touching_rect(self.hit_box):
                 return True
         return False  # If there was no collision false is then returned
@@ -588,13 +736,14 @@ class Ghost:  # Responsible for all ghosts
         return rect2.colliderect(rect1)  # Uses builtin colliderect method
 
     def touching_pacman(self, rect):  # Checks if the ghost touches pacman
+        scroll_x, scroll_y = self.world.scroll_x, self.world.scroll_y
         rect2 = pygame.Rect(self.hit_box)  # Creates a pygame Rect object
-        rect = rect[0] - Game.SCROLL_X, rect[1] - Game.SCROLL_Y, rect[2], rect[3]  # Updates rect for scroll x and y
+        rect = rect[0] - scroll_x, rect[1] - scroll_y, rect[2], rect[3]  # Updates rect for scroll x and y
         return rect2.colliderect(rect)  # Returns collision using the builtin colliderect method
 
     def dead(self):  # Function is called when the ghost dies
         self.is_dead = True
-        self.particles = [Particle(self.x + (self.r / 2), self.y + (self.r / 2), self.particle_colour)
+        self.particles = [Particle(self.world, self.x + (self.r / 2), self.y + (self.r / 2), self.particle_colour)
                           for _ in range(20)]  # Creates 20 particles used in the death effect
 
     def wall(self, x):  # Checks if the ghost has run into a wall. Takes an x either -1 (left) or 1 (right)
@@ -612,8 +761,9 @@ class Ghost:  # Responsible for all ghosts
                 self.direction = 0
 
     def touching_danger(self):  # Checks if ghost is touching a spike
-        self.hit_box = pygame.Rect(self.x - Game.SCROLL_X, self.y - Game.SCROLL_Y, self.r, self.r)  # Updates hit-box
-        for spike in Game.spikes:  # Loops over spikes and checks for collision
+        scroll_x, scroll_y = self.world.scroll_x, self.world.scroll_y
+        self.hit_box = pygame.Rect(self.x - scroll_x, self.y - scroll_y, self.r, self.r)  # Updates hit-box
+        for spike in self.world.grids["spikes"].query((self.x - 2, self.y - 2, self.r + 4, self.r + 4)):  # Nearby
             if spike.touching_rect(self.hit_box):
                 return spike  # Returns that spike that was touched
         return False  # If not spikes were touched then False is returned
@@ -630,7 +780,7 @@ class Ghost:  # Responsible for all ghosts
 
         if self.touching_platform():  # If a platform was touched
             if self.y_vel < 0:  # Ie you are going up
-                if str(type(self.touching_platform())) == "<class '__main__.JumpThrough'>":
+                if type(self.touching_platform()) is JumpThrough:
                     return  # If you are going up and touch a JumpThrough you ignore it (ie go through it)
                 while self.touching_platform():
                     self.y += 1  # Pushes the ghost down until it is no longer touching a platform
@@ -657,18 +807,16 @@ class Ghost:  # Responsible for all ghosts
                 else:  # Left
                     self.direction = 0
                     self.x += self.speed  # Moves the ghost back
-        if str(type(self.touching_platform())) == "<class '__main__.Bouncy'>":
+        if type(self.touching_platform()) is Bouncy:
             self.y_vel = -25  # If touching a bounce pad then y_vel is negative (results in ghost going up)
 
 
 class PacMan:  # Main class controlling pacman
-    start_pos = (0, 0)  # Pacman spawn point
-    score = 0  # Pacman score
-
-    def __init__(self, x, y):  # Requires and x and y to initialise
+    def __init__(self, world, x, y):  # Requires the world it is in and an x and y to initialise
+        self.world = world
         self.x = x
         self.y = y
-        PacMan.start_pos = (x, y)  # Resets the start position to that x and y
+        self.start_pos = (x, y)  # Pacman spawn point
 
         self.x_offset = 0  # X and Y offset cause by moving platforms
         self.y_offset = 0
@@ -683,11 +831,8 @@ class PacMan:  # Main class controlling pacman
         self.frames_per_animation = 5  # Frames per each pacman animation
         self.animation_cycle = 0  # The current animation cycle position
 
-        images = [pygame.image.load(f"assets/pacman_{i}.png") for i in range(4)]  # Loads all 4 pacman images
-        [images.append(pygame.image.load(f"assets/pacman_{3-i}.png")) for i in range(3)]  # Loads an additional 3 images
-        # The two lines above load the full pacman cycle from - open to closed and back to open
-        images = [pygame.transform.scale(image, (self.r, self.r)) for image in images]  # Scales images (using self.r)
-        self.images = [(image, pygame.transform.flip(image, True, False)) for image in images]  # Flip image: left,right
+        # Loads the full pacman cycle from open to closed and back to open. Each image is scaled and flipped
+        self.images = Assets.pacman(self.r)
         self.current_img = 0  # The current image. Just set to 0 for now
 
         self.hit_box_variance = 5  # Hit-box has a variance of 3 (Helps to make it more user friendly)
@@ -695,27 +840,32 @@ class PacMan:  # Main class controlling pacman
         self.hit_box_colour = (0, 255, 0)  # Green
 
         self.is_dead = False  # Is dead is set to false at the start of the program
-        self.sound = pygame.mixer.Sound("sounds/pop.mp3")  # Loads the deaf sound effect
-        self.sound.set_volume(2)
+        self.sound = Assets.sound("pop")  # Loads the deaf sound effect
         self.particles = []  # These are the particles used in the death animation
 
-    def draw(self, win, hit_box=False):
-        if self.is_dead:  # If pacman is dead then it won't be drawn but instead the particles will be
-            self.draw_particles(win)
+    def prepare(self):  # Moves the death particles and respawns pacman once they have gone (before pacman is drawn)
+        if self.is_dead:
+            self.update_particles()
             if len(self.particles) == 0:  # If the list has been emptied. (ie all particles are off screen)
-                PacMan.score = 0  # Score is reset
+                self.world.score = 0  # Score is reset
                 self.is_dead = False  # Player is alive again
-                self.x, self.y = PacMan.start_pos[0], PacMan.start_pos[1]  # Respawns the player
+                self.x, self.y = self.start_pos[0], self.start_pos[1]  # Respawns the player
                 self.y_vel = 0
                 self.airtime = 5
-                for collectable in Game.collectables:  # Shows the collectables again
+                for collectable in self.world.collectables:  # Shows the collectables again
                     collectable.eaten = False
+
+    def draw(self, win, hit_box=False):
+        scroll_x, scroll_y = self.world.scroll_x, self.world.scroll_y
+        if self.is_dead:  # If pacman is dead then it won't be drawn but instead the particles will be
+            for particle in self.particles:
+                particle.draw(win)
             return  # Breaks out of the method
         # The lines below draws pacman, at the current images and in the correct direction
-        win.blit(self.images[self.current_img][self.direction], (self.x-Game.SCROLL_X, self.y-Game.SCROLL_Y))
+        win.blit(self.images[self.current_img][self.direction], (self.x-scroll_x, self.y-scroll_y))
         if hit_box:  # Draws the player hit-box if "hit_box" is True
-            pygame.draw.rect(win, self.hit_box_colour, (self.hit_box[0] - Game.SCROLL_X, self.hit_box[1] -
-                                                        Game.SCROLL_Y, self.hit_box[2], self.hit_box[3]), 1)
+            pygame.draw.rect(win, self.hit_box_colour, (self.hit_box[0] - scroll_x, self.hit_box[1] -
+                                                        scroll_y, self.hit_box[2], self.hit_box[3]), 1)
 
     def toggle_animation(self):  # Cycles through pacman's animations
         self.animation_cycle += 1  # Animation cycle is increased
@@ -730,41 +880,41 @@ class PacMan:  # Main class controlling pacman
         self.update_hit_box()
         if self.y >= Window.WIDTH - self.r - 70:  # If the ghost is below the ground this counts as touching a platform
             return True
-        for platform in Game.platforms:  # Loops over platforms and checks for a collision
+        for platform in self.world.grids["platforms"].query(self.hit_box):  # Loops over nearby platforms
             if platform.touching_pacman(self.hit_box):
                 return platform  # Returns that platform that was touched
         return self.touching_moving_platform()  # If there was no collision it then checks for moving platform collision
 
     def touching_moving_platform(self):  # Detects if pacman touches a moving platform
         self.update_hit_box()  # Hit box is updated
-        for platform in Game.moving_platforms:  # Loops over moving platforms
+        for platform in self.world.moving_platforms:  # Loops over moving platforms
             if platform.touching_pacman(self.hit_box):  # If there is a collision True is returned
                 return True
         return False  # If there were no collisions False is returned
 
     def touching_danger(self):  # If pacman touches a danger (either spike or ghost)
         self.update_hit_box()
-        for danger in Game.spikes:  # Loops over the spikes
+        for danger in self.world.grids["spikes"].query(self.hit_box):  # Loops over the nearby spikes
             if danger.touching_pacman(self.hit_box):  # Detects collision using the hit-box
                 return danger  # Returns the spike that was touched
-        for ghost in Game.ghosts:  # Loops over the spikes
+        for ghost in self.world.ghosts:  # Loops over the spikes
             if ghost.touching_pacman(self.hit_box):  # Detects collision using the hit-box
                 return ghost  # Returns the ghost the was touched
         return False  # If there was no collision False is returned
 
     def touching_jump_through(self):  # Detects if pacman touches a jump through platform
         self.update_hit_box()
-        for platform in Game.jump_through:  # Loops over the platforms
+        for platform in self.world.grids["jump_through"].query(self.hit_box):  # Loops over the nearby platforms
             if platform.touching_pacman(self.hit_box):  # Detects collision using the hit-box
                 return platform  # Returns that platform that was touched
         return False  # If there was no collision False is returned
 
     def touching_collectable(self):  # If pacman touches a collectable
         self.update_hit_box()
-        for collectable in Game.collectables:  # Loops over all collectables
+        for collectable in self.world.collectables:  # Loops over all collectables
             if collectable.touching_pacman(self.hit_box):  # Detects for collision using the hit-box
                 collectable.eaten = True  # If eaten then the collectable is marked as eaten and score is increased
-                PacMan.score += 1
+                self.world.score += 1
                 self.sound.play(0)  # Eating sound is played
         return False  # If no collectables were eaten then false is returned
 
@@ -781,22 +931,23 @@ class PacMan:  # Main class controlling pacman
     def dead(self):  # Function is called when the pacman dies
         self.is_dead = True
         # Creates 20 particles used in the death effect
-        self.particles = [Particle(self.x + (self.r / 2), self.y + (self.r / 2), (255, 255, 0)) for _ in range(20)]
+        self.particles = [Particle(self.world, self.x + (self.r / 2), self.y + (self.r / 2), (255, 255, 0))
+                          for _ in range(20)]
         self.sound.play(5)  # Death sound is played
 
-    def draw_particles(self, win):  # Will draw pacman particles when it dies
+    def update_particles(self):  # Moves pacman's particles when it dies
         states = []  # Keeps track of the state of each particle
         for particle in self.particles:  # Loops over particles
-            state = particle.draw(win)
+            state = particle.update()
             states.append(state)  # If the particle is stilll visible
         if "alive" not in states:  # If none of the particles are alive then it empties the particles list
             self.particles = []
-            Game.start_time = datetime.datetime.now()  # Game start time is then reset
+            self.world.start_tick = self.world.ticks  # The timer starts again
 
     def set_pos(self, x, y):  # Resets the x, y and start position of pacman
         self.x = x
         self.y = y
-        PacMan.start_pos = (x, y)  # New start position is defined
+        self.start_pos = (x, y)  # New start position is defined
 
     def update_hit_box(self):  # Updates the pacman hit box
         self.hit_box = pygame.Rect(self.x + self.hit_box_variance, self.y, self.r - self.hit_box_variance * 2,
@@ -804,10 +955,11 @@ class PacMan:  # Main class controlling pacman
 
     def update(self, keys):  # Updates and moves pacman
         self.x_offset, self.y_offset = 0, 0  # X and Y offset is reset to 0
-        for platform in Game.moving_platforms:  # Loops over moving platforms
+        for platform in self.world.moving_platforms:  # Loops over moving platforms
             change = platform.move()
             self.x_offset += change[0]  # Each offset is added
             self.y_offset += change[1]
+        Overlay.mark("moving platforms")
         self.x += self.x_offset  # PLayer x and y is moved according to the offsets
         self.y += self.y_offset
 
@@ -853,12 +1005,322 @@ class PacMan:  # Main class controlling pacman
         # Line bellow checks for up keys, w or space bar to see if user wants to jump
         if (keys[pygame.K_UP] or keys[pygame.K_w] or keys[pygame.K_SPACE]) and self.airtime <= 5 and self.y_vel >= -15:
             self.y_vel = -15  # Y vel is negative resulting in the player going up
-        if str(type(self.touching_platform())) == "<class '__main__.Bouncy'>":  # Touching bounce pad
+        if type(self.touching_platform()) is Bouncy:  # Touching bounce pad
             self.y_vel = -25  # Y vel is also negative (player goes up)
 
 
+class EntityList:  # Objects of one kind in the order they were added. Any object can be removed straight away
+    __slots__ = ("items",)
+
+    def __init__(self, objects=()):
+        self.items = dict.fromkeys(objects)  # The objects are the keys of a dictionary (which keeps them in order)
+
+    def append(self, obj):
+        self.items[obj] = None
+
+    def extend(self, objects):
+        self.items.update(dict.fromkeys(objects))
+
+    def remove(self, obj):  # Doesn't have to search like list.remove() does
+        del self.items[obj]
+
+    def __contains__(self, obj):
+        return obj in self.items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class SpatialGrid:  # Splits the level into square cells so that only the objects near a rectangle are checked
+    CELL = 128  # Width and height of each cell in pixels
+    queries = 0  # Number of queries made (shown by the performance overlay)
+
+    # "buckets" are the cells worked out by GameData.compile. "box" gives the area of an object (its hit-box by default)
+    def __init__(self, objects=(), buckets=None, box=None):
+        self.box = box or SpatialGrid.hit_box
+        self.cells = {}  # (column, row) -> objects in that cell, in the order they were added
+        self.order = {}  # Object -> the order it was added (results are in the same order as the object lists)
+        self.count = 0
+        if buckets is None:
+            for obj in objects:
+                self.add(obj)
+        else:
+            objects = list(objects)
+            for obj in objects:
+                self.order[obj] = self.count
+                self.count += 1
+            for column, row, indices in buckets:
+                self.cells[(column, row)] = [objects[i] for i in indices]
+
+    @staticmethod
+    def hit_box(obj):
+        return obj.hit_box
+
+    @staticmethod
+    def span(box):  # Returns the first and last column and row that a box (x, y, length, width) covers
+        x1, x2 = sorted((box[0], box[0] + box[2]))  # Sorted because spikes can have a negative height
+        y1, y2 = sorted((box[1], box[1] + box[3]))
+        return int(x1 // SpatialGrid.CELL), int(x2 // SpatialGrid.CELL), int(y1 // SpatialGrid.CELL), \
+            int(y2 // SpatialGrid.CELL)
+
+    @staticmethod
+    def cells_of(box):  # Returns every cell that a box covers
+        column1, column2, row1, row2 = SpatialGrid.span(box)
+        return [(column, row) for column in range(column1, column2 + 1) for row in range(row1, row2 + 1)]
+
+    def add(self, obj):  # Adds an object using its box
+        for cell in SpatialGrid.cells_of(self.box(obj)):
+            self.cells.setdefault(cell, []).append(obj)
+        self.order[obj] = self.count
+        self.count += 1
+
+    def remove(self, obj):  # Removes an object (its box must not have changed since it was added)
+        for cell in SpatialGrid.cells_of(self.box(obj)):
+            self.cells[cell].remove(obj)
+        del self.order[obj]
+
+    def query(self, box):  # Returns the objects in the cells that a box covers (this may include some that miss it)
+        SpatialGrid.queries += 1
+        column1, column2, row1, row2 = SpatialGrid.span(box)
+        if (column2 - column1 + 1) * (row2 - row1 + 1) > len(self.cells):  # A big box (like a selection box)
+            cells = [cell for cell in self.cells if column1 <= cell[0] <= column2 and row1 <= cell[1] <= row2]
+        else:
+            cells = SpatialGrid.cells_of(box)
+        if len(cells) == 1:  # A single cell is already in order
+            return self.cells.get(cells[0], ())
+        found = set()
+        for cell in cells:
+            found.update(self.cells.get(cell, ()))
+        return sorted(found, key=self.order.__getitem__)
+
+
+class World:  # Everything in one level: the objects, camera, score and timer. Worlds share nothing with each other
+    # The list that each type of object is kept in
+    LISTS = {Platform: "platforms", Bouncy: "platforms", Wall: "platforms", JumpThrough: "jump_through",
+             Spike: "spikes", Ghost: "ghosts", Collectable: "collectables", MovingPlatform: "moving_platforms"}
+    RATE = 60  # Ticks in each second of play
+
+    def __init__(self, seed=None):  # The same seed always gives the same random numbers (used by the particles)
+        self.rng = random.Random(seed)
+        self.ticks = 0  # Number of ticks simulated
+        self.start_tick = 0  # Tick that the current run started on (reset when pacman respawns). Used for the timer
+        self.score = 0  # Number of collectables eaten
+        self.deaths = 0  # Number of times pacman has died
+        self.dirty = set()  # The kinds of object that have changed since the level was loaded or last saved
+        self.changes = 0  # Counts objects being added and removed (the editor's grids are made again when it changes)
+        self.clear()  # This also creates pacman
+
+    def clear(self):  # Clears all objects
+        self.pacman = PacMan(self, Window.LENGTH / 2, Window.WIDTH / 2)  # Pacman is created
+        self.scroll_x = 0  # Scroll x and y is reset
+        self.scroll_y = 0
+        self.platforms = EntityList()  # All lists are reset
+        self.jump_through = EntityList()
+        self.spikes = EntityList()
+        self.ghosts = EntityList()
+        self.collectables = EntityList()
+        self.moving_platforms = EntityList()
+        self.changes += 1
+        # Spatial grids of the platforms, jump through platforms and spikes (which never move)
+        self.grids = {"platforms": SpatialGrid(), "jump_through": SpatialGrid(), "spikes": SpatialGrid()}
+
+    def mark_dirty(self, kind):  # Marks a kind of object as changed so that the next save rewrites its file
+        self.dirty.add(kind)
+        self.dirty.add("data")  # Any change to a level resets its personal best
+
+    def add(self, obj, changed=True):  # Adds an object to the level. "changed" is False if its file already has it
+        name = World.LISTS[type(obj)]
+        getattr(self, name).append(obj)
+        if name in self.grids:
+            self.grids[name].add(obj)
+        self.changes += 1
+        if changed:
+            self.mark_dirty(GameData.kind(obj))  # The file must be rewritten on save
+
+    def remove(self, obj, changed=True):  # Removes an object from the level
+        name = World.LISTS[type(obj)]
+        getattr(self, name).remove(obj)
+        if name in self.grids:
+            self.grids[name].remove(obj)
+        self.changes += 1
+        if changed:
+            self.mark_dirty(GameData.kind(obj))
+
+    def follow(self):  # Moves the camera towards pacman
+        self.scroll_x += (self.pacman.x + self.pacman.r/2 - self.scroll_x - Window.LENGTH / 2) / 15  # 15 delay
+        self.scroll_y += (self.pacman.y + self.pacman.r/2 - self.scroll_y - Window.WIDTH / 2) / 15
+
+    def prepare(self, edit=False):  # Updates everything that depends on the scroll before the screen is drawn
+        for collectable in self.collectables:
+            collectable.prepare(edit=edit)
+        for platform in self.moving_platforms:
+            platform.prepare()
+        skip = False
+        for ghost in list(self.ghosts):  # Copied because dead ghosts remove themselves once their particles have gone
+            # In the original game a dead ghost removed itself from the list while render_screen looped over it, so
+            # the next ghost missed that frame. It is skipped here too so the game plays the same as it always has
+            if skip:
+                skip = False
+                continue
+            skip = ghost.prepare()
+        self.pacman.prepare()
+
+    def update(self, keys):  # Moves pacman, the ghosts and collectables by one tick. Returns True once all are eaten
+        self.ticks += 1
+        alive = not self.pacman.is_dead
+        self.pacman.update(keys)  # Pacman is updated
+        if alive and self.pacman.is_dead:
+            self.deaths += 1
+        Overlay.mark("pacman")
+        for ghost in self.ghosts:
+            ghost.update()  # Each ghost is updated
+        Overlay.mark("ghosts")
+
+        won = True  # Temporarily set to True
+        for collectable in self.collectables:  # Loops over collectables
+            collectable.update()  # Each one is updated
+            if not collectable.eaten:  # If any collectable is not eaten then won is set to False
+                won = False
+        Overlay.mark("collectables")
+        return won
+
+    def step(self, keys):  # Runs one tick of play without drawing anything (the same as a game in play mode)
+        self.follow()
+        self.prepare()
+        return self.update(keys)
+
+    def run_time(self):  # Seconds the current run has taken. Counted in ticks so it is the same on every computer
+        return (self.ticks - self.start_tick) / World.RATE
+
+    def progress(self):  # Collectables eaten and the number in the level (shown at the top of the screen)
+        return self.score, len(self.collectables)
+
+    def visible(self, name, view):  # The platforms, jump through platforms or spikes that might be in "view"
+        return self.grids[name].query(view)
+
+    def state_hash(self):  # Hash of everything that moves, so two runs can be compared without keeping their states
+        state = (self.ticks, self.start_tick, self.score, self.deaths, self.scroll_x, self.scroll_y,
+                 self.pacman.x, self.pacman.y, self.pacman.y_vel, self.pacman.is_dead,
+                 [(ghost.x, ghost.y, ghost.y_vel, ghost.direction, ghost.is_dead) for ghost in self.ghosts],
+                 [(platform.x, platform.y, platform.direction, platform.pause) for platform in self.moving_platforms],
+                 [collectable.eaten for collectable in self.collectables])
+        return hashlib.sha256(repr(state).encode()).hexdigest()
+
+
+class Selection:  # Finds objects in the editor and changes many at once. Spatial grids keep big levels fast
+    # Lists that are searched for objects, in the order that the editor has always checked them
+    NAMES = ("platforms", "jump_through", "spikes", "ghosts", "collectables", "moving_platforms")
+    MOVING = ("ghosts", "collectables", "moving_platforms")  # These move while playing so the world has no grid of them
+    ALLOWANCE = 3  # Objects this close to the mouse are under it
+    COLOUR = (0, 255, 255)  # Cyan outlines and selection box
+
+    def __init__(self, world):
+        self.world = world
+        self.objects = EntityList()  # Selected objects
+        self.grids = None  # Grids of the objects in MOVING where they are now (made when they are first needed)
+        self.changes = None  # The world's change count when the grids were last up to date
+        self.ops = []  # Changes made to the level since the journal last took them
+
+    @staticmethod
+    def box(obj):  # Area that an object covers in the level (the hit-boxes of moving objects are on the screen)
+        if type(obj) is Ghost:
+            return pygame.Rect(obj.x, obj.y, obj.r, obj.r)
+        if type(obj) is Collectable:
+            return pygame.Rect(obj.x - obj.r, obj.y - obj.r, obj.r * 2, obj.r * 2)
+        if type(obj) is MovingPlatform:
+            return pygame.Rect(obj.x, obj.y, obj.length, obj.width)
+        return obj.hit_box  # Platforms and spikes never move
+
+    @staticmethod
+    def moved(obj, x, y):  # A new object like "obj" but x and y pixels away. Made from the row it would be saved as
+        row = list(GameData.row(obj))
+        row[0] += x
+        row[1] += y
+        if type(obj) is MovingPlatform:  # Both ends of the path move
+            row[2] += x
+            row[3] += y
+        return GameData.create(GameData.kind(obj), row, obj.world)
+
+    def reset(self):  # Called when edit mode starts (moving objects will have moved while playing)
+        self.objects = EntityList()
+        self.grids = None
+
+    def index(self):  # Returns the grids of every kind of object, making the editor's own grids again if needed
+        if self.grids is None or self.changes != self.world.changes:  # The world was changed by something else
+            self.grids = {name: SpatialGrid(getattr(self.world, name), box=Selection.box) for name in Selection.MOVING}
+            self.changes = self.world.changes
+        return {**self.world.grids, **self.grids}
+
+    def find(self, box):  # Returns every object touching a box (in level coordinates) in the order of NAMES
+        grids = self.index()
+        rect = pygame.Rect(box)
+        return [obj for name in Selection.NAMES for obj in grids[name].query(box)
+                if Selection.box(obj).colliderect(rect)]
+
+    def under(self, x, y):  # Returns the objects under a point in the level
+        return self.find((x - Selection.ALLOWANCE, y - Selection.ALLOWANCE, Selection.ALLOWANCE * 2,
+                          Selection.ALLOWANCE * 2))
+
+    def select(self, objects):  # Replaces the selection
+        self.objects = EntityList(objects)
+
+    def add(self, obj):  # Adds an object to the level and the editor's grids
+        grids = self.index()
+        self.world.add(obj)
+        name = World.LISTS[type(obj)]
+        if name in Selection.MOVING:
+            grids[name].add(obj)
+        self.changes = self.world.changes  # The grids are still up to date
+        self.ops.append(("add", obj))
+
+    def delete(self, objects):  # Removes objects from the level (and the selection)
+        grids = self.index()
+        for obj in list(objects):  # Copied because "objects" can be the selection
+            name = World.LISTS[type(obj)]
+            if obj in getattr(self.world, name):  # Dead ghosts may have already gone
+                self.world.remove(obj)
+                if name in Selection.MOVING:
+                    grids[name].remove(obj)
+                self.ops.append(("remove", obj))
+            if obj in self.objects:
+                self.objects.remove(obj)
+        self.changes = self.world.changes
+
+    def set_start(self, pos):  # Moves pacman's start position
+        self.ops.append(("start", self.world.pacman.start_pos, pos))
+        self.world.pacman.start_pos = pos
+        self.world.mark_dirty("data")  # data.txt holds the start pos
+
+    def move(self, x, y):  # Moves the selected objects by x and y pixels
+        moved = [Selection.moved(obj, x, y) for obj in self.objects]
+        self.delete(self.objects)
+        for obj in moved:
+            self.add(obj)
+        self.select(moved)
+
+    def duplicate(self, x, y):  # Copies the selected objects x and y pixels away. The copies are then selected
+        copies = [Selection.moved(obj, x, y) for obj in self.objects]
+        for obj in copies:
+            self.add(obj)
+        self.select(copies)
+
+    def draw(self, win, x=0, y=0):  # Outlines the selected objects. "x" and "y" are how far they are being dragged
+        scroll_x, scroll_y = self.world.scroll_x - x, self.world.scroll_y - y
+        screen = pygame.Rect(scroll_x, scroll_y, Window.LENGTH, Window.WIDTH)
+        for obj in self.objects:
+            box = Selection.box(obj).move(0, 0)  # A copy that can be normalised (flipped spikes have a negative height)
+            box.normalize()
+            if box.colliderect(screen):  # Only the objects on the screen are drawn
+                pygame.draw.rect(win, Selection.COLOUR, box.move(-scroll_x, -scroll_y), 2)
+
+
 class EditMode:  # Responsible for the game editor
-    def __init__(self):
+    def __init__(self, world, journal):  # Requires the world that is being edited and the journal of its edits
+        self.world = world
+        self.journal = journal
         # Value defaults held in a dictionary
         self.default = {"length": 100, "width": 14, "mode": 0, "spikes_num": 3, "spikes_flip": 0, "ghost_colour": 0,
                         "platform_speed": 3, "move_mode": "static"}
@@ -877,93 +1339,90 @@ class EditMode:  # Responsible for the game editor
         self.speed_text = self.speed_font.render(str(self.platform_speed), True, (255, 255, 255))  # Text for speed
 
         self.start_pos_img = pygame.image.load("assets/start_pos.png")  # Loads start pos image
-        self.start_pos_img = pygame.transform.scale(self.start_pos_img, (Game.pacman.r, Game.pacman.r))  # Scales image
+        self.start_pos_img = pygame.transform.scale(self.start_pos_img, (world.pacman.r, world.pacman.r))  # Scales it
 
         # List of all object modes and cursor objects the will follow the cursor while the user is in edit mode
         self.modes = [Platform, Bouncy, Spike, JumpThrough, Ghost, Wall, MovingPlatform, Collectable, "start"]
         self.mode = 0
-        self.cursor_object = [Platform(0, 0, 100, 14), Bouncy(0, 0, 100, 14), (Spike(0, 0, 3),
-                                                                               Spike(0, 0, 3, flip=True)),
-                              JumpThrough(0, 0, 100, 14),
-                              (Ghost(0, 0, 0), Ghost(0, 0, 1), Ghost(0, 0, 2), Ghost(0, 0, 3)), Wall(0, 0, 100, 14),
-                              MovingPlatform((0, 0), (1, 1), 100, 14, 3), Collectable(0, 0), "start"]
+        self.cursor_object = [Platform(world, 0, 0, 100, 14), Bouncy(world, 0, 0, 100, 14),
+                              (Spike(world, 0, 0, 3), Spike(world, 0, 0, 3, flip=True)),
+                              JumpThrough(world, 0, 0, 100, 14),
+                              tuple(Ghost(world, 0, 0, colour) for colour in range(4)), Wall(world, 0, 0, 100, 14),
+                              MovingPlatform(world, (0, 0), (1, 1), 100, 14, 3), Collectable(world, 0, 0), "start"]
 
         self.increment_speed = 5
         self.scroll_speed = 10  # The scrolling speed to the arrow keys
         self.held = 0
         self.platform_cooldown = 0
-        self.scroll_x = 0  # This scroll_x and scroll_y is different from Game.SCROLL_X and Game.SCROLL_Y
+        self.scroll_x = 0  # This scroll_x and scroll_y is different from the world's scroll_x and scroll_y
         self.scroll_y = 0
 
+        self.selection = Selection(world)  # Objects selected with shift and the mouse
+        self.band = None  # Where a selection box was started (in level coordinates)
+        self.moving = None  # Where the selection was picked up when it is being dragged
+        self.delete_held = False
+        self.copy_held = False
+
     def update(self, keys, win):  # Main loop for class
-        win.blit(self.start_pos_img, (PacMan.start_pos[0] - Game.SCROLL_X, PacMan.start_pos[1] - Game.SCROLL_Y))
+        pacman = self.world.pacman
+        win.blit(self.start_pos_img, (pacman.start_pos[0] - self.world.scroll_x,
+                                      pacman.start_pos[1] - self.world.scroll_y))
 
         mouse = pygame.mouse.get_pos()  # Gets mouse position
 
-        Game.SCROLL_X = self.scroll_x  # Game.SCROLL_X is set to the scroll_x of the edit mode (also done for y)
-        Game.SCROLL_Y = self.scroll_y
-
-        # Backspace, delete or right click removes the object under the mouse
-        if keys[pygame.K_BACKSPACE] or keys[pygame.K_DELETE] or pygame.mouse.get_pressed(3)[2]:
-            rect = pygame.Rect(mouse[0] - 3, mouse[1] - 3, 6, 6)  # Creates a rectangle around the mouse (allowance 3)
-            for platform in Game.platforms:  # Checks for collision with platforms
-                if platform.touching_rect(rect):
-                    Game.platforms.remove(platform)  # Removes the platform
-            for spike in Game.spikes:  # Checks for collision with spikes
-                if spike.touching_rect(rect):
-                    Game.spikes.remove(spike)  # Removes the spike
-            for platform in Game.jump_through:  # Checks for collision with jump through platforms
-                if platform.touching_rect(rect):
-                    Game.jump_through.remove(platform)  # Removes platform
-            for ghost in Game.ghosts:  # Checks for collision with ghosts
-                if ghost.touching_rect(rect):
-                    Game.ghosts.remove(ghost)  # Removes ghost
-            for collectable in Game.collectables:  # Checks for collision with collectables
-                if collectable.touching_rect(rect, edit=True):
-                    Game.collectables.remove(collectable)  # Removes collectable
-            for platform in Game.moving_platforms:  # Checks for collision with moving platforms
-                if platform.touching_rect(rect):
-                    Game.moving_platforms.remove(platform)  # Removes the moving platform
-
-        if keys[pygame.K_z] or pygame.mouse.get_pressed(3)[1]:  # Z key or middle mouse button works as a pick a block
-            rect = pygame.Rect(mouse[0] - 3, mouse[1] - 3, 6, 6)  # Creates a rectangle around the mouse (allowance 3)
-            for platform in Game.platforms + Game.jump_through:  # Checks for platforms and jump through platforms
-                if platform.touching_rect(rect):
-                    if str(type(platform)) == "<class '__main__.Bouncy'>":  # Bouncy
-                        self.mode = 1
-                    elif str(type(platform)) == "<class '__main__.JumpThrough'>":  # Jump through
-                        self.mode = 3
-                    elif str(type(platform)) == "<class '__main__.Wall'>":  # Wall
-                        self.mode = 5
-                    else:  # Standard platform
-                        self.mode = 0
-                    self.length = platform.length  # Length and width is set to be the same as the platform
-                    self.width = platform.width
-            for spike in Game.spikes:  # Checks for collision with spikes
-                if spike.touching_rect(rect):
-                    self.mode = 2
-                    self.spikes_num = spike.num  # number and flip is set to the same as the spike
-                    self.spikes_flip = spike.flip
-            for ghost in Game.ghosts:  # Checks for collision with ghosts
-                if ghost.touching_rect(rect):
-                    self.mode = 4
-                    self.ghost_colour = ghost.type  # Sets the colour to the same as the ghost
-            for collectable in Game.collectables:  # Checks for collision with a collectable
-                if collectable.touching_rect(rect, edit=True):
-                    self.mode = 7  # Only sets the mode to the collectable mode
-            for platform in Game.moving_platforms:  # Checks for collision with a moving platform
-                if platform.touching_rect(rect):
-                    self.mode = 6  # Sets it to platform mode
-                    self.length = platform.length  # Length and width are set to the platform's length and width
-                    self.width = platform.width
+        self.world.scroll_x = self.scroll_x  # The world's scroll_x is set to the scroll_x of the edit mode (also for y)
+        self.world.scroll_y = self.scroll_y
+
+        x, y = mouse[0] + self.scroll_x, mouse[1] + self.scroll_y  # Mouse position in the level
+
+        # Backspace or delete removes the selected objects. Otherwise they (or right click) remove the objects under
+        # the mouse
+        deleting = keys[pygame.K_BACKSPACE] or keys[pygame.K_DELETE]
+        if deleting and len(self.selection.objects):
+            self.selection.delete(self.selection.objects)
+            self.delete_held = True  # Nothing else is deleted until the key is let go
+        elif (deleting and not self.delete_held) or pygame.mouse.get_pressed(3)[2]:
+            self.selection.delete(self.selection.under(x, y))
+        if not deleting:
+            self.delete_held = False
+
+        if keys[pygame.K_c]:  # C duplicates the selected objects
+            if not self.copy_held and len(self.selection.objects):
+                self.selection.duplicate(20, 20)  # Copies are put 20 pixels away so they can be seen
+            self.copy_held = True
+        else:
+            self.copy_held = False
+
+        if not (deleting or pygame.mouse.get_pressed(3)[2]):  # Everything removed while they are held is one edit
+            self.journal.commit(self.selection)
+
+        # Z key or middle mouse button works as a pick a block (ctrl and Z is undo)
+        if (keys[pygame.K_z] and not pygame.key.get_mods() & pygame.KMOD_CTRL) or pygame.mouse.get_pressed(3)[1]:
+            for obj in self.selection.under(x, y):  # Objects found later take priority
+                self.mode = self.modes.index(type(obj))  # The mode that places this kind of object
+                if type(obj) is Spike:
+                    self.spikes_num = obj.num  # number and flip is set to the same as the spike
+                    self.spikes_flip = obj.flip
+                elif type(obj) is Ghost:
+                    self.ghost_colour = obj.type  # Sets the colour to the same as the ghost
+                elif type(obj) is not Collectable:  # Platforms of every kind
+                    self.length = obj.length  # Length and width is set to be the same as the platform
+                    self.width = obj.width
+
+        if self.moving is None:  # The selection is drawn where it is being dragged to
+            self.selection.draw(win)
+        else:
+            self.selection.draw(win, x - self.moving[0], y - self.moving[1])
+        if self.band is not None:  # The selection box
+            pygame.draw.rect(win, Selection.COLOUR, self.band_box(x, y).move(-self.scroll_x, -self.scroll_y), 1)
 
         if keys[pygame.K_t]:  # If "t" keys is pressed pacman is teleported to the mouse position
-            if mouse[1] > Window.WIDTH - 70 - Game.pacman.r - Game.SCROLL_Y:  # If mouse below ground: pacman on ground
-                Game.pacman.x, Game.pacman.y = mouse[0] + Game.SCROLL_X, Window.WIDTH - 70 - Game.pacman.r
-                Game.pacman.update_hit_box()  # Updates the hit-box
+            if mouse[1] > Window.WIDTH - 70 - pacman.r - self.world.scroll_y:  # If mouse below ground: pacman on ground
+                pacman.x, pacman.y = mouse[0] + self.world.scroll_x, Window.WIDTH - 70 - pacman.r
+                pacman.update_hit_box()  # Updates the hit-box
             else:
-                Game.pacman.x, Game.pacman.y = mouse[0] + Game.SCROLL_X, mouse[1] + Game.SCROLL_Y  # resets x and y
-                Game.pacman.update_hit_box()  # Updates the hit-box
+                pacman.x, pacman.y = mouse[0] + self.world.scroll_x, mouse[1] + self.world.scroll_y  # resets x and y
+                pacman.update_hit_box()  # Updates the hit-box
 
         if keys[pygame.K_1]:  # If a key is pressed then the mode will be set to that key
             self.mode = 0
@@ -1059,8 +1518,8 @@ class EditMode:  # Responsible for the game editor
 
         obj = self.cursor_object[self.mode]  # Gets the cursor object
         if self.mode == 8:  # Start pos
-            if mouse[1] > Window.WIDTH - 70 - Game.pacman.r - Game.SCROLL_Y:  # If mouse is below ground
-                win.blit(self.start_pos_img, (mouse[0], (Window.WIDTH - 70 - Game.pacman.r - Game.SCROLL_Y)))
+            if mouse[1] > Window.WIDTH - 70 - pacman.r - self.world.scroll_y:  # If mouse is below ground
+                win.blit(self.start_pos_img, (mouse[0], (Window.WIDTH - 70 - pacman.r - self.world.scroll_y)))
             else:
                 win.blit(self.start_pos_img, (mouse[0], mouse[1]))  # Draws the start pos at mouse position
             return
@@ -1076,9 +1535,9 @@ class EditMode:  # Responsible for the game editor
             self.speed_text = self.speed_font.render(f"Speed: {self.platform_speed}", True, (255, 255, 255))
             win.blit(self.speed_text, (5, Window.WIDTH - 25))  # Draws the speed text on teh screen
 
-            if round(mouse[0] + Game.SCROLL_X) != round(obj.pos2[0]) or round(mouse[1] + Game.SCROLL_Y) != \
+            if round(mouse[0] + self.world.scroll_x) != round(obj.pos2[0]) or round(mouse[1] + self.world.scroll_y) != \
                     round(obj.pos2[1]):  # If the mouse has moved position
-                obj.move_end(mouse[0] + Game.SCROLL_X, mouse[1] + Game.SCROLL_Y)  # THe endpoint is updated
+                obj.move_end(mouse[0] + self.world.scroll_x, mouse[1] + self.world.scroll_y)  # THe endpoint is updated
                 self.platform_cooldown = 5  # PLatform cooldown is set to 5
 
             obj.draw_path(win)  # Full path of platform is drawn
@@ -1089,7 +1548,7 @@ class EditMode:  # Responsible for the game editor
                 obj.move()  # Platform is moved
             return  # No further code is run
 
-        obj.x, obj.y = mouse[0] + Game.SCROLL_X, mouse[1] + Game.SCROLL_Y  # X and Y calculated. (using scroll x and y)
+        obj.x, obj.y = mouse[0] + self.world.scroll_x, mouse[1] + self.world.scroll_y  # X and Y (using the scroll)
 
         if self.mode == 0 or self.mode == 1 or self.mode == 5 or self.mode == 3 or self.mode == 6:
             if obj.y > Window.WIDTH - 70 - self.width:  # If object is below the ground then it puts it on the ground
@@ -1103,8 +1562,8 @@ class EditMode:  # Responsible for the game editor
                 if obj.y > Window.WIDTH - 70:  # Prevents spike below the ground
                     obj.y = Window.WIDTH - 70
         elif self.mode == 4:  # Ghost
-            if obj.y > Window.WIDTH - 70 - Game.pacman.r:  # If object is below the ground then it puts it on the ground
-                obj.y = Window.WIDTH - 70 - Game.pacman.r
+            if obj.y > Window.WIDTH - 70 - pacman.r:  # If object is below the ground then it puts it on the ground
+                obj.y = Window.WIDTH - 70 - pacman.r
         elif self.mode == 7:  # Collectable
             if obj.y > Window.WIDTH - 77:  # If object is below the ground then it puts it on the ground
                 obj.y = Window.WIDTH - 77
@@ -1116,8 +1575,8 @@ class EditMode:  # Responsible for the game editor
         obj.draw(win)  # Object is drawn
 
     def add_platform(self, x, y):
-        x += Game.SCROLL_X  # X and Y is adjusted for the scroll x and y
-        y += Game.SCROLL_Y
+        x += self.world.scroll_x  # X and Y is adjusted for the scroll x and y
+        y += self.world.scroll_y
         # Lines below deal with stopping user from placing an object below the stage
         if self.mode == 0 or self.mode == 1 or self.mode == 5 or self.mode == 3 or self.mode == 6:  # Platforms
             if y > Window.WIDTH - 70 - self.width:  # If the platform is below ground it is drawn on the ground
@@ -1130,39 +1589,39 @@ class EditMode:  # Responsible for the game editor
                 if y > Window.WIDTH - 70:  # If below ground
                     y = Window.WIDTH - 70
         elif self.mode == 4:  # Ghosts
-            if y > Window.WIDTH - 70 - Game.pacman.r:  # If below ground
-                y = Window.WIDTH - 70 - Game.pacman.r
+            if y > Window.WIDTH - 70 - self.world.pacman.r:  # If below ground
+                y = Window.WIDTH - 70 - self.world.pacman.r
         elif self.mode == 8:  # Spawn point
-            if y > Window.WIDTH - 70 - Game.pacman.r:  # If below ground
-                y = Window.WIDTH - 70 - Game.pacman.r
+            if y > Window.WIDTH - 70 - self.world.pacman.r:  # If below ground
+                y = Window.WIDTH - 70 - self.world.pacman.r
         elif self.mode == 7:  # Collectable
             if y > Window.WIDTH - 77:  # If below ground
                 y = Window.WIDTH - 77
 
         if self.mode == 0 or self.mode == 1 or self.mode == 5:  # Adds a platform
-            Game.platforms.append(self.modes[self.mode](x, y, self.length, self.width))
+            self.selection.add(self.modes[self.mode](self.world, x, y, self.length, self.width))
         elif self.mode == 2:  # Adds a spike
-            Game.spikes.append(self.modes[self.mode](x, y, self.spikes_num, flip=self.spikes_flip))
+            self.selection.add(self.modes[self.mode](self.world, x, y, self.spikes_num, flip=self.spikes_flip))
         elif self.mode == 3:  # Adds jump through
-            Game.jump_through.append(self.modes[self.mode](x, y, self.length, self.width))
+            self.selection.add(self.modes[self.mode](self.world, x, y, self.length, self.width))
         elif self.mode == 4:  # Adds a ghost
-            Game.ghosts.append(self.modes[self.mode](x, y, self.ghost_colour))
+            self.selection.add(self.modes[self.mode](self.world, x, y, self.ghost_colour))
         elif self.mode == 8:  # Moves the start pos
-            PacMan.start_pos = (x, y, self.ghost_colour)
+            self.selection.set_start((x, y, self.ghost_colour))
         elif self.mode == 7:  # Adds a collectable
-            Game.collectables.append(self.modes[self.mode](x, y))
+            self.selection.add(self.modes[self.mode](self.world, x, y))
         elif self.mode == 6:  # Adds a moving platform
             if self.move_mode == "static":
                 self.move_mode = "dynamic"  # The mode is updates to dynamic
                 self.cursor_object[self.mode].pos1 = (x, y)  # Stores the mouse pos as pos1
             else:  # Creates the moving object and adds it to the moving platforms list
                 self.move_mode = "static"
-                Game.moving_platforms.append(self.modes[self.mode](self.cursor_object[self.mode].pos1, (x, y),
-                                                                   self.length, self.width, self.platform_speed))
+                self.selection.add(self.modes[self.mode](self.world, self.cursor_object[self.mode].pos1, (x, y),
+                                                         self.length, self.width, self.platform_speed))
 
     def reset(self):  # Resets values back to default (using the default dictionary)
-        self.scroll_x = Game.SCROLL_X  # Scroll x and y is reset
-        self.scroll_y = Game.SCROLL_Y
+        self.scroll_x = self.world.scroll_x  # Scroll x and y is reset
+        self.scroll_y = self.world.scroll_y
         self.held = 0
         self.length = self.default["length"]  # Defaults dictionary is used to find all of the default values
         self.width = self.default["width"]
@@ -1172,22 +1631,258 @@ class EditMode:  # Responsible for the game editor
         self.ghost_colour = self.default["ghost_colour"]
         self.platform_speed = self.default["platform_speed"]
         self.move_mode = self.default["move_mode"]
+        self.selection.reset()  # Nothing is selected
+        self.band = None
+        self.moving = None
+
+    def undo(self):  # Undoes the last edit. Nothing stays selected because the selected objects may be gone
+        self.journal.undo(self.selection)
+        self.selection.select(())
+        self.band = None
+        self.moving = None
+
+    def redo(self):
+        self.journal.redo(self.selection)
+        self.selection.select(())
+        self.band = None
+        self.moving = None
+
+    def band_box(self, x, y):  # The selection box from where it was started to x and y (in level coordinates)
+        box = pygame.Rect(self.band[0], self.band[1], x - self.band[0], y - self.band[1])
+        box.normalize()
+        return box
+
+    def press(self, mouse):  # Left click. Returns True if it starts a selection box or picks up the selection
+        x, y = mouse[0] + self.scroll_x, mouse[1] + self.scroll_y
+        if pygame.key.get_mods() & pygame.KMOD_SHIFT:  # Shift and drag selects everything in a box
+            self.band = x, y
+            return True
+        if any(obj in self.selection.objects for obj in self.selection.under(x, y)):  # Dragging a selected object
+            self.moving = x, y
+            return True
+        return False
+
+    def release(self, mouse):  # Left click let go. Returns True if it finished a selection box or a move
+        x, y = mouse[0] + self.scroll_x, mouse[1] + self.scroll_y
+        if self.band is not None:
+            box = self.band_box(x, y)
+            if box.width < 5 and box.height < 5:  # A shift click selects the objects under the mouse
+                self.selection.select(self.selection.under(x, y))
+            else:
+                self.selection.select(self.selection.find(box))
+            self.band = None
+            return True
+        if self.moving is not None:
+            if (x, y) != self.moving:
+                self.selection.move(x - self.moving[0], y - self.moving[1])
+            self.moving = None
+            return True
+        return False
 
     def drag(self, start, current):  # Moves the screen to the given x and y
         self.scroll_x += (start[0] - current[0]) - self.scroll_x  # Drags the screen by changing scroll x and y
         self.scroll_y += (start[1] - current[1]) - self.scroll_y
 
 
+class Records:  # Stores personal bests, attempts and progress in one database with an in-memory cache
+    FILE = "game_data/records.db"
+    BATCH = 20  # Number of changed levels that are kept in memory before they are written to the database
+    connection = None  # Opened the first time a record is needed
+    cache = {}  # Level location -> [personal best, attempts]
+    pending = set()  # Levels whose records have changed but haven't been written yet
+    progress = None  # The highest built-in level that has been beaten
+    stamp = None  # Modified time and size of the database when it was last read or written by the game
+
+    @staticmethod
+    def key(location):  # All locations are stored in the same form ("game_data/built_in/level1")
+        return os.path.normpath(location).replace("\\", "/")
+
+    @staticmethod
+    def open():  # Opens the database, creating it from the old progress.txt file the first time
+        if Records.connection is not None:
+            return Records.connection
+        Records.connection = sqlite3.connect(Records.FILE)
+        Records.connection.execute("CREATE TABLE IF NOT EXISTS records (level TEXT PRIMARY KEY, pb REAL NOT NULL, "
+                                   "attempts INTEGER NOT NULL)")
+        Records.connection.execute("CREATE TABLE IF NOT EXISTS progress (id INTEGER PRIMARY KEY, level INTEGER)")
+        if Records.connection.execute("SELECT level FROM progress WHERE id = 0").fetchone() is None:
+            try:  # The progress is copied over from progress.txt
+                with open("game_data/progress.txt") as f:
+                    level = int(f.read())
+            except (OSError, ValueError):
+                level = 0
+            Records.connection.execute("INSERT INTO progress VALUES (0, ?)", (level,))
+            Records.connection.commit()
+        atexit.register(Records.flush)  # Anything still in memory is written when the game closes
+        return Records.connection
+
+    @staticmethod
+    def file_stamp():  # Returns the modified time and size of the database file
+        try:
+            info = os.stat(Records.FILE)
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    @staticmethod
+    def refresh():  # Empties the cache if the database has been changed outside the game
+        if Records.stamp is not None and Records.file_stamp() == Records.stamp:
+            return  # Nothing has changed so the cache is still correct
+        Records.cache = {level: Records.cache[level] for level in Records.pending}  # Unwritten records are kept
+        Records.progress = None
+        Records.load_all()
+
+    @staticmethod
+    def load_all():  # Loads every record in a single query (used by the level select screen)
+        for level, pb, attempts in Records.open().execute("SELECT level, pb, attempts FROM records"):
+            if level not in Records.pending:  # Records that haven't been written yet are newer
+                Records.cache[level] = [pb, attempts]
+        Records.stamp = Records.file_stamp()
+
+    @staticmethod
+    def get(location):  # Returns the [pb, attempts] record of a level, reading it only if it isn't cached
+        level = Records.key(location)
+        if level not in Records.cache:
+            row = Records.open().execute("SELECT pb, attempts FROM records WHERE level = ?", (level,)).fetchone()
+            if row is None:  # Levels from before the database kept their PB on the second line of data.txt
+                try:
+                    with open(os.path.join(location, "data.txt")) as f:
+                        pb = float(f.readlines()[1])
+                except (OSError, IndexError, ValueError):
+                    pb = 0
+                row = (pb, 0)
+            Records.cache[level] = list(row)
+        return Records.cache[level]
+
+    @staticmethod
+    def change(location, pb=None, attempts=0):  # Changes a record in memory and writes it once enough have changed
+        record = Records.get(location)
+        if pb is not None:
+            record[0] = pb
+        record[1] += attempts
+        Records.pending.add(Records.key(location))
+        if len(Records.pending) >= Records.BATCH:
+            Records.flush()
+
+    @staticmethod
+    def flush():  # Writes every changed record to the database in one transaction
+        if not Records.pending:
+            return
+        connection = Records.open()
+        with connection:  # Commits once all rows have been written
+            connection.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?)",
+                                   [(level, *Records.cache[level]) for level in Records.pending])
+        Records.pending.clear()
+        Records.stamp = Records.file_stamp()  # The game's own writes don't empty the cache
+
+    @staticmethod
+    def get_pb(location):  # Returns the personal best time of a level (0 if it hasn't been beaten)
+        return Records.get(location)[0]
+
+    @staticmethod
+    def update_pb(location, pb):  # Saves a new time if it is faster than the current personal best
+        current = Records.get_pb(location)
+        if current > pb or current == 0:
+            Records.change(location, pb=pb)
+
+    @staticmethod
+    def reset(location):  # Resets the personal best of a level that has been edited
+        Records.change(location, pb=0)
+
+    @staticmethod
+    def add_attempt(location):  # Counts another attempt at a level
+        Records.change(location, attempts=1)
+
+    @staticmethod
+    def delete(location):  # Removes the record of a deleted level
+        level = Records.key(location)
+        Records.cache.pop(level, None)
+        Records.pending.discard(level)
+        with Records.open():
+            Records.connection.execute("DELETE FROM records WHERE level = ?", (level,))
+        Records.stamp = Records.file_stamp()
+
+    @staticmethod
+    def get_progress():  # Returns the highest built-in level that has been beaten
+        if Records.progress is None:  # Progress is only read from the database once
+            Records.progress = Records.open().execute("SELECT level FROM progress WHERE id = 0").fetchone()[0]
+        return Records.progress
+
+    @staticmethod
+    def set_progress(level):  # Saves a new highest beaten level
+        with Records.open():
+            Records.connection.execute("UPDATE progress SET level = ? WHERE id = 0", (level,))
+        Records.progress = level
+        Records.stamp = Records.file_stamp()
+
+
 class GameData:  # Loads and saves game data
+    # Every file in a level folder. Platforms, bouncy pads and walls are saved separately
+    FILES = ["platform", "bouncy", "wall", "jump_through", "spike", "ghost", "collectable", "moving_platform", "data"]
+    KINDS = {Platform: "platform", Bouncy: "bouncy", Wall: "wall", JumpThrough: "jump_through", Spike: "spike",
+             Ghost: "ghost", Collectable: "collectable", MovingPlatform: "moving_platform"}  # Object to file name
+    CLASSES = {kind: obj for obj, kind in KINDS.items()}  # File name to object
+    saver = None  # Background thread used to write saves (created on the first save)
+    pending = []  # Saves that have been started but may not have finished
+    BAKED = "compiled.json"  # File in each level folder that holds the data worked out by compile()
+    BAKE_VERSION = 1  # Changed whenever the compiled data changes so old files are compiled again
+    # (including the hit-boxes of spikes, so it must be changed if Spike.box or its constants change)
+
+    @staticmethod
+    def kind(obj):  # Returns the name of the file that an object is saved in
+        return GameData.KINDS[type(obj)]
+
+    @staticmethod
+    def objects(kind, world):  # Returns the objects of one kind in the order they are saved
+        if kind in ("platform", "bouncy", "wall"):  # These share the platforms list so they are filtered by type
+            return [p for p in world.platforms if GameData.kind(p) == kind]
+        return getattr(world, World.LISTS[GameData.CLASSES[kind]])
+
+    @staticmethod
+    def row(obj):  # Returns the numbers that are saved for an object
+        if type(obj) is MovingPlatform:
+            return obj.pos1[0], obj.pos1[1], obj.pos2[0], obj.pos2[1], obj.length, obj.width, obj.speed
+        if type(obj) is Spike:
+            return obj.x, obj.y, obj.num, obj.flip
+        if type(obj) is Ghost:
+            return obj.x, obj.y, obj.type
+        if type(obj) is Collectable:
+            return obj.x, obj.start_y  # Collectables bob up and down while playing
+        return obj.x, obj.y, obj.length, obj.width  # Platforms, bouncy pads, walls and jump through platforms
+
+    @staticmethod
+    def create(kind, row, world):  # Creates an object in "world" from a row of its file
+        if kind == "moving_platform":
+            return MovingPlatform(world, (row[0], row[1]), (row[2], row[3]), row[4], row[5], row[6])
+        return GameData.CLASSES[kind](world, *row)
+
     @staticmethod
-    def load_file(file, obj, lst):  # Reads "file", creates "obj" with file data, adds "obj" to "lst"
-        with open(file, "r") as f:  # Reads the file and stores it in a variable f
-            for line in f.readlines():  # Loops over each line of the file
-                data = [float(i) for i in line.split()]  # Data is extracted and put into a list using split()
-                lst.append(obj(*data))  # Object is created and added to the list (object is deconstructed using *)
+    def rows(kind, world):  # Copies the data of every object of one kind (done on the main thread so edits can't race)
+        if kind == "data":  # Pacman start position
+            return [(world.pacman.start_pos[0], world.pacman.start_pos[1])]
+        return [GameData.row(obj) for obj in GameData.objects(kind, world)]
 
     @staticmethod
-    def save(location):  # Saves all game data
+    def write_file(path, text):  # Writes a file atomically so a crash can never leave a half written level
+        temp = f"{path}.{threading.get_ident()}.tmp"  # Each thread uses its own temporary file
+        with open(temp, "w") as f:  # Data is written to a temporary file first
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())  # Makes sure the data has reached the disk
+        os.replace(temp, path)  # The temporary file then replaces the real one in a single step
+
+    @staticmethod
+    def write(folder, data):  # Writes the rows of each kind in "data" to the level in "folder"
+        for kind, rows in data.items():
+            if kind == "data":  # data.txt holds the start position and the personal best time
+                text = f"{rows[0][0]} {rows[0][1]}\n0"
+            else:
+                text = "".join(" ".join(str(i) for i in row) + "\n" for row in rows)
+            GameData.write_file(os.path.join(folder, kind + ".txt"), text)
+        GameData.compile(folder)  # The compiled data is made now so that loading the level doesn't have to
+
+    @staticmethod
+    def save(location, world):  # Saves the changed objects of "world" in the background and returns the location
         if not location:  # If it is a new unnamed file
             number = 1  # Number is start as 1
             name = f"unnamed{number}"  # Creates a string called "unnamed" and a number
@@ -1195,108 +1890,1731 @@ class GameData:  # Loads and saves game data
                 number += 1
                 name = f"unnamed{number}"
             os.mkdir(os.path.join("./game_data/custom", name))  # Creates a new directory in custom folder
+            kinds = GameData.FILES  # Every file must be written for a new level
         else:
             name = location.split("/")[-1]  # Gets the final location name
+            kinds = [kind for kind in GameData.FILES if kind in world.dirty]  # Only changed files are rewritten
+
+        data = {kind: GameData.rows(kind, world) for kind in kinds}  # Data is copied now so the level can keep changing
+        Preloader.forget("game_data/custom/" + name)  # A preloaded copy of the level would be out of date
+        world.dirty.clear()
+        if "data" in data:  # The level has changed so its personal best is reset
+            Records.reset("game_data/custom/" + name)
+        if data:
+            GameData.submit(GameData.write, os.path.join("./game_data/custom", name), data)
+        return "game_data/custom/" + name
+
+    @staticmethod
+    def submit(func, *args):  # Runs "func" on the save thread
+        if GameData.saver is None:  # A single worker means saves are always written in order
+            GameData.saver = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="save")
+        # Finished saves are forgotten unless they failed (wait() raises their errors)
+        GameData.pending = [future for future in GameData.pending if not future.done() or future.exception()]
+        GameData.pending.append(GameData.saver.submit(func, *args))
+
+    @staticmethod
+    def wait():  # Waits for any background saves to finish (used before level files are read)
+        while GameData.pending:
+            GameData.pending.pop(0).result()  # result() also re-raises any error from the save
+
+    @staticmethod
+    def read(file):  # Reads a level, using its compiled data unless a level file has changed since it was compiled
+        baked = os.path.join(file, GameData.BAKED)
+        try:
+            if os.stat(baked).st_mtime_ns >= max(os.stat(os.path.join(file, kind + ".txt")).st_mtime_ns
+                                                 for kind in GameData.FILES):
+                with open(baked, "r") as f:
+                    data = json.load(f)
+                if data["baked"]["version"] == GameData.BAKE_VERSION and data["baked"]["cell"] == SpatialGrid.CELL:
+                    return data
+        except (OSError, ValueError, KeyError):  # Missing or broken compiled data is simply made again
+            pass
+        return GameData.compile(file)
 
-        with open(os.path.join("./game_data/custom", name, "platform.txt"), "w") as f:  # Creates platform.txt
-            # Filters out platforms to only contain default platforms and writes their data to the file
-            for platform in list(filter(lambda x: str(type(x)) == "<class '__main__.Platform'>", Game.platforms)):
-                f.write(f"{platform.x} {platform.y} {platform.length} {platform.width}\n")  # Writes to the file
+    @staticmethod
+    def compile(file, write=True):  # Reads a level and works out the data that would otherwise be found at runtime
+        texts = {}
+        for kind in GameData.FILES:
+            with open(os.path.join(file, kind + ".txt"), "r") as f:  # Reads the file and stores it in a variable f
+                texts[kind] = f.read()
+        # Data is extracted and put into a list using split(). Each line becomes a list of numbers
+        data = {kind: [[float(i) for i in line.split()] for line in text.splitlines() if line.strip()]
+                for kind, text in texts.items()}
+
+        boxes = {"platforms": [tuple(pygame.Rect(row)) for row in data["platform"] + data["bouncy"] + data["wall"]],
+                 "jump_through": [tuple(pygame.Rect(row)) for row in data["jump_through"]],
+                 "spikes": [tuple(Spike.box(*row)) for row in data["spike"]]}  # Hit-boxes of the objects that don't move
+        aabbs = {}  # The same boxes as (left, top, right, bottom, index), sorted from left to right
+        grid = {}  # The cells of a SpatialGrid as (column, row, indices)
+        for name, lst in boxes.items():
+            aabbs[name] = sorted([min(x, x + w), min(y, y + h), max(x, x + w), max(y, y + h), i]
+                                 for i, (x, y, w, h) in enumerate(lst))
+            cells = {}
+            for i, box in enumerate(lst):
+                for cell in SpatialGrid.cells_of(box):
+                    cells.setdefault(cell, []).append(i)
+            grid[name] = [[column, row, indices] for (column, row), indices in cells.items()]
+
+        points = [(x, y) for box in aabbs.values() for x1, y1, x2, y2, _ in box for x, y in ((x1, y1), (x2, y2))]
+        points += [(row[0], row[1]) for kind in ("ghost", "collectable") for row in data[kind]]
+        points += [(row[i], row[i + 1]) for row in data["moving_platform"] for i in (0, 2)]
+        points.append((data["data"][0][0], data["data"][0][1]))  # Pacman's start position
+        data["baked"] = {"version": GameData.BAKE_VERSION, "cell": SpatialGrid.CELL,
+                         "hash": hashlib.sha256("\0".join(texts[kind] for kind in GameData.FILES).encode()).hexdigest(),
+                         "bounds": [min(x for x, y in points), min(y for x, y in points), max(x for x, y in points),
+                                    max(y for x, y in points)],  # Left, top, right and bottom of the whole level
+                         "boxes": {"spikes": boxes["spikes"]}, "aabbs": aabbs, "grid": grid,
+                         "paths": [MovingPlatform.path((row[0], row[1]), (row[2], row[3]))
+                                   for row in data["moving_platform"]]}  # Direction of each moving platform
+        if write:
+            try:
+                GameData.write_file(os.path.join(file, GameData.BAKED), json.dumps(data))
+            except OSError:  # The level is still used even if the compiled data can't be saved
+                pass
+        return data
+
+    @staticmethod
+    def warm(data):  # Loads the images needed by the objects in "data" into the asset cache
+        for colour in {int(row[2]) for row in data["ghost"]}:  # Each ghost colour used by the level
+            Assets.ghost(colour)
+        Assets.pacman()
 
-        with open(os.path.join("./game_data/custom", name, "bouncy.txt"), "w") as f:  # Creates bouncy.txt
-            # Filters out platforms to only contain bouncy platforms and writes their data to the file
-            for platform in list(filter(lambda x: str(type(x)) == "<class '__main__.Bouncy'>", Game.platforms)):
-                f.write(f"{platform.x} {platform.y} {platform.length} {platform.width}\n")  # Writes to the file
+    @staticmethod
+    def load(file, world):  # Loads game data into "world" and returns the level's content hash
+        data = Preloader.take(file)  # Uses the level if it has already been read in the background
+        if data is None:
+            GameData.wait()  # Makes sure a background save of this level has finished
+            data = GameData.read(file)
+        return GameData.build(data, world)
 
-        with open(os.path.join("./game_data/custom", name, "wall.txt"), "w") as f:  # Creates wall.txt
-            # Filters out platforms to only contain wall platforms and writes their data to the file
-            for platform in list(filter(lambda x: str(type(x)) == "<class '__main__.Wall'>", Game.platforms)):
-                f.write(f"{platform.x} {platform.y} {platform.length} {platform.width}\n")  # Writes to the file
+    @staticmethod
+    def build(data, world):  # Creates the objects of a level that has been read. The same data can be built many times
+        # Starts by clearing all previous data
+        world.clear()
+        # Each line below creates a specific part of the game data (each object is deconstructed using *)
+        world.platforms.extend(Platform(world, *row) for row in data["platform"])
+        world.platforms.extend(Bouncy(world, *row) for row in data["bouncy"])
+        world.platforms.extend(Wall(world, *row) for row in data["wall"])
+        world.jump_through.extend(JumpThrough(world, *row) for row in data["jump_through"])
+        baked = data["baked"]  # Data worked out by compile()
+        world.spikes.extend(Spike(world, *row, hit_box=box) for row, box in zip(data["spike"],
+                                                                                baked["boxes"]["spikes"]))
+        world.ghosts.extend(Ghost(world, *row) for row in data["ghost"])
+        world.collectables.extend(Collectable(world, *row) for row in data["collectable"])
+        world.moving_platforms.extend(MovingPlatform(world, (row[0], row[1]), (row[2], row[3]), row[4], row[5],
+                                                     row[6], path)
+                                      for row, path in zip(data["moving_platform"], baked["paths"]))
+        for name in world.grids:  # Spatial grids are made straight from the compiled cells
+            world.grids[name] = SpatialGrid(getattr(world, name), baked["grid"][name])
+        world.pacman.set_pos(*data["data"][0])  # Pacman spawn is set to the first line of the data.txt file
+        world.dirty.clear()  # Nothing has been changed yet
+        return baked["hash"]
 
-        with open(os.path.join("./game_data/custom", name, "jump_through.txt"), "w") as f:  # Creates jump_through.txt
-            for platform in Game.jump_through:  # Loops over jump_through list and adds data
-                f.write(f"{platform.x} {platform.y} {platform.length} {platform.width}\n")  # Writes to the file
+    @staticmethod
+    def find(name):  # Returns the folder of a level given either its folder or its name (built-in levels first)
+        for folder in ("", "game_data/built_in", "game_data/custom"):
+            if os.path.isdir(os.path.join(folder, name)):
+                return os.path.join(folder, name)
+        raise SystemExit(f"There is no level called {name}")
 
-        with open(os.path.join("./game_data/custom", name, "spike.txt"), "w") as f:  # Creates spike.txt
-            for spike in Game.spikes:  # Loops over spikes and adds their data
-                f.write(f"{spike.x} {spike.y} {spike.num} {spike.flip}\n")  # Writes to the file
+    @staticmethod
+    def update_pb(location, pb):  # Updates the personal best time of a level if "pb" is faster
+        Records.update_pb(location, pb)
 
-        with open(os.path.join("./game_data/custom", name, "ghost.txt"), "w") as f:  # Creates ghost.txt
-            for ghost in Game.ghosts:  # Loops over ghosts and adds their data
-                f.write(f"{ghost.x} {ghost.y} {ghost.type}\n")  # Writes to the file
+    @staticmethod
+    def get_pb(location):  # Returns the current personal best time for a level (0 if it hasn't been beaten)
+        return Records.get_pb(location)
 
-        with open(os.path.join("./game_data/custom", name, "collectable.txt"), "w") as f:  # Creates collectable.txt
-            for collectable in Game.collectables:  # Loops over collectables and adds their data
-                f.write(f"{collectable.x} {collectable.y}\n")  # Writes to the file
 
-        with open(os.path.join("./game_data/custom", name, "moving_platform.txt"), "w") as f:  # Moving_platform.txt
-            for platform in Game.moving_platforms:  # Loops over collectables and adds their data
-                f.write(f"{platform.pos1[0]} {platform.pos1[1]} {platform.pos2[0]} {platform.pos2[1]} "
-                        f"{platform.length} {platform.width} {platform.speed}\n")
-                # Writes to the file
+class Preloader:  # Reads levels on a background thread before they are opened
+    LIMIT = 4  # Most levels that are kept preloaded at once
+    worker = None  # Background thread (created by the first request)
+    jobs = {}  # Level location -> future that returns the level's data
+    stats = {"requested": 0, "used": 0, "waited": 0, "missed": 0, "dropped": 0}  # How useful preloading has been
 
-        with open(os.path.join("./game_data/custom", name, "data.txt"), "w") as f:  # Creates data.txt
-            f.write(f"{PacMan.start_pos[0]} {PacMan.start_pos[1]}")  # Adds pacman start position
-            f.write("\n0")  # Adds the personal best time
+    @staticmethod
+    def job(location, saves):  # Runs on the background thread
+        for save in saves:  # A save of this level must finish before it can be read
+            save.result()
+        data = GameData.read(location)
+        GameData.warm(data)  # Images are loaded now so the level doesn't have to
+        return data
 
     @staticmethod
-    def load(file):  # Loads game data
-        # Starts by clearing all previous data
-        Game.clear()
-        # Each line below loads a specific part of the game data
-        GameData.load_file(os.path.join(file, "platform.txt"), Platform, Game.platforms)
-        GameData.load_file(os.path.join(file, "bouncy.txt"), Bouncy, Game.platforms)
-        GameData.load_file(os.path.join(file, "wall.txt"), Wall, Game.platforms)
-        GameData.load_file(os.path.join(file, "jump_through.txt"), JumpThrough, Game.jump_through)
-        GameData.load_file(os.path.join(file, "spike.txt"), Spike, Game.spikes)
-        GameData.load_file(os.path.join(file, "ghost.txt"), Ghost, Game.ghosts)
-        GameData.load_file(os.path.join(file, "collectable.txt"), Collectable, Game.collectables)
-
-        with open(os.path.join(file, "moving_platform.txt"), "r") as f:  # Reads the moving platforms file
-            for line in f.readlines():  # Loops over each line of the file
-                data = [float(i) for i in line.split()]  # Data is extracted and put into a list using split()
-                Game.moving_platforms.append(MovingPlatform((data[0], data[1]), (data[2], data[3]), data[4],
-                                                            data[5], data[6]))
-
-        with open(os.path.join(file, "data.txt"), "r") as f:  # reads the data.txt file
-            data = [float(i) for i in str(f.readlines()[0]).split()]  # First line is extracted
-            Game.pacman.set_pos(*data)  # Pacman spawn is set to the first line of the data.txt file
-
-    @staticmethod
-    def update_pb(location, pb):  # Updates the personal best time of a level
-        with open(os.path.join("./", location, "data.txt"), "r") as f:  # Reads the data.txt file
-            lines = f.readlines()  # Reads each line
-            if float(lines[1]) > pb or float(lines[1]) == 0:  # If the new PB was faster it is updated
-                lines[1] = str(pb)
-        with open(os.path.join("./", location, "data.txt"), "w") as f:  # The file is now re-opened in write mode
-            f.writelines(lines)  # The new changes are written to the file
-
-    @staticmethod
-    def get_pb(location):  # Returns the current personal best time for a level
-        with open(os.path.join("./", location, "data.txt"), "r") as f:  # Reads the data.txt file
-            return f.readlines()[1]  # Returns the second line of the file
-
-
-class Game:  # Responsible for running the game
+    def request(location):  # Starts reading a level in the background
+        location = Records.key(location)
+        if location in Preloader.jobs or not os.path.isdir(location):
+            return
+        if Preloader.worker is None:
+            Preloader.worker = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="preload")
+        if len(Preloader.jobs) >= Preloader.LIMIT:  # The oldest request is dropped
+            Preloader.jobs.pop(next(iter(Preloader.jobs))).cancel()
+            Preloader.stats["dropped"] += 1
+        Preloader.stats["requested"] += 1
+        Preloader.jobs[location] = Preloader.worker.submit(Preloader.job, location, list(GameData.pending))
+
+    @staticmethod
+    def forget(location):  # Throws away a preloaded level that has changed
+        job = Preloader.jobs.pop(Records.key(location), None)
+        if job is not None:
+            job.cancel()
+
+    @staticmethod
+    def take(location):  # Returns the data of a preloaded level (waiting if it isn't ready) or None
+        job = Preloader.jobs.pop(Records.key(location), None)
+        if job is None:
+            Preloader.stats["missed"] += 1
+            return None
+        Preloader.stats["used" if job.done() else "waited"] += 1
+        try:
+            return job.result()
+        except OSError:  # The level couldn't be read so it is loaded normally instead
+            return None
+
+
+class Journal:  # Edits to a custom level, added to the end of a file as they are made. Used for undo and crash recovery
+    FILE = "journal.txt"  # Kept in the level's folder. The first line holds a hash of each level file it applies to
+    SYNC = 1  # Most seconds that an edit is kept in memory before it is written to the disk
+    UNDO = 100  # Number of edits that can be undone
+    COMPACT = 120  # Seconds between rewrites of the level files while editing (the journal then starts again)
+    LIMIT = 5000  # Changes in the journal that make the level files be rewritten straight away
+    BACKUP = "saved"  # Folder in the level's folder with the files as they were before the first autosave
+
+    def __init__(self, level):  # "level" is the level's folder ("" for levels that have never been saved)
+        self.level = level
+        self.lines = []  # Edits that haven't been written yet, one line each
+        self.started = False  # Whether the journal file has been started with the hashes of the level files
+        self.last_sync = time.perf_counter()
+        self.size = 0  # Changes in the journal since the level files were last rewritten
+        self.undo_stack = []  # Each edit is a list of changes: ("add", object), ("remove", object) or
+        self.redo_stack = []  # ("start", old position, new position)
+        # Ghost -> the row it is journaled by. Ghosts move while playing so where they are now can't be used
+        self.rows = {}
+
+    @staticmethod
+    def hashes(folder):  # Hash of each level file (edits to a file that has been rewritten since are already in it)
+        hashes = {}
+        for kind in GameData.FILES:
+            try:
+                with open(os.path.join(folder, kind + ".txt"), "rb") as f:
+                    hashes[kind] = hashlib.sha256(f.read()).hexdigest()
+            except FileNotFoundError:
+                hashes[kind] = None
+        return hashes
+
+    def line(self, ops):  # The line of the journal file that holds one edit
+        changes = []
+        for op in ops:
+            if op[0] == "start":
+                changes.append(["start", list(op[1][:2]), list(op[2][:2])])
+                continue
+            # The object is saved as the row it has in its level file (or was added with)
+            row = self.rows.pop(op[1], None) if op[0] == "remove" else None
+            row = row or GameData.row(op[1])
+            if op[0] == "add" and type(op[1]) is Ghost:
+                self.rows[op[1]] = row
+            changes.append([op[0], GameData.kind(op[1]), list(row)])
+        return json.dumps(changes) + "\n"
+
+    def track(self, world):  # Remembers the rows of the ghosts in the level files (after loading or saving them)
+        self.rows = {ghost: GameData.row(ghost) for ghost in world.ghosts}
+
+    @staticmethod
+    def start(folder):  # Starts a new journal file (run on the save thread after any level files have been written)
+        GameData.write_file(os.path.join(folder, Journal.FILE), json.dumps({"base": Journal.hashes(folder)}) + "\n")
+
+    @staticmethod
+    def append(path, text):  # Adds lines to the end of the journal file (run on the save thread)
+        with open(path, "a") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())  # Only the new lines are written, however big the level is
+
+    @staticmethod
+    def remove(path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    @staticmethod
+    def back_up(folder, kinds):  # Copies the files an autosave is about to rewrite (run on the save thread)
+        backup = os.path.join(folder, Journal.BACKUP)
+        os.makedirs(backup, exist_ok=True)
+        for kind in kinds:
+            path = os.path.join(backup, kind + ".txt")
+            if not os.path.exists(path):  # A file that is already there is from before an earlier autosave
+                with open(os.path.join(folder, kind + ".txt"), "r") as f:
+                    GameData.write_file(path, f.read())
+
+    @staticmethod
+    def restore(folder):  # Puts back the files from before the autosaves (run on the save thread)
+        backup = os.path.join(folder, Journal.BACKUP)
+        if not os.path.isdir(backup):  # The level hasn't been autosaved since it was last saved
+            return
+        for kind in GameData.FILES:
+            path = os.path.join(backup, kind + ".txt")
+            if os.path.exists(path):
+                with open(path, "r") as f:
+                    GameData.write_file(os.path.join(folder, kind + ".txt"), f.read())
+        shutil.rmtree(backup)
+
+    @staticmethod
+    def apply(selection, ops, undo=False):  # Makes the changes of an edit again, or the opposite changes in reverse
+        for op in (reversed(ops) if undo else ops):
+            if op[0] == "start":
+                selection.set_start(op[1] if undo else op[2])
+            elif (op[0] == "add") != undo:  # Adding, or undoing a removal
+                selection.add(op[1])
+            else:
+                selection.delete([op[1]])
+
+    def write(self, ops):  # Queues the line of an edit (levels without a folder have nowhere to write it)
+        if self.level:
+            self.lines.append(self.line(ops))
+            self.size += len(ops)
+
+    def commit(self, selection):  # Ends the current edit. The changes made since the last edit are undone together
+        if selection.ops:
+            self.undo_stack.append(selection.ops)
+            del self.undo_stack[:-Journal.UNDO]
+            self.redo_stack = []
+            self.write(selection.ops)
+            selection.ops = []
+
+    def undo(self, selection):  # Undoes the last edit
+        self.commit(selection)
+        if self.undo_stack:
+            ops = self.undo_stack.pop()
+            Journal.apply(selection, ops, undo=True)
+            self.redo_stack.append(ops)
+            self.write(selection.ops)  # The opposite changes are written like any other edit
+            selection.ops = []
+
+    def redo(self, selection):  # Makes the last undone edit again
+        self.commit(selection)
+        if self.redo_stack:
+            ops = self.redo_stack.pop()
+            Journal.apply(selection, ops)
+            self.undo_stack.append(ops)
+            self.write(selection.ops)
+            selection.ops = []
+
+    def flush(self, force=False):  # Writes the queued lines on the save thread, at most once every SYNC seconds
+        if not self.lines or (not force and time.perf_counter() - self.last_sync < Journal.SYNC):
+            return
+        if not self.started:
+            GameData.submit(Journal.start, self.level)
+            self.started = True
+        GameData.submit(Journal.append, os.path.join(self.level, Journal.FILE), "".join(self.lines))
+        self.lines = []
+        self.last_sync = time.perf_counter()
+
+    def clear(self, level):  # Called once the level files hold every edit (or the edits are thrown away)
+        self.level = level  # A new level has a folder once it is saved
+        self.lines = []
+        self.started = False
+        self.size = 0
+        if level:
+            GameData.submit(Journal.remove, os.path.join(level, Journal.FILE))
+
+    def recover(self, world):  # Makes the edits in a journal left behind when the game last closed without saving
+        if not self.level:
+            return 0
+        GameData.wait()  # The journal may still be being written
+        try:
+            with open(os.path.join(self.level, Journal.FILE), "r") as f:
+                lines = f.read().splitlines()
+            base = json.loads(lines[0])["base"]
+        except (OSError, IndexError, ValueError, KeyError):  # No journal (or one that was never started)
+            return 0
+        current = Journal.hashes(self.level)
+        found = {}  # (kind, row) -> objects with that row, so removed objects can be found
+        for kind in GameData.FILES[:-1]:  # Every kind of object (not data.txt)
+            for obj in GameData.objects(kind, world):
+                found.setdefault((kind, tuple(float(i) for i in GameData.row(obj))), []).append(obj)
+        edits = 0
+        missing = 0  # Removed objects that aren't in the level, which are left in it
+        for line in lines[1:]:
+            try:
+                changes = json.loads(line)
+            except ValueError:  # The last line can be half written
+                break
+            for change in changes:
+                kind = "data" if change[0] == "start" else change[1]
+                if base.get(kind) != current.get(kind):  # The file was rewritten after this edit so it already has it
+                    continue
+                if change[0] == "start":
+                    world.pacman.set_pos(*change[2])
+                    world.mark_dirty("data")
+                    continue
+                key = (kind, tuple(float(i) for i in change[2]))
+                if change[0] == "add":
+                    obj = GameData.create(kind, change[2], world)
+                    world.add(obj)
+                    found.setdefault(key, []).append(obj)
+                elif found.get(key):
+                    world.remove(found[key].pop())
+                else:
+                    missing += 1
+            edits += 1
+        if missing:
+            print(f"Warning: {missing} objects removed in the journal of {self.level} weren't found so they were kept")
+        return edits
+
+
+class HotReload:  # Watches the files of the open level and applies changes made by other programs
+    enabled = False  # Turned on with the --watch command line option
+    INTERVAL = 0.25  # Seconds between checks of the files' modified times
+
+    def __init__(self, level, world):
+        self.level = level
+        self.world = world  # The world that the level is loaded in
+        self.next_poll = 0
+        self.stamps = {kind: self.stamp(kind) for kind in GameData.FILES}  # Modified time of each file
+        # The row that each object was loaded from. Ghosts move while playing so their current position can't be used
+        self.known = {kind: list(zip(GameData.rows(kind, world), GameData.objects(kind, world)))
+                      for kind in GameData.FILES if kind != "data"}
+        self.resync = set()  # Kinds saved by the game itself. Their new files are accepted without being reloaded
+        self.message = None  # Text describing the last reload
+        self.message_time = 0  # When the last reload happened
+
+    def stamp(self, kind):  # Returns the modified time of one file
+        try:
+            return os.stat(os.path.join(self.level, kind + ".txt")).st_mtime_ns
+        except OSError:
+            return None
+
+    def saved(self, kinds):  # Called when the game saves the level itself
+        for kind in kinds:
+            self.resync.add(kind)
+            if kind != "data":
+                self.known[kind] = list(zip(GameData.rows(kind, self.world), GameData.objects(kind, self.world)))
+
+    def poll(self):  # Checks for changed files (at most every INTERVAL seconds)
+        now = time.perf_counter()
+        if now < self.next_poll or any(not save.done() for save in GameData.pending):
+            return
+        self.next_poll = now + HotReload.INTERVAL
+        for kind in GameData.FILES:
+            stamp = self.stamp(kind)
+            if stamp == self.stamps[kind]:
+                continue
+            self.stamps[kind] = stamp
+            if kind in self.resync:  # The game wrote this file so nothing needs to change
+                self.resync.discard(kind)
+                continue
+            try:
+                self.reload(kind, stamp)
+            except (OSError, ValueError, IndexError, TypeError):  # The file is part way through being written
+                self.stamps[kind] = None  # It is tried again on the next check
+
+    def reload(self, kind, stamp):  # Adds and removes only the objects that have changed in one file
+        start = time.perf_counter()
+        with open(os.path.join(self.level, kind + ".txt"), "r") as f:
+            rows = [tuple(float(i) for i in line.split()) for line in f.readlines() if line.strip()]
+        if kind == "data":  # Only the start position is changed. Pacman carries on from where it is
+            self.world.pacman.start_pos = rows[0][:2]
+            added, removed = 0, 0
+        else:
+            unused = {}  # Rows that were loaded before -> their objects
+            for row, obj in self.known[kind]:
+                unused.setdefault(tuple(row), []).append(obj)
+            known = []
+            new = []
+            for row in rows:
+                if unused.get(row):  # This object hasn't changed
+                    known.append((row, unused[row].pop()))
+                else:
+                    new.append(row)
+            lst = getattr(self.world, World.LISTS[GameData.CLASSES[kind]])
+            removed = 0
+            for objs in unused.values():  # Objects whose rows are no longer in the file
+                for obj in objs:
+                    if obj in lst:  # Ghosts that have died will already have been removed
+                        self.world.remove(obj, changed=False)
+                        removed += 1
+            for row in new:
+                obj = GameData.create(kind, row, self.world)
+                self.world.add(obj, changed=False)  # This also adds it to the spatial grid
+                known.append((row, obj))
+            added = len(new)
+            self.known[kind] = known
+        apply = (time.perf_counter() - start) * 1000
+        Telemetry.event("hot reload", apply / 1000)
+        delay = (time.time_ns() - stamp) / 1e6  # Time since the file was saved by the other program
+        self.message = f"Reloaded {kind}: +{added} -{removed} in {apply:.1f} ms ({delay:.0f} ms after save)"
+        self.message_time = time.perf_counter()
+
+
+class Overlay:  # Shows how long each stage of a frame takes. F3 shows and hides it
+    thread = threading.get_ident()  # Only the main thread's stages are timed (not the render thread's)
+    shown = False  # Whether the overlay is drawn
+    timing = False  # Nothing is timed or counted unless the overlay is shown or telemetry is on
+    HISTORY = 180  # Frames shown in the graph
+    BUDGET = 1 / 60  # Time for a frame at 60 FPS
+    frame_start = 0  # When the current frame started
+    last = 0  # When the last stage of the frame finished
+    times = {}  # Stage -> seconds taken in the current frame
+    averages = {}  # Stage -> rolling average of the seconds taken
+    counts = {}  # Draw calls in the current frame
+    totals = {}  # Draw calls and collision queries in the last full frame
+    work = 0  # Seconds taken by the last full frame
+    frames = collections.deque(maxlen=HISTORY)  # Time taken by each frame (not counting the wait for the next one)
+    REFRESH = 0.25  # Seconds between redrawing the text (drawing text every frame would slow the game down)
+    panel = None  # The text, drawn onto a see-through surface
+    panel_time = 0  # When the text was last drawn
+
+    @staticmethod
+    def start():  # Called at the start of each frame
+        if Overlay.timing:
+            Overlay.times = {}
+            Overlay.counts = {"draw calls": 0}
+            SpatialGrid.queries = 0
+            Overlay.frame_start = Overlay.last = time.perf_counter()
+
+    @staticmethod
+    def mark(name):  # Adds the time since the last mark to the stage called "name"
+        if Overlay.timing and threading.get_ident() == Overlay.thread:
+            now = time.perf_counter()
+            Overlay.times[name] = Overlay.times.get(name, 0) + now - Overlay.last
+            Overlay.last = now
+
+    @staticmethod
+    def count(name, number):  # Adds to a count for this frame
+        if Overlay.timing and threading.get_ident() == Overlay.thread:
+            Overlay.counts[name] = Overlay.counts.get(name, 0) + number
+
+    @staticmethod
+    def skip():  # Leaves the time since the last mark out of the frame (such as the late latch's wait)
+        if Overlay.timing and Overlay.frame_start and threading.get_ident() == Overlay.thread:
+            now = time.perf_counter()
+            Overlay.frame_start += now - Overlay.last
+            Overlay.last = now
+
+    @staticmethod
+    def end():  # Called once the frame is on the screen
+        if Overlay.timing and Overlay.frame_start:
+            Overlay.work = time.perf_counter() - Overlay.frame_start
+            Overlay.frames.append(Overlay.work)
+            for name, seconds in Overlay.times.items():
+                Overlay.averages[name] = Overlay.averages.get(name, seconds) * 0.9 + seconds * 0.1
+            Overlay.totals = {**Overlay.counts, "collision queries": SpatialGrid.queries}
+
+    @staticmethod
+    def toggle():  # Shows or hides the overlay
+        Overlay.shown = not Overlay.shown
+        Overlay.timing = Overlay.shown or Telemetry.enabled
+        Overlay.frame_start = 0  # The frame that is half done when the overlay is shown isn't counted
+        Overlay.frames.clear()
+        Overlay.averages = {}
+        Overlay.panel = None
+
+    GRAPH = 60  # Height of the frame time graph
+
+    @staticmethod
+    def update(font, world):  # Draws the numbers from the last full frame onto the panel now and then
+        # Done on the main thread, which owns the world and the fonts (fonts can't be used by two threads at once)
+        if not Overlay.shown or not Overlay.frames:
+            return
+        if Overlay.panel is None or time.perf_counter() - Overlay.panel_time > Overlay.REFRESH:
+            lines = [("frame", f"{Overlay.frames[-1] * 1000:.2f} ms"),
+                     ("worst", f"{max(Overlay.frames) * 1000:.2f} ms")]
+            lines += [(name, f"{seconds * 1000:.2f} ms") for name, seconds in list(Overlay.averages.items())]
+            lines += list(Overlay.totals.items())
+            lines += [(name, len(getattr(world, name))) for name in ("platforms", "jump_through", "spikes", "ghosts",
+                                                                      "collectables", "moving_platforms")]
+            lines.append(("particles", len(world.pacman.particles) + sum(len(ghost.particles)
+                                                                         for ghost in world.ghosts)))
+            lines += [(f"preloads {name}", count) for name, count in Preloader.stats.items()]  # Levels read early
+            Overlay.panel = pygame.Surface((300, len(lines) * 18 + Overlay.GRAPH + 20), pygame.SRCALPHA)
+            Overlay.panel.fill((0, 0, 0, 190))
+            for i, (name, value) in enumerate(lines):
+                Overlay.panel.blit(font.render(str(name), True, (255, 255, 255)), (10, 8 + i * 18))
+                Overlay.panel.blit(font.render(str(value), True, (255, 255, 0)), (190, 8 + i * 18))
+            Overlay.panel_time = time.perf_counter()
+
+    @staticmethod
+    def draw(win, panel, frames):  # Draws a panel from update() and a graph of "frames" in the bottom left corner
+        graph = Overlay.GRAPH
+        top = Window.WIDTH - panel.get_height() - 40
+        win.blit(panel, (10, top))
+
+        bottom = top + panel.get_height() - 8  # Each frame is a bar. Frames slower than the budget are red
+        for i, seconds in enumerate(frames):
+            bar = min(graph, seconds / (2 * Overlay.BUDGET) * graph)
+            colour = (255, 0, 0) if seconds > Overlay.BUDGET else (0, 255, 0)
+            pygame.draw.line(win, colour, (20 + i * 1.5, bottom), (20 + i * 1.5, bottom - bar))
+        budget = bottom - graph / 2  # The line is the budget for a frame at 60 FPS
+        pygame.draw.line(win, (255, 255, 255), (20, budget), (290, budget))
+
+
+class Telemetry:  # Writes a record of every frame to a file so slow frames (hitches) can be looked at later
+    enabled = False  # Only turned on by --telemetry
+    FOLDER = "game_data/telemetry"
+    FILE = "frames.jsonl"  # One JSON record per line
+    MAX_BYTES = 5_000_000  # The file is rotated once it is this big
+    BACKUPS = 3  # Number of old files kept (frames.1.jsonl is the newest)
+    HITCH = 1.5 * Overlay.BUDGET  # A gap this long between frames is a hitch even if the frame itself was quick
+    file = None
+    last = 0  # When the last frame was recorded
+    events = {}  # Event -> milliseconds it took (or None) for things that happened during this frame
+    gc_pauses = []  # (generation, milliseconds) of the garbage collections during this frame
+    gc_start = 0
+
+    @staticmethod
+    def enable():
+        Telemetry.enabled = True
+        Overlay.timing = True  # The overlay's stage timings are recorded
+        os.makedirs(Telemetry.FOLDER, exist_ok=True)
+        Telemetry.file = open(os.path.join(Telemetry.FOLDER, Telemetry.FILE), "a")
+        Telemetry.last = time.perf_counter()
+        gc.callbacks.append(Telemetry.gc_callback)
+        atexit.register(Telemetry.file.close)
+
+    @staticmethod
+    def gc_callback(phase, info):  # Called by Python at the start and end of each garbage collection
+        if phase == "start":
+            Telemetry.gc_start = time.perf_counter()
+        else:
+            pause = round((time.perf_counter() - Telemetry.gc_start) * 1000, 3)
+            Telemetry.gc_pauses.append((info["generation"], pause))
+
+    @staticmethod
+    def event(name, seconds=None):  # Notes something that happened during this frame
+        if Telemetry.enabled:
+            Telemetry.events[name] = None if seconds is None else round(seconds * 1000, 3)
+
+    @staticmethod
+    def frame(world, level, work, stages=None):  # Records a frame that took "work" seconds (not the wait after it)
+        if not Telemetry.enabled:
+            return
+        now = time.perf_counter()
+        gap = now - Telemetry.last  # Time since the last frame (includes waiting for the clock)
+        Telemetry.last = now
+        events = Telemetry.events
+        if world.pacman.is_dead:
+            events["pacman particles"] = None
+        if any(ghost.is_dead for ghost in world.ghosts):
+            events["ghost particles"] = None
+        record = {"time": round(now - started, 4), "tick": world.ticks, "level": level,
+                  "frame_ms": round(gap * 1000, 3),
+                  "work_ms": round(work * 1000, 3),
+                  "stages": {name: round(seconds * 1000, 3) for name, seconds in (stages or {}).items()},
+                  "counts": Overlay.totals if stages else {},
+                  "entities": {name: len(getattr(world, name)) for name in World.LISTS.values()},
+                  "gc": Telemetry.gc_pauses, "events": events,
+                  "hitch": work > Overlay.BUDGET or gap > Telemetry.HITCH}
+        Telemetry.events = {}
+        Telemetry.gc_pauses = []
+        Telemetry.file.write(json.dumps(record) + "\n")
+        if Telemetry.file.tell() > Telemetry.MAX_BYTES:
+            Telemetry.rotate()
+
+    @staticmethod
+    def rotate():  # frames.jsonl becomes frames.1.jsonl, frames.1.jsonl becomes frames.2.jsonl and so on
+        Telemetry.file.close()
+        name, extension = os.path.splitext(os.path.join(Telemetry.FOLDER, Telemetry.FILE))
+        for i in range(Telemetry.BACKUPS - 1, 0, -1):
+            if os.path.exists(f"{name}.{i}{extension}"):
+                os.replace(f"{name}.{i}{extension}", f"{name}.{i + 1}{extension}")
+        os.replace(name + extension, f"{name}.1{extension}")
+        Telemetry.file = open(name + extension, "a")
+        atexit.register(Telemetry.file.close)
+
+    @staticmethod
+    def files():  # Every telemetry file from oldest to newest
+        name, extension = os.path.splitext(os.path.join(Telemetry.FOLDER, Telemetry.FILE))
+        files = [f"{name}.{i}{extension}" for i in range(Telemetry.BACKUPS, 0, -1)] + [name + extension]
+        return [file for file in files if os.path.exists(file)]
+
+    @staticmethod
+    def summary(files):  # Returns tables of the frame times and a list of the hitches
+        records = []
+        for file in files:
+            with open(file, "r") as f:
+                records += [json.loads(line) for line in f if line.strip()]
+        if not records:
+            return "No frames recorded"
+        lines = [f"{len(records)} frames, {sum(r['hitch'] for r in records)} hitches",
+                 f"{'(ms)':<22}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+        rows = {"frame": [r["frame_ms"] for r in records], "work": [r["work_ms"] for r in records]}
+        for record in records:
+            for name, ms in record["stages"].items():
+                rows.setdefault(name, []).append(ms)
+        rows["gc pauses"] = [ms for r in records for generation, ms in r["gc"]]
+        for name, values in rows.items():
+            if values:
+                stats = Benchmark.summary(values, scale=1)
+                lines.append(f"{name:<22}" + "".join(f"{stats[stat]:9.2f}" for stat in Benchmark.STATS))
+
+        lines += ["", "Hitches",
+                  f"{'tick':>7}  {'frame':>8}  {'work':>8}  {'gc':>6}  {'slowest stage':<22}level, events"]
+        for r in records:
+            if r["hitch"]:
+                slowest = max(r["stages"].items(), key=lambda item: item[1], default=("", 0))
+                events = ", ".join(name if ms is None else f"{name} ({ms} ms)" for name, ms in r["events"].items())
+                lines.append(f"{r['tick']:>7}  {r['frame_ms']:8.2f}  {r['work_ms']:8.2f}  "
+                             f"{sum(ms for generation, ms in r['gc']):6.2f}  "
+                             f"{slowest[0] + (f' {slowest[1]:.1f}' if slowest[0] else ''):<22}{r['level']}, {events}")
+        return "\n".join(lines)
+
+
+class Latency:  # Measures how long key presses take to reach the screen. --latency prints the results on exit
+    enabled = False
+    held = 0  # Key mask the last time the keys were read
+    last_read = 0  # When the keys were last read
+    waiting = []  # (when it was seen, time since the keys were read before that) of presses not yet simulated
+    simulated = []  # Presses that have been simulated but aren't on the screen yet
+    samples = []  # (seen to shown, time since the keys were read before) in seconds of every press that was shown
+
+    @staticmethod
+    def enable():
+        Latency.enabled = True
+        atexit.register(lambda: print(Latency.report()))
+
+    @staticmethod
+    def restart():  # Called when the game starts or carries on after a pause (the time before isn't counted)
+        Latency.last_read = time.perf_counter()
+
+    @staticmethod
+    def read(keys):  # Called each time the keys are read. A new press is timed from when it is first seen
+        if Latency.enabled:
+            now = time.perf_counter()
+            mask = Replay.mask(keys)
+            if mask & ~Latency.held:
+                # The press happened at some point since the keys were last read, which isn't known any better
+                Latency.waiting.append((now, now - Latency.last_read))
+            Latency.held = mask
+            Latency.last_read = now
+
+    @staticmethod
+    def ticked():  # Called after a tick has used the keys
+        Latency.simulated += Latency.waiting
+        Latency.waiting = []
+
+    @staticmethod
+    def take():  # Returns the presses that have been simulated (kept by a snapshot until it is drawn)
+        presses, Latency.simulated = Latency.simulated, []
+        return presses
+
+    @staticmethod
+    def shown(presses=None):  # Called once a frame is on the screen. "presses" are from the snapshot that was drawn
+        presses = Latency.take() if presses is None else presses
+        if presses:
+            now = time.perf_counter()
+            Latency.samples += [(now - seen, gap) for seen, gap in presses]
+
+    @staticmethod
+    def report():  # Returns a table of the latencies
+        if not Latency.samples:
+            return "No key presses measured"
+        rows = {"seen to screen": [shown for shown, gap in Latency.samples],
+                "press to screen (most)": [shown + gap for shown, gap in Latency.samples]}
+        lines = [f"{len(Latency.samples)} key presses", f"{'(ms)':<24}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+        for name, values in rows.items():
+            stats = Benchmark.summary(values)
+            lines.append(f"{name:<24}" + "".join(f"{stats[stat]:9.2f}" for stat in Benchmark.STATS))
+        return "\n".join(lines)
+
+
+class Replay:  # The keys held on every tick of a run, stored as runs of ticks so the run can be played back exactly
+    VERSION = 1  # Version of the replay file
+    # Every key that PacMan.update reads. Key i is bit i of a key mask
+    KEYS = (pygame.K_LEFT, pygame.K_a, pygame.K_RIGHT, pygame.K_d, pygame.K_UP, pygame.K_w, pygame.K_SPACE,
+            pygame.K_DOWN, pygame.K_s, pygame.K_r)
+    BITS = {key: 1 << i for i, key in enumerate(KEYS)}
+    LAST = "last.replay"  # The last run that beat a level is saved in the level's folder
+    BEST = "pb.replay"  # So is the run that set the personal best
+
+    def __init__(self, seed=None, runs=None, info=None):
+        self.seed = random.randrange(2 ** 32) if seed is None else seed  # Seeds the world (used by the particles)
+        self.runs = [] if runs is None else runs  # [ticks, key mask] for each stretch of ticks with the same keys
+        self.info = {} if info is None else info  # Level hash, ticks and time of the finished run
+
+    @staticmethod
+    def mask(keys):  # Turns the result of pygame.key.get_pressed() into a key mask
+        return sum(bit for key, bit in Replay.BITS.items() if keys[key])
+
+    def record(self, keys):  # Adds the keys held on one tick
+        mask = Replay.mask(keys)
+        if self.runs and self.runs[-1][1] == mask:  # Same keys as the last tick so the run gets longer
+            self.runs[-1][0] += 1
+        else:
+            self.runs.append([1, mask])
+
+    def ticks(self):  # Number of ticks in the replay
+        return sum(count for count, mask in self.runs)
+
+    def keys(self):  # Yields the keys held on each tick, in the same form as pygame.key.get_pressed()
+        for count, mask in self.runs:
+            keys = ReplayKeys(mask)
+            for i in range(count):
+                yield keys
+
+    def save(self, file):  # Saves the replay. The header is followed by a blank line and then "ticks mask" per line
+        lines = [f"replay {Replay.VERSION}", f"seed {self.seed}"] + [f"{name} {value}" for name, value in
+                                                                      self.info.items()]
+        lines.append("")
+        lines += [f"{count} {mask}" for count, mask in self.runs]
+        GameData.write_file(file, "\n".join(lines) + "\n")
+
+    @staticmethod
+    def load(file):  # Loads a replay saved by save()
+        with open(file, "r") as f:
+            header, _, body = f.read().partition("\n\n")
+        info = dict(line.split(" ", 1) for line in header.splitlines())
+        if info.pop("replay", None) != str(Replay.VERSION):
+            raise ValueError(f"{file} is not a version {Replay.VERSION} replay")
+        seed = int(info.pop("seed"))
+        return Replay(seed, [[int(i) for i in line.split()] for line in body.splitlines() if line.strip()], info)
+
+    @staticmethod
+    def scripted(ticks, seed=0):  # Keys that walk right (and sometimes back left) while jumping
+        replay = Replay(seed)
+        for tick in range(ticks):
+            mask = Replay.BITS[pygame.K_RIGHT] if tick // 120 % 3 != 2 else Replay.BITS[pygame.K_LEFT]
+            if tick % 37 < 3:  # Jumps every 37 ticks
+                mask |= Replay.BITS[pygame.K_UP]
+            replay.record(ReplayKeys(mask))
+        return replay
+
+    @staticmethod
+    def play(level, replay, render=False):  # Plays a replay without showing it and returns how the run went
+        game = Game(level, "normal", replay=replay)
+        for keys in replay.keys():
+            game.tick(keys, render)
+            if game.won:
+                break
+        changed = replay.info.get("level", game.level_hash) != game.level_hash  # Level was edited after recording
+        world = game.world
+        return {"won": game.won, "ticks": world.ticks, "run_ticks": world.ticks - world.start_tick,
+                "score": world.score, "deaths": world.deaths, "level changed": changed}
+
+
+class ReplayKeys:  # Used instead of pygame.key.get_pressed() when the keys come from a replay
+    def __init__(self, mask):
+        self.mask = mask
+
+    def __getitem__(self, key):  # Keys that aren't in the mask are never pressed
+        return bool(self.mask & Replay.BITS.get(key, 0))
+
+
+class Validator:  # Plays many replays on every core at once and checks that they still end the same way
+    levels = {}  # Level folder -> data read by this process (each worker reads each level only once)
+
+    @staticmethod
+    def cores():  # Number of cores that this process is allowed to use
+        return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+    @staticmethod
+    def find(paths):  # Returns every replay file in "paths" (which can be replay files or folders)
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files += sorted(os.path.join(folder, name) for folder, _, names in os.walk(path)
+                                for name in names if name.endswith(".replay"))
+            else:
+                files.append(path)
+        return files
+
+    @staticmethod
+    def start():  # Runs once in each worker process. Nothing is ever shown or played
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    @staticmethod
+    def check(level, file):  # Plays one replay without drawing anything and returns how it ended (runs in a worker)
+        result = {"level": level, "replay": file}
+        try:
+            replay = Replay.load(file)
+            if level not in Validator.levels:
+                Validator.levels[level] = GameData.read(level)
+            world = World(replay.seed)
+            level_hash = GameData.build(Validator.levels[level], world)
+        except (OSError, ValueError, KeyError, IndexError) as error:  # Missing or broken files
+            result["error"] = f"{type(error).__name__}: {error}"
+            return result
+        won = False
+        for keys in replay.keys():
+            if world.step(keys):
+                won = True
+                break
+        run_ticks = world.ticks - world.start_tick
+        result.update({"won": won, "time": round(run_ticks / World.RATE, 2), "ticks": world.ticks,
+                       "run_ticks": run_ticks, "collectables": world.score, "deaths": world.deaths,
+                       "hash": world.state_hash(), "level changed": replay.info.get("level", level_hash) != level_hash,
+                       "recorded": int(replay.info["run_ticks"]) if "run_ticks" in replay.info else None})
+        return result
+
+    @staticmethod
+    def status(result):  # "ok", "changed" (the level was edited after recording), "error" or "FAIL"
+        if "error" in result:
+            return "error"
+        if result["level changed"]:
+            return "changed"
+        if result["won"] and result["recorded"] in (None, result["run_ticks"]):
+            return "ok"
+        return "FAIL"
+
+    @staticmethod
+    def run(pairs, workers=None):  # Plays every (level, replay file) pair and returns the results in the same order
+        workers = workers or Validator.cores()
+        order = sorted(range(len(pairs)), key=lambda i: pairs[i])  # Replays of the same level go to the same chunk
+        chunk = max(1, len(pairs) // (workers * 4))  # Several chunks each so that a slow level doesn't hold up the end
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=Validator.start) as pool:
+            results = list(pool.map(Validator.check, [pairs[i][0] for i in order], [pairs[i][1] for i in order],
+                                    chunksize=chunk))
+        ordered = [None] * len(pairs)
+        for i, result in zip(order, results):
+            ordered[i] = result
+        return ordered
+
+    @staticmethod
+    def report(results, seconds, workers, baseline=None):  # Returns a table of the results and the problems found
+        lines = [f"{'replay':<50}{'result':>8}{'time':>9}{'eaten':>7}{'deaths':>8}  hash"]
+        problems = []
+        before = {result["replay"]: result.get("hash") for result in baseline or []}
+        for result in results:
+            status = Validator.status(result)
+            if status == "error":
+                lines.append(f"{result['replay']:<50}{status:>8}  {result['error']}")
+            else:
+                lines.append(f"{result['replay']:<50}{status:>8}{result['time']:9.2f}{result['collectables']:7}"
+                             f"{result['deaths']:8}  {result['hash'][:12]}")
+            if status in ("error", "FAIL"):
+                problems.append(f"{result['replay']}: {status}")
+            if result["replay"] in before and before[result["replay"]] != result.get("hash"):
+                problems.append(f"{result['replay']}: final state differs from the baseline")
+        counts = collections.Counter(Validator.status(result) for result in results)
+        lines += ["", f"{len(results)} replays on {workers} cores in {seconds:.1f} s "
+                      f"({len(results) / max(seconds, 1e-9):.1f} replays/s): " +
+                  ", ".join(f"{number} {status}" for status, number in sorted(counts.items()))]
+        return "\n".join(lines), problems
+
+
+class VectorEnv:  # Several worlds of one level played side by side by bots. Each step moves every world by one tick
+    # Keys held for each action: nothing, left, right, jump, left and jump, right and jump, down (through platforms)
+    LEFT, RIGHT, JUMP, DOWN = (Replay.BITS[key] for key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN))
+    ACTIONS = (0, LEFT, RIGHT, JUMP, LEFT | JUMP, RIGHT | JUMP, DOWN)
+    CELL = 50  # Pixels in each square of the observation grid (the size of pacman)
+    COLUMNS = 15  # The grid is centred on pacman
+    ROWS = 9
+    # Number stored in the grid for each type of object (0 is empty). Later types cover earlier ones
+    CODES = {Platform: 1, Wall: 1, Bouncy: 2, JumpThrough: 3, MovingPlatform: 4, Spike: 5, Collectable: 6, Ghost: 7}
+    FEATURES = 4  # pacman's y velocity, whether it can jump, whether it is dead and the collectables left
+    SIZE = COLUMNS * ROWS + FEATURES  # Numbers in each observation
+    DEATH = 5  # Reward lost for each death (each collectable eaten is worth 1)
+    MAX_TICKS = 3600  # A world is reset after this many ticks (a minute of play) even if it hasn't been won
+
+    # Reads the level once for all "count" worlds. "first" is the number of the first world (if split between processes)
+    def __init__(self, level, count, seed=0, max_ticks=MAX_TICKS, first=0):
+        Validator.start()  # Nothing is shown or played
+        self.data = GameData.read(level)
+        self.seed = seed
+        self.max_ticks = max_ticks
+        self.first = first
+        self.worlds = [None] * count
+        self.scores = [0] * count  # Score and deaths of each world after the last step (used to find the rewards)
+        self.deaths = [0] * count
+        self.episodes = [0] * count  # Number of times each world has been started
+        self.steps = 0  # World ticks run by step() and the time they took (the steps per second)
+        self.seconds = 0
+
+    def reset_world(self, i):  # Starts world i again from the beginning of the level
+        # Each world and episode has its own seed, so the worlds are the same however they are split between processes
+        self.worlds[i] = World(f"{self.seed} {self.first + i} {self.episodes[i]}")
+        GameData.build(self.data, self.worlds[i])
+        self.scores[i] = 0
+        self.deaths[i] = 0
+        self.episodes[i] += 1
+
+    def reset(self):  # Starts every world again and returns their observations
+        for i in range(len(self.worlds)):
+            self.reset_world(i)
+        return self.observe()
+
+    def step(self, actions):  # Plays one action in each world. Returns observations, rewards, dones and infos
+        start = time.perf_counter()
+        rewards = []
+        dones = []
+        infos = []
+        for i, (world, action) in enumerate(zip(self.worlds, actions)):
+            won = world.step(ReplayKeys(VectorEnv.ACTIONS[action]))
+            eaten = max(0, world.score - self.scores[i])  # The score goes back to 0 when pacman dies
+            died = world.deaths - self.deaths[i]
+            self.scores[i] = world.score
+            self.deaths[i] = world.deaths
+            rewards.append(eaten - died * VectorEnv.DEATH)
+            done = won or world.ticks >= self.max_ticks
+            dones.append(done)
+            infos.append({"won": won, "ticks": world.ticks, "deaths": world.deaths} if done else {})
+            if done:  # Finished worlds are started again straight away so every world is always running
+                self.reset_world(i)
+        self.steps += len(self.worlds)
+        self.seconds += time.perf_counter() - start
+        return self.observe(), rewards, dones, infos
+
+    def observe(self):  # Returns a list of numbers describing the area around pacman in each world
+        return [VectorEnv.observation(world) for world in self.worlds]
+
+    @staticmethod
+    def observation(world):  # A grid of the objects around pacman (row by row) followed by the features
+        pacman = world.pacman
+        left = pacman.x + pacman.r / 2 - VectorEnv.COLUMNS * VectorEnv.CELL / 2
+        top = pacman.y + pacman.r / 2 - VectorEnv.ROWS * VectorEnv.CELL / 2
+        area = (left, top, VectorEnv.COLUMNS * VectorEnv.CELL, VectorEnv.ROWS * VectorEnv.CELL)
+        grid = [0] * (VectorEnv.COLUMNS * VectorEnv.ROWS)
+
+        def fill(x, y, length, width, code):  # Marks every square that a box covers
+            x1, x2 = sorted((x, x + length))  # Flipped spikes have a negative height
+            y1, y2 = sorted((y, y + width))
+            column1 = max(0, int((x1 - left) // VectorEnv.CELL))
+            column2 = min(VectorEnv.COLUMNS - 1, int((x2 - left) // VectorEnv.CELL))
+            for row in range(max(0, int((y1 - top) // VectorEnv.CELL)),
+                             min(VectorEnv.ROWS - 1, int((y2 - top) // VectorEnv.CELL)) + 1):
+                for column in range(column1, column2 + 1):
+                    grid[row * VectorEnv.COLUMNS + column] = code
+
+        fill(left, Window.WIDTH - 70, area[2], area[3], 1)  # The ground
+        for name in ("platforms", "jump_through"):
+            for obj in world.grids[name].query(area):
+                fill(*obj.hit_box, VectorEnv.CODES[type(obj)])
+        for platform in world.moving_platforms:
+            fill(platform.x, platform.y, platform.length, platform.width, VectorEnv.CODES[MovingPlatform])
+        for spike in world.grids["spikes"].query(area):
+            fill(*spike.hit_box, VectorEnv.CODES[Spike])
+        left_over = 0
+        for collectable in world.collectables:
+            if not collectable.eaten:
+                left_over += 1
+                fill(collectable.x - collectable.r, collectable.y - collectable.r, collectable.r * 2,
+                     collectable.r * 2, VectorEnv.CODES[Collectable])
+        for ghost in world.ghosts:
+            if not ghost.is_dead:
+                fill(ghost.x, ghost.y, ghost.r, ghost.r, VectorEnv.CODES[Ghost])
+        return grid + [pacman.y_vel, int(pacman.airtime <= 5), int(pacman.is_dead), left_over]
+
+    def rate(self):  # World ticks per second of step() (the throughput)
+        return self.steps / self.seconds if self.seconds else 0
+
+    def close(self):  # Nothing to stop (ProcessVectorEnv uses this to stop its workers)
+        pass
+
+
+class ProcessVectorEnv:  # The same as VectorEnv but the worlds are split between processes (one per core by default)
+    def __init__(self, level, count, seed=0, max_ticks=VectorEnv.MAX_TICKS, workers=None):
+        workers = max(1, min(count, workers or Validator.cores()))
+        self.sizes = [count // workers + (i < count % workers) for i in range(workers)]  # Worlds in each process
+        self.pipes = []
+        self.processes = []
+        first = 0
+        for size in self.sizes:
+            pipe, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=ProcessVectorEnv.worker,
+                                              args=(child, level, size, seed, max_ticks, first), daemon=True)
+            process.start()
+            child.close()
+            self.pipes.append(pipe)
+            self.processes.append(process)
+            first += size
+        self.steps = 0
+        self.seconds = 0
+
+    @staticmethod
+    def worker(pipe, level, count, seed, max_ticks, first):  # Runs in each process, doing what the main process asks
+        env = VectorEnv(level, count, seed, max_ticks, first)
+        while True:
+            command, data = pipe.recv()
+            if command == "close":
+                break
+            pipe.send(getattr(env, command)(*data))
+        pipe.close()
+
+    def call(self, command, parts=None):  # Sends a command to every process at once and then waits for every answer
+        for i, pipe in enumerate(self.pipes):
+            pipe.send((command, () if parts is None else (parts[i],)))
+        return [pipe.recv() for pipe in self.pipes]
+
+    def split(self, actions):  # The actions for each process
+        parts = []
+        first = 0
+        for size in self.sizes:
+            parts.append(actions[first:first + size])
+            first += size
+        return parts
+
+    def reset(self):
+        return [observation for part in self.call("reset") for observation in part]
+
+    def step(self, actions):
+        start = time.perf_counter()
+        results = self.call("step", self.split(actions))
+        self.steps += len(actions)
+        self.seconds += time.perf_counter() - start
+        return tuple([item for result in results for item in result[i]] for i in range(4))
+
+    def observe(self):
+        return [observation for part in self.call("observe") for observation in part]
+
+    def rate(self):  # World ticks per second of step(), including sending the actions and observations
+        return self.steps / self.seconds if self.seconds else 0
+
+    def close(self):
+        for pipe in self.pipes:
+            pipe.send(("close", ()))
+        for process in self.processes:
+            process.join()
+
+    @staticmethod
+    def bench(level, count, ticks, workers=0, seed=0):  # Plays random actions and returns the steps per second
+        env = VectorEnv(level, count, seed) if workers == 0 else ProcessVectorEnv(level, count, seed, workers=workers)
+        rng = random.Random(seed)
+        env.reset()
+        rewards = 0
+        for i in range(ticks):
+            rewards += sum(env.step([rng.randrange(len(VectorEnv.ACTIONS)) for _ in range(count)])[1])
+        env.close()
+        return env.rate(), rewards
+
+
+class LevelGenerator:  # Makes large random levels (the same seed always makes the same level)
+    # Number of each kind of object made for every platform. 10,000 platforms make 1,000 spikes, 500 ghosts,
+    # 200 moving platforms and 5,000 collectables
+    MIX = {"bouncy": 0.02, "wall": 0.05, "jump_through": 0.1, "spike": 0.1, "ghost": 0.05, "moving_platform": 0.02,
+           "collectable": 0.5}
+    DENSITY = 10  # Platforms for every 1000 pixels of level width
+    HEIGHT = 2000  # Objects are placed between the ground and this many pixels above it
+    GROUND = 600  # Lowest y for the top of a platform (pacman stands on the ground at this y)
+    START = (100, 600)  # Pacman starts on the ground at the left of the level
+    SAFE = 600  # Nothing is placed to the left of this x, so pacman's start is always safe
+
+    def __init__(self, seed=0, platforms=1000, density=DENSITY, width=None, mix=None):
+        self.rng = random.Random(seed)
+        self.platforms = platforms
+        self.width = width or int(platforms / density * 1000)  # Level width (the width wins if both are given)
+        self.counts = {kind: int(platforms * ratio) for kind, ratio in {**LevelGenerator.MIX, **(mix or {})}.items()}
+
+    def position(self, length=0):  # A random x and y for something "length" pixels wide
+        return (LevelGenerator.SAFE + self.rng.uniform(0, max(0, self.width - length)),
+                round(LevelGenerator.GROUND - self.rng.uniform(0, LevelGenerator.HEIGHT)))
+
+    def generate(self):  # Returns the rows of every kind of object (in the same form as GameData.compile)
+        rows = {kind: [] for kind in GameData.FILES}
+        for kind, count in (("platform", self.platforms), ("bouncy", self.counts["bouncy"]),
+                            ("jump_through", self.counts["jump_through"])):
+            for i in range(count):
+                length = 14 if kind == "bouncy" else self.rng.choice((100, 200, 300, 400))
+                rows[kind].append([*self.position(length), length, 14])
+        for i in range(self.counts["wall"]):
+            height = self.rng.randint(2, 12) * 20
+            x, y = self.position(100)
+            rows["wall"].append([x, min(y, LevelGenerator.GROUND + 50 - height), 100, height])  # Not below the ground
+
+        # Only the hit-boxes are used so these objects aren't in a world
+        solid = SpatialGrid(Platform(None, *row) for kind in ("platform", "bouncy", "wall", "jump_through")
+                            for row in rows[kind])
+        tops = list(range(len(rows["platform"])))  # Platforms that nothing has been placed on yet
+        self.rng.shuffle(tops)
+        for i in range(min(self.counts["spike"], len(tops))):  # Spikes stand on top of a platform
+            x, y, length, width = rows["platform"][tops.pop()]
+            num = self.rng.randint(1, int(length // 30))
+            rows["spike"].append([x + self.rng.randint(0, int(length) - num * 30), y, num, 0])
+        spikes = SpatialGrid(Spike(None, *row) for row in rows["spike"])
+
+        while tops and len(rows["ghost"]) < self.counts["ghost"]:  # Ghosts stand on platforms without spikes
+            x, y, length, width = rows["platform"][tops.pop()]
+            ghost = pygame.Rect(x + self.rng.uniform(0, length - 50), y - 50, 50, 50)
+            if not any(obj.hit_box.colliderect(ghost) for grid in (solid, spikes) for obj in grid.query(ghost)):
+                rows["ghost"].append([ghost.x, ghost.y, self.rng.randint(0, 3)])  # Only placed if it has room
+
+        for i in range(self.counts["collectable"]):  # Collectables float above platforms
+            x, y, length, width = self.rng.choice(rows["platform"])
+            rows["collectable"].append([x + self.rng.uniform(0, length), y - 40])
+        for i in range(self.counts["moving_platform"]):
+            x, y = self.position(400)
+            end = (x + self.rng.randint(0, 300), y - self.rng.randint(0, 300))
+            rows["moving_platform"].append([x, y, *end, 100, 14, self.rng.randint(2, 4)])
+        rows["data"] = [list(LevelGenerator.START)]
+        return rows
+
+    def write(self, folder):  # Generates the level and saves it the same way as GameData.save
+        os.makedirs(folder, exist_ok=True)
+        GameData.write(folder, self.generate())
+        return folder
+
+
+class Benchmark:  # Times each tick of the game while it plays recorded or scripted keys
+    TICKS = 1800  # Ticks played on each level (30 seconds at 60 FPS)
+    STRESS = (("game_data/built_in/level5", 20),)  # (level, copies) that are placed side by side to make big levels
+    GENERATED = ((1, 2000),)  # (seed, platforms) of the levels made by LevelGenerator
+    STATS = ("p50", "p95", "p99", "max")
+    TOLERANCE = 0.15  # A time more than 15% slower than the baseline is a regression
+    NOISE = 0.05  # Differences smaller than this many milliseconds are ignored
+
+    @staticmethod
+    def tiled(level, copies, folder):  # Writes a level made of "copies" of "level" placed side by side
+        data = GameData.compile(level, write=False)
+        left, top, right, bottom = data.pop("baked")["bounds"]
+        width = right - left + 500  # Gap between the copies
+        rows = {kind: [] for kind in GameData.FILES}
+        for i in range(copies):
+            for kind in GameData.FILES:
+                if kind == "data":
+                    continue
+                for row in data[kind]:
+                    row = list(row)
+                    row[0] += i * width  # Every kind starts with an x. Moving platforms also have a second x
+                    if kind == "moving_platform":
+                        row[2] += i * width
+                    rows[kind].append(row)
+        rows["data"] = data["data"]
+        os.makedirs(folder, exist_ok=True)
+        GameData.write(folder, rows)
+        return folder
+
+    @staticmethod
+    def percentile(values, p):  # Nearest rank percentile of a sorted list
+        return values[min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))]
+
+    @staticmethod
+    def summary(times, scale=1000):  # Milliseconds at each percentile (of times in seconds unless "scale" is given)
+        times = sorted(times)
+        result = {f"p{p}": round(Benchmark.percentile(times, p) * scale, 4) for p in (50, 95, 99)}
+        result["max"] = round(times[-1] * scale, 4)
+        return result
+
+    @staticmethod
+    def game(level, replay):  # Starts a game that is played by the code instead of the main loop
+        game = Game(level, "normal", replay=replay)
+        game.win = pygame.Surface((Window.LENGTH, Window.WIDTH))  # Drawn in software, never shown
+        return game
+
+    @staticmethod
+    def run(level, replay, render, ticks):  # Plays a level and returns the times of each part of the ticks
+        game = Benchmark.game(level, replay)
+        times = {"update": [], "render": [], "total": []}
+        gc.collect()
+        for keys in itertools.islice(replay.keys(), ticks):
+            start = time.perf_counter()
+            game.tick(keys, render=False)
+            middle = time.perf_counter()
+            if render:
+                game.render_screen()
+            end = time.perf_counter()
+            times["update"].append(middle - start)
+            times["render"].append(end - middle)
+            times["total"].append(end - start)
+            if game.won:
+                break
+        return {"ticks": len(times["total"]), **{part: Benchmark.summary(lst) for part, lst in times.items()}}
+
+    @staticmethod
+    def suite(levels=None, ticks=TICKS):  # Runs every benchmark and returns the results
+        results = {"python": platform.python_version(), "pygame": pygame.version.ver, "ticks": ticks, "cases": {}}
+        with tempfile.TemporaryDirectory() as folder:
+            if levels:
+                cases = [(os.path.basename(os.path.normpath(level)), level) for level in levels]
+            else:
+                cases = [(name, os.path.join("game_data/built_in", name))
+                         for name in LevelIndex("game_data/built_in").names]
+                for level, copies in Benchmark.STRESS:
+                    name = f"{os.path.basename(level)}x{copies}"
+                    cases.append((name, Benchmark.tiled(level, copies, os.path.join(folder, name))))
+                for seed, platforms in Benchmark.GENERATED:
+                    name = f"generated{platforms}"
+                    cases.append((name, LevelGenerator(seed, platforms).write(os.path.join(folder, name))))
+            for name, level in cases:
+                try:  # A replay that beat this version of the level is used if there is one
+                    replay = Replay.load(os.path.join(level, Replay.BEST))
+                    if replay.info.get("level") != GameData.read(level)["baked"]["hash"]:
+                        raise ValueError("the level has changed since the replay was recorded")
+                    source = Replay.BEST
+                except (OSError, ValueError):
+                    replay, source = Replay.scripted(ticks), "scripted"
+                for render in (True, False):
+                    case = f"{name} ({'render' if render else 'no render'})"
+                    results["cases"][case] = {"input": source, **Benchmark.run(level, replay, render, ticks)}
+                    print(f"{case:<28}" + "  ".join(f"{part} {results['cases'][case][part]['p95']:7.3f}"
+                                                     for part in ("update", "render", "total")) + "  ms (p95)")
+        return results
+
+    @staticmethod
+    def compare(results, baseline):  # Returns a line for each time that is slower than the baseline
+        regressions = []
+        for case, new in results["cases"].items():
+            old = baseline["cases"].get(case)
+            if old is None or old["input"] != new["input"]:  # Only the same keys on the same level can be compared
+                continue
+            for part in ("update", "render", "total"):
+                for stat in Benchmark.STATS[:-1]:  # The max is too noisy to compare
+                    if new[part][stat] > old[part][stat] * (1 + Benchmark.TOLERANCE) + Benchmark.NOISE:
+                        regressions.append(f"{case} {part} {stat}: {old[part][stat]:.3f} -> {new[part][stat]:.3f} ms")
+        return regressions
+
+
+class Profiler:  # Profiles a level played without a window. The same keys always give the same profile
+    INTERVAL = 0.001  # Seconds between samples of the stack
+
+    @staticmethod
+    def play(game, replay, ticks, render):  # The part that is profiled
+        for keys in itertools.islice(replay.keys(), ticks):
+            game.tick(keys, render)
+            if game.won:
+                break
+        world = game.world
+        return world.ticks, round(world.pacman.x, 6), round(world.pacman.y, 6), world.score, world.deaths
+
+    @staticmethod
+    def sampler(ident, stacks, done, stop):  # Runs on its own thread, counting the stacks of thread "ident"
+        while not done.wait(Profiler.INTERVAL):
+            frame = sys._current_frames().get(ident)
+            stack = []
+            while frame is not None and frame.f_code is not stop:  # Stops at the function that started sampling
+                stack.append(f"{os.path.basename(frame.f_code.co_filename)}:"
+                             f"{getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)}")
+                frame = frame.f_back
+            if stack:
+                stacks[";".join(reversed(stack))] += 1
+
+    @staticmethod
+    def sample(func, *args):  # Calls func while recording its stack. Returns the result and the stack counts
+        stacks = collections.Counter()
+        done = threading.Event()
+        thread = threading.Thread(target=Profiler.sampler, daemon=True,
+                                  args=(threading.get_ident(), stacks, done, Profiler.sample.__code__))
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(Profiler.INTERVAL / 2)  # Lets the sampler run often enough
+        thread.start()
+        try:
+            result = func(*args)
+        finally:
+            done.set()
+            thread.join()
+            sys.setswitchinterval(interval)
+        return result, stacks
+
+    @staticmethod
+    def run(level, replay, ticks, render, prefix):  # Writes prefix.pstats and prefix.collapsed
+        profile = cProfile.Profile()
+        first = profile.runcall(Profiler.play, Benchmark.game(level, replay), replay, ticks, render)
+        profile.dump_stats(prefix + ".pstats")
+        # cProfile slows down small functions, so the stacks come from a second run (which plays the same way)
+        second, stacks = Profiler.sample(Profiler.play, Benchmark.game(level, replay), replay, ticks, render)
+        GameData.write_file(prefix + ".collapsed", "".join(f"{stack} {count}\n" for stack, count in stacks.items()))
+        if first != second:
+            print("Warning: the two runs played differently so the profiles don't match")
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(20)
+        print(f"{first[0]} ticks, {sum(stacks.values())} samples. Saved {prefix}.pstats and {prefix}.collapsed")
+
+
+class Memory:  # Measures where memory goes after a level is loaded
+    CYCLES = 10  # Number of times a level is loaded and cleared to check for growth
+    GROWTH = 1024  # Bytes per cycle that count as growth (small changes come from Python's own caches)
+
+    @staticmethod
+    def surface_bytes(surface):  # Pixel memory of a surface (held by SDL so tracemalloc can't see it)
+        return surface.get_pitch() * surface.get_height()
+
+    @staticmethod
+    def size(obj, seen):  # Bytes used by "obj" and everything it holds that hasn't already been counted
+        if id(obj) in seen or isinstance(obj, (type, types.ModuleType, types.FunctionType, types.MethodType)):
+            return 0
+        seen.add(id(obj))
+        size = sys.getsizeof(obj)
+        if isinstance(obj, pygame.Surface):
+            return size + Memory.surface_bytes(obj)
+        if isinstance(obj, pygame.mixer.Sound):
+            return size + len(obj.get_raw())
+        if isinstance(obj, dict):
+            size += sum(Memory.size(key, seen) + Memory.size(value, seen) for key, value in obj.items())
+        elif isinstance(obj, (list, tuple, set, frozenset, collections.deque)):
+            size += sum(Memory.size(item, seen) for item in obj)
+        if hasattr(obj, "__dict__") and not isinstance(obj, type):
+            size += Memory.size(obj.__dict__, seen)
+        for cls in type(obj).__mro__:  # Classes with __slots__ keep their attributes outside __dict__
+            for name in getattr(cls, "__slots__", ()):
+                if hasattr(obj, name):
+                    size += Memory.size(getattr(obj, name), seen)
+        return size
+
+    @staticmethod
+    def breakdown(world):  # Returns {group: [count, bytes]} for the level loaded in "world"
+        seen = {id(world)}  # Every object points back to its world, which is counted separately
+        groups = {"assets (images)": [len(Assets.images), Memory.size(Assets.images, seen)],
+                  "assets (sounds)": [len(Assets.sounds), Memory.size(Assets.sounds, seen)]}
+        for obj in [world.pacman] + [obj for name in dict.fromkeys(World.LISTS.values())
+                                     for obj in getattr(world, name)]:
+            group = groups.setdefault(type(obj).__name__, [0, 0])
+            group[0] += 1
+            group[1] += Memory.size(obj, seen)  # Shared images were counted with the assets
+        groups["spatial grids"] = [len(world.grids), Memory.size(world.grids, seen)]
+        groups["records cache"] = [len(Records.cache), Memory.size(Records.cache, seen)]
+        groups["preloaded levels"] = [len(Preloader.jobs), sum(Memory.size(job.result(), seen) for job in
+                                                                Preloader.jobs.values()
+                                                                if job.done() and job.exception() is None)]
+        return groups
+
+    @staticmethod
+    def cycles(level, count):  # Loads and clears a level "count" times and returns the memory traced after each
+        sizes = []
+        snapshot = None
+        world = World()
+        for i in range(count):
+            GameData.load(level, world)
+            world.clear()
+            gc.collect()
+            sizes.append(tracemalloc.get_traced_memory()[0])
+            if i == 1:  # The first cycle fills the caches so growth is measured from the second
+                snapshot = tracemalloc.take_snapshot()
+        return sizes, snapshot
+
+    @staticmethod
+    def report(level, count=CYCLES):  # Returns a report of the memory used by a level
+        tracemalloc.start(1)  # Only the line that made each allocation is kept (more would be very slow)
+        before = tracemalloc.take_snapshot()
+        world = World()
+        GameData.load(level, world)
+        after = tracemalloc.take_snapshot()
+        allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+        lines = [f"Memory after loading {level}", f"Python allocations made by the load: {allocated / 1024:.1f} KB",
+                 "", f"{'':<20}{'count':>8}{'KB':>12}{'bytes each':>12}"]
+        groups = Memory.breakdown(world)
+        for name, (number, size) in groups.items():
+            lines.append(f"{name:<20}{number:>8}{size / 1024:12.1f}{size / max(number, 1):12.0f}")
+        lines.append(f"{'total':<20}{'':>8}{sum(size for number, size in groups.values()) / 1024:12.1f}")
+
+        lines += ["", "Largest allocations made by the load"]
+        lines += [f"  {stat.size_diff / 1024:8.1f} KB  {stat.traceback[0]}"
+                  for stat in after.compare_to(before, "lineno")[:8] if stat.size_diff > 0]
+
+        world.clear()
+        sizes, snapshot = Memory.cycles(level, count)
+        growth = (sizes[-1] - sizes[1]) / max(1, count - 2)  # Average growth per cycle after the first
+        lines += ["", "Load and clear cycles (KB traced after each): " +
+                  ", ".join(f"{size / 1024:.0f}" for size in sizes)]
+        if growth > Memory.GROWTH:
+            lines.append(f"Memory grows by {growth / 1024:.1f} KB each cycle. Largest growth:")
+            lines += [f"  {stat.size_diff / 1024:8.1f} KB  {stat.traceback[0]}"
+                      for stat in tracemalloc.take_snapshot().compare_to(snapshot, "lineno")[:8] if stat.size_diff > 0]
+        else:
+            lines.append(f"No growth ({growth:+.0f} bytes per cycle)")
+        tracemalloc.stop()
+        return "\n".join(lines)
+
+
+class Snapshot:  # Everything needed to draw a frame, copied from a world so it can be drawn while the world moves on
+    __slots__ = ("tick", "scroll_x", "scroll_y", "view", "statics", "collectables", "moving_platforms", "ghosts",
+                 "pacman", "score", "total", "time", "presses", "texts", "extras", "surface")
+    MARGIN = 60  # Objects this close to the screen are included. Allows for rounded ends and spike tips
+
+    def __init__(self, world, presses=()):  # "presses" are timed by Latency once the frame is on the screen
+        self.tick = world.ticks
+        self.scroll_x, self.scroll_y = world.scroll_x, world.scroll_y
+        margin = Snapshot.MARGIN
+        self.view = (self.scroll_x - margin, self.scroll_y - margin, Window.LENGTH + margin * 2,
+                     Window.WIDTH + margin * 2)
+        view = pygame.Rect(self.view)
+        # Platforms and spikes never move while playing so the objects themselves are kept rather than copies
+        self.statics = {name: world.visible(name, self.view) for name in ("platforms", "spikes", "jump_through")}
+        screen = pygame.Rect(0, 0, Window.LENGTH, Window.WIDTH)  # Hit-boxes are only moved near the screen, so an
+        # old hit-box can be on the screen when its collectable isn't
+        self.collectables = [Snapshot.copy(collectable, self) for collectable in world.collectables
+                             if view.collidepoint(collectable.x, collectable.y) or
+                             screen.colliderect(collectable.hit_box)]
+        self.moving_platforms = [Snapshot.copy(platform, self) for platform in world.moving_platforms
+                                 if view.colliderect((platform.x, platform.y, platform.length, platform.width))]
+        self.ghosts = [Snapshot.copy(ghost, self) for ghost in world.ghosts  # Particles of dead ghosts go anywhere
+                       if ghost.is_dead or view.colliderect((ghost.x, ghost.y, ghost.r, ghost.r))]
+        self.pacman = Snapshot.copy(world.pacman, self)
+        self.score, self.total = world.progress()
+        self.time = world.run_time()
+        self.presses = presses
+        self.texts = None  # The score and time text, rendered on the main thread (see Game.texts)
+        self.extras = None  # The hot reload message and the overlay (see Game.extras)
+        self.surface = None  # What the render thread draws the snapshot on (see RenderThread.buffer)
+
+    @staticmethod
+    def copy(obj, snapshot):  # A copy of an object (and its particles) that is drawn with the snapshot's scroll
+        clone = object.__new__(type(obj))
+        if hasattr(obj, "__dict__"):  # Pacman and ghosts
+            clone.__dict__.update(obj.__dict__)
+            clone.particles = [Snapshot.copy(particle, snapshot) for particle in obj.particles]
+        else:
+            for name in type(obj).__slots__:
+                setattr(clone, name, getattr(obj, name))
+        clone.world = snapshot
+        return clone
+
+    def visible(self, name, view):  # Used instead of World.visible when a snapshot is drawn
+        return self.statics[name]
+
+    def progress(self):
+        return self.score, self.total
+
+    def run_time(self):
+        return self.time
+
+
+class RenderThread:  # Draws snapshots on a second thread while the main thread works out the next frame
+    def __init__(self, draw, size):  # "draw" draws a snapshot on its surface, which is "size" pixels
+        self.draw = draw
+        self.size = size
+        self.slot = queue.Queue(maxsize=1)  # The next snapshot. It waits here while the one before it is drawn
+        self.drawn = queue.Queue()  # Snapshots that have been drawn, waiting for the main thread to show them
+        self.free = []  # Surfaces that have been shown and can be drawn on again (only used by the main thread)
+        self.error = None  # An error from the render thread, raised again on the main thread
+        self.thread = threading.Thread(target=self.loop, name="render", daemon=True)
+        self.thread.start()
+
+    def loop(self):  # Runs on the render thread
+        while True:
+            snapshot = self.slot.get()
+            try:
+                if snapshot is None:  # Stopped
+                    return
+                self.draw(snapshot)
+                self.drawn.put(snapshot)
+            except Exception as error:
+                self.error = error
+            finally:
+                self.slot.task_done()
+
+    def check(self):  # Raises any error from the render thread
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def submit(self, snapshot):  # Hands over a snapshot. Waits if the render thread is still two frames behind
+        self.check()
+        self.slot.put(snapshot)
+
+    def buffer(self):  # A surface for a snapshot to be drawn on. Only the main thread touches the window and display
+        return self.free.pop() if self.free else pygame.Surface(self.size)
+
+    def take(self):  # Returns the snapshots drawn since the last call, oldest first
+        self.check()
+        drawn = []
+        while not self.drawn.empty():
+            drawn.append(self.drawn.get())
+        return drawn
+
+    def recycle(self, snapshot):  # Called once a snapshot has been shown so its surface can be drawn on again
+        self.free.append(snapshot.surface)
+
+    def wait(self):  # Waits until every snapshot has been drawn (before the main thread draws anything itself)
+        self.slot.join()
+        self.check()
+
+    def stop(self):
+        self.slot.put(None)
+        self.thread.join()
+        self.check()
+
+    @staticmethod
+    def digest(surface):  # Hash of the pixels of a surface
+        return hashlib.sha1(pygame.image.tobytes(surface, "RGB")).hexdigest()
+
+    @staticmethod
+    def check_handoff(level, replay, ticks, reload=200):  # Checks that frames drawn from snapshots match the others
+        # Each tick is drawn on this thread and then from a snapshot on the render thread. The overlay is shown and
+        # the level's files are changed every "reload" ticks, so hot reloads and their message are drawn too.
+        # Returns the number of frames and the ticks whose frames are different
+        overlay = Overlay.shown, Overlay.timing, Overlay.REFRESH, Overlay.frames
+        Overlay.shown, Overlay.timing, Overlay.REFRESH = True, False, 0  # The panel is redrawn on every frame
+        Overlay.frames = collections.deque([Overlay.BUDGET] * 10)  # Real frame times would differ between runs
+        stats = dict(Preloader.stats)  # Loading the level counts as a missed preload, which the overlay shows
+        frames = []
+        try:
+            for pipelined in (False, True):
+                Preloader.stats.update(stats)
+                with tempfile.TemporaryDirectory() as folder:  # The files that are changed are a copy of the level
+                    copy = shutil.copytree(level, os.path.join(folder, "level"))
+                    frames.append(RenderThread.draw_run(copy, replay, ticks, pipelined, reload))
+        finally:
+            Overlay.shown, Overlay.timing, Overlay.REFRESH, Overlay.frames = overlay
+            Overlay.panel = None
+            Preloader.stats.update(stats)
+        serial, pipelined = frames
+        different = [tick for (tick, serial_hash), (pipelined_tick, pipelined_hash) in zip(serial, pipelined)
+                     if tick != pipelined_tick or serial_hash != pipelined_hash]
+        if len(serial) != len(pipelined):
+            different.append(min(len(serial), len(pipelined)))  # A frame was lost or drawn twice
+        return len(serial), different
+
+    @staticmethod
+    def draw_run(level, replay, ticks, pipelined, reload):  # Returns (tick, hash) of each frame for check_handoff
+        game = Benchmark.game(level, replay)
+        game.hit_box = True  # Hit-boxes are compared too
+        game.watcher = HotReload(level, game.world)
+        drawn = []
+        renderer = RenderThread(game.draw_snapshot, game.win.get_size()) if pipelined else None
+
+        def show():  # Every frame the render thread has finished is put on the window like Game.show_drawn does
+            for snapshot in renderer.take():
+                game.win.blit(snapshot.surface, (0, 0))
+                game.draw_extras(snapshot.extras)
+                drawn.append((snapshot.tick, RenderThread.digest(game.win)))
+                renderer.recycle(snapshot)
+        for keys in itertools.islice(replay.keys(), ticks):
+            game.tick(keys, render=False)
+            if game.world.ticks % reload == 0:
+                RenderThread.change_files(game)
+            if renderer is None:
+                game.render_screen()
+                game.draw_extras(game.extras())
+                drawn.append((game.world.ticks, RenderThread.digest(game.win)))
+            else:  # The next tick runs while this one is drawn, so anything not copied would show up
+                snapshot = Snapshot(game.world)
+                snapshot.texts, snapshot.extras = game.texts(snapshot), game.extras()
+                snapshot.surface = renderer.buffer()
+                renderer.submit(snapshot)
+                show()
+            if game.won:
+                break
+        if renderer is not None:
+            renderer.stop()
+            show()
+        return drawn
+
+    @staticmethod
+    def change_files(game):  # Takes the first row out of some of the level's files and hot reloads them
+        for kind in ("ghost", "platform", "collectable"):
+            file = os.path.join(game.level, kind + ".txt")
+            with open(file, "r") as f:
+                lines = [line for line in f if line.strip()]
+            if len(lines) > 1:
+                with open(file, "w") as f:
+                    f.writelines(lines[1:])
+                game.watcher.reload(kind, game.watcher.stamp(kind))
+        if game.watcher.message:  # The time taken is left out of the message as it would differ between the runs
+            game.reload_message(game.watcher.message.split(" in ")[0], True)
+
+
+class FixedStep:  # Runs the ticks of a game at World.RATE however often the screen is drawn
+    MAX_CATCH_UP = 5  # Most ticks run before a frame is drawn. If the game is further behind the rest are dropped
+    TELEPORT = 100  # Objects that move further than this in a tick (such as pacman respawning) aren't blended
+
+    def __init__(self, max_catch_up=None):
+        self.step = 1 / World.RATE  # Seconds in each tick
+        self.max_catch_up = max_catch_up or FixedStep.MAX_CATCH_UP
+        self.accumulator = 0  # Time that has passed but hasn't been simulated yet
+        self.last = None  # Time of the last frame
+        self.dropped = 0  # Ticks skipped because the game fell too far behind
+        self.previous = []  # (object, x, y) of everything that moves before the last tick
+        self.scroll = None  # Scroll before the last tick
+
+    def reset(self):  # Forgets the time that has passed (after pausing or editing). The next frame runs one tick
+        self.accumulator = 0
+        self.last = None
+
+    def advance(self, now):  # Returns the number of ticks to run before the frame at time "now" is drawn
+        if self.last is None:
+            self.last = now - self.step
+        self.accumulator += now - self.last
+        self.last = now
+        ticks = int(self.accumulator / self.step)
+        if ticks > self.max_catch_up:  # Too slow to catch up. The game slows down instead of freezing
+            self.dropped += ticks - self.max_catch_up
+            self.accumulator -= (ticks - self.max_catch_up) * self.step
+            ticks = self.max_catch_up
+        self.accumulator -= ticks * self.step
+        return ticks
+
+    def save(self, world):  # Remembers where everything that moves is before a tick
+        self.previous = [(world.pacman, world.pacman.x, world.pacman.y)]
+        for name in ("ghosts", "moving_platforms", "collectables"):
+            self.previous.extend((obj, obj.x, obj.y) for obj in getattr(world, name))
+        self.scroll = world.scroll_x, world.scroll_y
+
+    def blend(self, world):  # Moves everything part of the way back to where it was before the last tick
+        alpha = self.accumulator / self.step  # How far the frame is between the last tick and the next one
+        current = [(obj, obj.x, obj.y) for obj, x, y in self.previous]
+        for obj, x, y in self.previous:
+            if abs(obj.x - x) < self.TELEPORT and abs(obj.y - y) < self.TELEPORT:
+                obj.x, obj.y = x + (obj.x - x) * alpha, y + (obj.y - y) * alpha
+        scroll = world.scroll_x, world.scroll_y
+        if self.scroll is not None:
+            world.scroll_x = self.scroll[0] + (scroll[0] - self.scroll[0]) * alpha
+            world.scroll_y = self.scroll[1] + (scroll[1] - self.scroll[1]) * alpha
+        return current, scroll
+
+    @staticmethod
+    def restore(world, saved):  # Puts everything back where the last tick left it (after the frame is drawn)
+        current, (world.scroll_x, world.scroll_y) = saved
+        for obj, x, y in current:
+            obj.x, obj.y = x, y
+
+
+class Scene:  # Base class for the screens of the game. Scenes are kept on a stack and only the top one is run
+    fps = 60  # Most frames shown each second
+
+    def frame(self, events):  # Handles this frame's events and draws it
+        pass
+
+    def present(self):  # Shows the frame that was drawn
+        pygame.display.update()
+
+    def resume(self):  # Called when the scene is on top of the stack again (after being pushed or uncovered)
+        pass
+
+    def suspend(self):  # Called when another scene is pushed on top of it
+        pass
+
+    def close(self):  # Called when the scene is popped or replaced
+        pass
+
+
+class Scenes:  # The one main loop of the game. Events, frame capping and showing frames are done here for every scene
+    stack = []  # The scene on top is the one that is run
+    clock = None
+
+    @staticmethod
+    def push(scene):  # Shows "scene" on top of the current scene (which is kept as it is until it is uncovered)
+        if Scenes.stack:
+            Scenes.stack[-1].suspend()
+        Scenes.stack.append(scene)
+        scene.resume()
+
+    @staticmethod
+    def pop(count=1):  # Closes the top "count" scenes and carries on with the one below them
+        for _ in range(count):
+            Scenes.stack.pop().close()
+        if Scenes.stack:
+            Scenes.stack[-1].resume()
+
+    @staticmethod
+    def replace(scene):  # Closes the top scene and shows "scene" in its place
+        Scenes.stack.pop().close()
+        Scenes.stack.append(scene)
+        scene.resume()
+
+    @staticmethod
+    def run(*scenes):  # Pushes each scene and runs until every scene has been closed
+        Scenes.clock = pygame.time.Clock()
+        for scene in scenes:
+            Scenes.push(scene)
+        while Scenes.stack:
+            scene = Scenes.stack[-1]
+            scene.frame(pygame.event.get())
+            if Scenes.stack and Scenes.stack[-1] is scene:  # Not shown if it has just opened or closed a scene
+                scene.present()
+            Scenes.clock.tick(scene.fps)  # Caps the FPS
+
+
+class Game(Scene):  # Responsible for running the game
     # Class variables are defined
     BG = (0, 0, 0)  # Game background
-    SCROLL_X = 0  # Game scrolling
-    SCROLL_Y = 0
-    start_time = datetime.datetime.now()  # Starting time. (Used for the timer)
-
-    pacman = PacMan(Window.LENGTH / 2, Window.WIDTH / 2)  # Pacman is created
-    # All platforms, spikes etc are cleared
-    spikes = []
-    ghosts = []
-    moving_platforms = []
-    jump_through = []
-    platforms = []
-    collectables = []
-
-    def __init__(self, level, game_type, number=0):  # Doesn't require anything to initialise
+    FPS = 60  # Most frames drawn each second (the ticks always run at World.RATE)
+    late_latch = False  # Waits for the next frame before the keys are read a second time and the ticks are run
+    pipelined = False  # Draws on a render thread while the next frame is worked out
+
+    def __init__(self, level, game_type, number=0, replay=None):  # "replay" plays back a recorded run
         self.game_type = game_type  # Game type is either normal or custom
         self.number = number
         self.level = level
+        self.inputs = None if replay is None else replay.keys()  # Keys for each tick when a replay is played
+        self.replay = Replay() if replay is None else replay  # Otherwise the keys of each tick are recorded
+        self.won = False
+        self.level_hash = None  # Content hash of the level's files (stored in replays)
 
         self.win = window.win  # This just makes it easier to reference the window
 
@@ -1309,15 +3627,19 @@ class Game:  # Responsible for running the game
         self.ground_scroll = 0  # The scroll of the ground
 
         self.score_font = pygame.font.Font("freesansbold.ttf", 40)  # The font used to display the score
+        self.debug_font = pygame.font.Font("freesansbold.ttf", 16)  # The font used for debug information
+        self.reload_text = None  # (message, rendered text) of the last hot reload
+        self.show_reload = False  # Whether the reload text is drawn this frame
         self.text = self.score_font.render("0/0", True, (255, 255, 255))  # The score starts at 0/0 and is white
-        PacMan.score = 0  # Resets Pacman's score (the number of collectables eaten)
         self.time = self.score_font.render("0", True, (255, 255, 255))
-        Game.start_time = datetime.datetime.now()
-        PacMan.time = 0
 
-        self.clock = pygame.time.Clock()  # Clock used to create a max FPS
-        self.FPS = 60  # Max FPS is set to 60 frames per second
-        self.edit = EditMode()  # Edit-mode class is created
+        self.fps = 0 if Game.late_latch else Game.FPS  # Frames shown each second (0 when the game waits itself)
+        self.next_frame = 0  # When the next frame is due (only used with the late latch)
+        self.timestep = FixedStep()  # Works out how many ticks to run before each frame
+        Telemetry.last = time.perf_counter()  # Loading the level counts towards the first frame
+        self.world = World(self.replay.seed)  # Holds all of the level's objects, the scroll, score and timer
+        self.journal = Journal(level if game_type == "custom" else "")  # Edits to the level (only custom levels)
+        self.edit = EditMode(self.world, self.journal)  # Edit-mode class is created
 
         self.mode = "play"  # The starting game mode is on play
         self.hit_box = False  # Determines whether hit-boxes are shown or hidden
@@ -1326,136 +3648,157 @@ class Game:  # Responsible for running the game
         self.pause_btn = Button(self.win, self.pause_img, (Window.LENGTH - self.pause_img.get_width() - 10, 10),
                                 self.pause)
 
-        Game.clear()  # Clears all game data
         if level:  # If there is data to load
-            GameData.load(level)  # Loads game data
-
-        self.run = True
-        while self.run:  # Main loop of the application
-            self.game_loop()
-
-    def pause(self):  # When the pause button is pressed
-        pause_img = pygame.image.load("assets/pause_screen.png")  # The background pause image
-
-        resume_img = pygame.image.load("assets/resume.png")  # The resume image
-        resume_btn = Button(self.win, resume_img, (Window.LENGTH/2 - resume_img.get_width()/2, 280), 0)  # Resume button
-        if self.game_type == "custom":  # If it is a custom level
-            save_img = pygame.image.load("assets/save_quit.png")
-            save_btn = Button(self.win, save_img, (Window.LENGTH/2 - save_img.get_width()/2, 500), 0)  # Save button
-            no_save_img = pygame.image.load("assets/don't_save.png")  # Don't save button
-            no_save_btn = Button(self.win, no_save_img, (Window.LENGTH/2 - no_save_img.get_width()/2, 400), 0)
-        else:
-            quit_img = pygame.image.load("assets/quit2.png")  # Quit button image
-            quit_btn = Button(self.win, quit_img, (Window.LENGTH/2 - quit_img.get_width()/2, 400), 0)  # Quit button
-
-        run = True
-        while run:  # The main loop while the game is paused
-            for event in pygame.event.get():  # Loops over all events
-                if event.type == pygame.KEYDOWN:  # Checks for a key press event
-                    if event.key == pygame.K_ESCAPE:  # Escape = quit
-                        if self.game_type == "normal":  # If it is a built in level
-                            run = False  # Pause screen is simply closed
-                            self.run = False
-                        else:
-                            GameData.save(self.level)  # Game is saved
-                            self.run = False
-                            run = False
-            self.win.blit(pause_img, (Window.LENGTH / 2 - pause_img.get_width() / 2, Window.WIDTH / 2 -
-                                      pause_img.get_height() / 2))  # Pause image is drawn in the centre
-
-            self.time = self.score_font.render(
-                str(round((datetime.datetime.now() - Game.start_time).total_seconds(), 2)),
-                True, (255, 255, 255))  # The current time is updated
-            # Estimated length of the time box
-            length = 25 * (len(str(int((datetime.datetime.now() - Game.start_time).total_seconds()))) + 2) + 10
-            pygame.draw.rect(self.win, Game.BG, (4, 4, length, self.time.get_height() + 2))  # Black box is drawn
-            pygame.draw.rect(self.win, (0, 255, 0), (2, 2, length + 4, self.time.get_height() + 4), 3)  # Green outline
-            self.win.blit(self.time, (5, 5))  # Current time is displayed on screen
-
-            mouse = pygame.mouse.get_pos()  # Gets mouse position
-            pressed = pygame.mouse.get_pressed(3)[0]  # If left click
-            if resume_btn.update(mouse, pressed):
-                run = False  # If resume is pressed the loop is ended
-            if self.game_type == "custom":
-                if save_btn.update(mouse, pressed):  # If the save button is pressed
-                    GameData.save(self.level)  # Level is saved
-                    self.run = False  # Quits the pause screen and closes the game
-                    run = False
-                if no_save_btn.update(mouse, pressed):  # If the don't save button is pressed
-                    self.run = False  # Quits the pause screen and closes the game
-                    run = False
-            else:
-                if quit_btn.update(mouse, pressed):  # If the quit button is pressed
-                    self.run = False  # Quits the pause screen and closes the game
-                    run = False
-
-            pygame.display.update()  # Screen is updated
-
-    def render_screen(self):  # Renders everything on the screen
-        self.win.fill(Game.BG)  # Fills the screen black
+            start = time.perf_counter()
+            self.level_hash = GameData.load(level, self.world)  # Loads game data
+            Telemetry.event("level load", time.perf_counter() - start)
+            if game_type == "normal" and replay is None:
+                Records.add_attempt(level)  # Counts the attempt
+        recovered = self.journal.recover(self.world)  # Edits that weren't saved when the game last closed
+        self.journal.track(self.world)
+        self.last_save = datetime.datetime.now()  # Used to time autosaves
+        # Applies changes made by other programs
+        self.watcher = HotReload(level, self.world) if HotReload.enabled and level else None
+        if recovered:
+            self.save(autosave=True)  # The recovered edits are put into the level files straight away
+
+        self.renderer = None  # Draws snapshots of the world on their own thread (started once the game is shown)
+        self.snapshot = None  # Snapshot of this frame, handed to the render thread when the frame is shown
+
+    def resume(self):  # Called when the game is shown and when the pause screen is closed
+        self.timestep.reset()  # The time spent paused isn't caught up
+        Latency.restart()
+        if Game.pipelined and self.renderer is None:
+            self.renderer = RenderThread(self.draw_snapshot, self.win.get_size())
+
+    def suspend(self):  # The pause screen is drawn on the main thread
+        self.sync()
+
+    def close(self):
+        self.journal.commit(self.edit.selection)
+        self.journal.flush(force=True)  # Kept for the next time the level is opened (if it wasn't saved)
+        if self.renderer is not None:
+            self.renderer.stop()
+            self.renderer = None
+
+    def sync(self):  # Waits for the render thread before anything is drawn on the main thread
+        if self.renderer is not None:
+            self.renderer.wait()
+            self.show_drawn()
+
+    def save(self, autosave=False):  # Saves the level in the background
+        self.journal.commit(self.edit.selection)  # The saved files will hold every edit so far
+        kinds = [kind for kind in GameData.FILES if kind in self.world.dirty or not self.level]
+        start = time.perf_counter()
+        if autosave:  # The files are copied first so that "Don't save" can put them back
+            GameData.submit(Journal.back_up, self.level, kinds)
+        self.level = GameData.save(self.level, self.world)
+        self.journal.clear(self.level)  # The journal starts again once the files have been written
+        if "ghost" in kinds:  # The ghosts are saved where they are now
+            self.journal.track(self.world)
+        if not autosave:  # Saved on purpose so there is nothing to go back to
+            GameData.submit(shutil.rmtree, os.path.join(self.level, Journal.BACKUP), True)
+        Telemetry.event("save", time.perf_counter() - start)
+        if self.watcher is not None:  # The watcher mustn't reload the files the game has just written
+            self.watcher.saved(kinds)
+
+    def discard(self):  # Throws away the edits made since the level was last saved (including autosaved ones)
+        self.edit.selection.ops = []
+        self.journal.clear(self.journal.level)
+        if self.level:
+            GameData.submit(Journal.restore, self.level)
+            Preloader.forget(self.level)  # A preloaded copy would have the autosaved edits
+
+    def pause(self):  # When the pause button or escape is pressed
+        Scenes.push(PauseScreen(self))
+
+    def render_screen(self, world=None, win=None):  # Renders everything on the screen. "world" can be a snapshot
+        world = world or self.world
+        win = win or self.win  # The render thread draws on a surface of its own
+        scroll_x, scroll_y = world.scroll_x, world.scroll_y  # Scroll of the world being drawn
+        win.fill(Game.BG)  # Fills the screen black
 
         # Draws the ground
-        pygame.draw.line(self.win, self.ground_colour, (0, Window.WIDTH - 65 - Game.SCROLL_Y),
-                         (Window.LENGTH, Window.WIDTH - 65 - Game.SCROLL_Y), 12)  # Bottom and top red lines
-        pygame.draw.line(self.win, self.ground_colour, (0, Window.WIDTH - 77 - Game.SCROLL_Y + self.ground_width),
-                         (Window.LENGTH, Window.WIDTH - 77 - Game.SCROLL_Y + self.ground_width), 12)
+        pygame.draw.line(win, self.ground_colour, (0, Window.WIDTH - 65 - scroll_y),
+                         (Window.LENGTH, Window.WIDTH - 65 - scroll_y), 12)  # Bottom and top red lines
+        pygame.draw.line(win, self.ground_colour, (0, Window.WIDTH - 77 - scroll_y + self.ground_width),
+                         (Window.LENGTH, Window.WIDTH - 77 - scroll_y + self.ground_width), 12)
         for i in range(-1, int(Window.LENGTH / self.ground_spacing) + 2):  # Draws the left side of the triangles
-            pygame.draw.line(self.win, self.ground_colour, (i * self.ground_spacing - self.ground_scroll, Window.WIDTH -
-                                                            77 - Game.SCROLL_Y + self.ground_width),
+            pygame.draw.line(win, self.ground_colour, (i * self.ground_spacing - self.ground_scroll, Window.WIDTH -
+                                                            77 - scroll_y + self.ground_width),
                              (i * self.ground_spacing + self.ground_spacing / 2 - self.ground_scroll, Window.WIDTH - 65
-                              - Game.SCROLL_Y), 15)
+                              - scroll_y), 15)
         for i in range(-1, int(Window.LENGTH / self.ground_spacing) + 2):  # Draws the right side of the triangles
-            pygame.draw.line(self.win, self.ground_colour, (i * self.ground_spacing + self.ground_spacing / 2 -
-                                                            self.ground_scroll, Window.WIDTH - 65 - Game.SCROLL_Y),
-                             ((i + 1) * self.ground_spacing - self.ground_scroll, Window.WIDTH - 77 - Game.SCROLL_Y +
+            pygame.draw.line(win, self.ground_colour, (i * self.ground_spacing + self.ground_spacing / 2 -
+                                                            self.ground_scroll, Window.WIDTH - 65 - scroll_y),
+                             ((i + 1) * self.ground_spacing - self.ground_scroll, Window.WIDTH - 77 - scroll_y +
                               self.ground_width), 15)
 
-        self.ground_scroll = Game.SCROLL_X  # The ground scroll is set to the game scroll
+        self.ground_scroll = scroll_x  # The ground scroll is set to the game scroll
         if self.ground_scroll >= self.ground_spacing or self.ground_scroll < -self.ground_spacing:  # Loops back
-            self.ground_scroll = Game.SCROLL_X - int((Game.SCROLL_X / self.ground_spacing)) * self.ground_spacing
-
-        for platform in Game.platforms:  # Draws platforms
-            platform.draw(self.win, hit_box=self.hit_box)
-        for danger in Game.spikes:  # Draws spikes
-            danger.draw(self.win, hit_box=self.hit_box)
-        for platform in Game.jump_through:  # Draws jump through platforms
-            platform.draw(self.win, hit_box=self.hit_box)
-        for collectable in Game.collectables:  # Draws collectables
-            collectable.draw(self.win, hit_box=self.hit_box, edit=self.game_type == "custom")
-        for platform in Game.moving_platforms:  # Draws moving platforms
+            self.ground_scroll = scroll_x - int((scroll_x / self.ground_spacing)) * self.ground_spacing
+        Overlay.mark("render ground")
+
+        # Only the platforms and spikes near the screen are drawn. 60 pixels allows for rounded ends and spike tips
+        view = (scroll_x - 60, scroll_y - 60, Window.LENGTH + 120, Window.WIDTH + 120)
+        for name in ("platforms", "spikes", "jump_through"):  # Draws platforms, then spikes then jump through platforms
+            objects = world.visible(name, view)
+            for obj in objects:
+                obj.draw(win, hit_box=self.hit_box, scroll=(scroll_x, scroll_y))
+            Overlay.count("draw calls", len(objects))
+        Overlay.mark("render level")
+        for collectable in world.collectables:  # Draws collectables
+            collectable.draw(win, hit_box=self.hit_box, edit=self.game_type == "custom")
+        for platform in world.moving_platforms:  # Draws moving platforms
             if self.mode == "edit":
-                platform.draw_path(self.win, hit_box=self.hit_box)
+                platform.draw_path(win, hit_box=self.hit_box)
             else:
-                platform.draw(self.win, hit_box=self.hit_box)
-        for ghost in Game.ghosts:  # Draws ghosts
-            ghost.draw(self.win, hit_box=self.hit_box)
+                platform.draw(win, hit_box=self.hit_box)
+        for ghost in world.ghosts:  # Draws ghosts
+            ghost.draw(win, hit_box=self.hit_box)
 
-        Game.pacman.draw(self.win, hit_box=self.hit_box)  # Draws pacman
+        world.pacman.draw(win, hit_box=self.hit_box)  # Draws pacman
+        Overlay.count("draw calls", len(world.collectables) + len(world.moving_platforms) +
+                      len(world.ghosts) + 1)
+        Overlay.mark("render objects")
 
         # Score text is updated and drawn in the top left corner
-        self.text = self.score_font.render(f"{PacMan.score}/{len(Game.collectables)}", True, (255, 255, 255))
-        self.win.blit(self.text, (Window.LENGTH/2 - self.text.get_width()/2, 5))
-        # Current time is found
-        self.time = self.score_font.render(str(round((datetime.datetime.now() - Game.start_time).total_seconds(), 2)),
-                                           True, (255, 255, 255))
-        # Estimate for time box length
-        length = 25 * (len(str(int((datetime.datetime.now() - Game.start_time).total_seconds()))) + 2) + 10
-        pygame.draw.rect(self.win, Game.BG, (4, 4, length, self.time.get_height() + 2))  # Black box is drawn
-        pygame.draw.rect(self.win, (0, 255, 0), (2, 2, length + 4, self.time.get_height() + 4), 3)  # Green outline
-        self.win.blit(self.time, (5, 5))  # Current time is drawn
-
-    def game_loop(self):  # The main loop for the game class
+        self.text, self.time = getattr(world, "texts", None) or self.texts(world)  # A snapshot's are ready made
+        win.blit(self.text, (Window.LENGTH/2 - self.text.get_width()/2, 5))
+        run_time = world.run_time()  # Current time is found
+        length = 25 * (len(str(int(run_time))) + 2) + 10  # Estimate for time box length
+        pygame.draw.rect(win, Game.BG, (4, 4, length, self.time.get_height() + 2))  # Black box is drawn
+        pygame.draw.rect(win, (0, 255, 0), (2, 2, length + 4, self.time.get_height() + 4), 3)  # Green outline
+        win.blit(self.time, (5, 5))  # Current time is drawn
+        Overlay.mark("render text")
+
+    def simulate(self, keys):  # Moves pacman, the ghosts and collectables by one tick
+        if self.game_type == "normal" and self.inputs is None:
+            self.replay.record(keys)  # The keys are recorded so that the run can be replayed
+        won = self.world.update(keys)
+        self.won = won and self.game_type == "normal"
+
+    def tick(self, keys, render=True):  # Runs one frame of the game. Nothing is drawn if "render" is False
         if self.mode == "play":  # If mode is play it then updates the scroll x and y
-            Game.SCROLL_X += (Game.pacman.x + Game.pacman.r/2 - Game.SCROLL_X - Window.LENGTH / 2) / 15  # 15 delay
-            Game.SCROLL_Y += (Game.pacman.y + Game.pacman.r/2 - Game.SCROLL_Y - Window.WIDTH / 2) / 15
+            self.world.follow()
+        self.world.prepare(edit=self.game_type == "custom")  # Updates everything that depends on the scroll
+        Overlay.mark("prepare")
+        if self.mode == "play":  # If in play mode pacman, collectables and ghosts need to update
+            self.simulate(keys)
+        if render:  # Drawn after the update so the keys show on this frame rather than the next one
+            self.render_screen()  # Renders the screen
 
-        keys = pygame.key.get_pressed()  # Gets all keys
+    def frame(self, events):  # One frame of the game: the events, the ticks that are due and drawing
+        Overlay.start()
+        self.show_drawn()  # The last frame, if the render thread has finished it
         mouse = pygame.mouse.get_pos()  # Gets mouse position
+        self.snapshot = None
 
-        for event in pygame.event.get():  # Loops over all events
+        for event in events:  # Loops over all events
             if event.type == pygame.KEYDOWN:  # Checks for a key press event
-                if event.key == pygame.K_ESCAPE:  # If escape key is pressed the game is saved and the program closes
+                if event.key == pygame.K_ESCAPE:  # If escape key is pressed the game is paused
                     self.pause()
+                    return  # The pause screen is shown from the next frame
                 if event.key == pygame.K_e and self.game_type == "custom":  # E toggles play and edit mode
                     if self.mode == "play":
                         self.mode = "edit"
@@ -1469,11 +3812,19 @@ class Game:  # Responsible for running the game
                         self.hit_box = False
                     else:
                         self.hit_box = True
+                if event.key == pygame.K_F3:  # F3 toggles the performance overlay
+                    Overlay.toggle()
+                if event.key in (pygame.K_z, pygame.K_y) and event.mod & pygame.KMOD_CTRL and self.mode == "edit":
+                    if event.key == pygame.K_y or event.mod & pygame.KMOD_SHIFT:  # Ctrl and Y (or shift Z) redoes
+                        self.edit.redo()
+                    else:  # Ctrl and Z undoes
+                        self.edit.undo()
             if event.type == pygame.MOUSEBUTTONDOWN and self.mode == "edit":  # When clicked in edit mode
-                if event.button == 1:  # This specifies the button press to be a left click
+                if event.button == 1 and not self.edit.press(mouse):  # Left click (unless it is selecting objects)
                     self.click = mouse[0] + self.edit.scroll_x, mouse[1] + self.edit.scroll_y  # Mouse x and y is stored
             if event.type == pygame.MOUSEBUTTONUP and self.mode == "edit":  # When button is released
-                if event.button == 1:  # This specifies the button press to be a left click
+                # Left click (unless it finished a selection box or moving the selection)
+                if event.button == 1 and not self.edit.release(mouse):
                     if not self.drag:  # If the user was not dragging then add a platform
                         self.edit.add_platform(mouse[0], mouse[1])  # Uses the edit mode add_platform() method
                     self.click = False  # Resets click and drag variables
@@ -1484,92 +3835,262 @@ class Game:  # Responsible for running the game
                          (self.click[0], self.click[1])) > 5:  # If dist moved > 5 pixels
                 self.edit.drag(self.click, (mouse[0], mouse[1]))  # Drags the screen to the mouse position
                 self.drag = True  # This is then considered a drag
+        keys = pygame.key.get_pressed()  # Gets all keys (after the events so that they are from this frame)
+        Overlay.mark("events")
+
+        if self.mode == "play":
+            if Game.late_latch:  # Waits for the frame here rather than after it is shown, then reads the keys again
+                if self.inputs is None:
+                    Latency.read(keys)
+                self.wait_for_frame()
+                if self.inputs is None:
+                    pygame.event.pump()  # Events stay in the queue for the next frame
+                    keys = pygame.key.get_pressed()
+            ticks = self.timestep.advance(time.perf_counter())
+            if self.inputs is None:
+                Latency.read(keys)
+            for _ in range(ticks):  # Runs every tick that is due
+                if self.inputs is not None:  # A replay is being played so its keys are used instead
+                    keys = next(self.inputs, None)
+                    if keys is None:  # The replay has finished
+                        Scenes.pop()
+                        return
+                self.timestep.save(self.world)
+                self.tick(keys, render=False)  # Everything is moved
+                Latency.ticked()
+                if self.won:
+                    break
+            saved = self.timestep.blend(self.world)  # Drawn between the last two ticks so movement is smooth
+            if self.renderer is None:
+                self.render_screen()
+            else:  # Copied now and drawn on the render thread
+                self.snapshot = Snapshot(self.world, Latency.take())
+                self.snapshot.texts = self.texts(self.snapshot)
+                self.snapshot.surface = self.renderer.buffer()
+            FixedStep.restore(self.world, saved)
+        else:
+            if Game.late_latch:
+                self.wait_for_frame()
+            self.sync()
+            self.timestep.reset()
+            self.tick(keys)  # Nothing moves in edit mode. It is just drawn
+        if self.won:  # If you have won
+            self.sync()
+            self.level_beaten()  # The game is replaced by the level beaten screen
+            return
+        elif self.mode == "edit":  # Otherwise an edit mode update is called
+            self.edit.update(keys, self.win)
+            Overlay.mark("edit mode")
+        # Edits are written to the journal as they are made. The level files are rewritten (autosaved) now and then
+        if self.game_type == "custom" and self.level and self.world.dirty and \
+                ((datetime.datetime.now() - self.last_save).total_seconds() > Journal.COMPACT or
+                 self.journal.size > Journal.LIMIT):
+            self.save(autosave=True)  # Only the changed files are written, on the save thread
+            self.last_save = datetime.datetime.now()
+        self.journal.flush()
+        # Updates the pause button (it is drawn by the render thread if there is one)
+        self.pause_btn.update(mouse, pygame.mouse.get_pressed(3)[0], draw=self.snapshot is None)
+
+        if self.watcher is not None:
+            self.watcher.poll()  # Applies changes made to the level files by other programs
+            # The last reload is shown with the hit-boxes or for 3 seconds after it happens
+            self.reload_message(self.watcher.message, bool(self.watcher.message) and
+                                (self.hit_box or time.perf_counter() - self.watcher.message_time < 3))
+        Overlay.mark("saves and buttons")
+
+    def present(self):  # Shows the frame or hands its snapshot to the render thread
+        if self.snapshot is None:
+            self.draw_extras(self.extras())
+            pygame.display.update()  # Display is updated
+            Latency.shown()
+            Overlay.mark("display update")
+        else:
+            self.snapshot.extras = self.extras()
+            self.renderer.submit(self.snapshot)  # Only waits if the render thread is a frame behind
+            self.snapshot = None
+            Overlay.mark("hand over")
+        Overlay.end()
+        Telemetry.frame(self.world, self.level, Overlay.work, Overlay.times)
+
+    def reload_message(self, message, shown):  # Renders the hot reload message when it changes
+        self.show_reload = shown
+        if shown and (self.reload_text is None or self.reload_text[0] != message):
+            self.reload_text = (message, self.debug_font.render(message, True, (0, 255, 0)))
+
+    def texts(self, world):  # The score and time text. Rendered on the main thread (fonts aren't thread safe)
+        return (self.score_font.render("{}/{}".format(*world.progress()), True, (255, 255, 255)),
+                self.score_font.render(str(round(world.run_time(), 2)), True, (255, 255, 255)))
+
+    def extras(self):  # (reload message, overlay panel, frame times) to draw on top of the level. Main thread only
+        Overlay.update(self.debug_font, self.world)
+        shown = Overlay.shown and Overlay.panel is not None
+        return (self.reload_text[1] if self.show_reload else None, Overlay.panel if shown else None,
+                list(Overlay.frames) if shown else [])
+
+    def draw_extras(self, extras):  # Draws the hot reload message and the performance overlay on top of the level
+        reload_text, panel, frames = extras
+        if reload_text is not None:
+            self.win.blit(reload_text, (5, Window.WIDTH - 25))
+        if panel is not None:
+            Overlay.draw(self.win, panel, frames)
+        Overlay.mark("overlay")
+
+    def draw_snapshot(self, snapshot):  # Draws the level from a snapshot onto its surface (on the render thread)
+        self.render_screen(snapshot, snapshot.surface)
+
+    def show_drawn(self):  # Shows the newest frame drawn by the render thread. SDL's display is only used here
+        if self.renderer is None:
+            return
+        drawn = self.renderer.take()
+        for snapshot in drawn[:-1]:  # Frames that were finished too late to be shown. Their key presses show next
+            Latency.shown(snapshot.presses)
+            self.renderer.recycle(snapshot)
+        if drawn:
+            snapshot = drawn[-1]
+            self.win.blit(snapshot.surface, (0, 0))
+            self.pause_btn.draw()
+            self.draw_extras(snapshot.extras)
+            pygame.display.update()
+            Latency.shown(snapshot.presses)
+            self.renderer.recycle(snapshot)
+            Overlay.mark("display update")
+
+    def wait_for_frame(self):  # Sleeps until the next frame is due. Used instead of Scenes.run's wait by the late latch
+        delay = self.next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_frame = max(self.next_frame, time.perf_counter() - 1 / Game.FPS) + 1 / Game.FPS  # No catching up
+        Overlay.skip()  # The wait isn't part of the frame's work
 
-        self.render_screen()  # Renders the screen
+    def level_beaten(self):  # Called when a level has been beaten
+        beaten = time.perf_counter()
+        final_time = round(self.world.run_time(), 2)  # Final time (in ticks so it is fair on every computer)
+
+        if self.inputs is None:  # Watching a replay doesn't change any records
+            pb = GameData.get_pb(self.level)
+            GameData.update_pb(self.level, final_time)  # New potential PB is updated
+            self.replay.info = {"level": self.level_hash, "ticks": self.world.ticks,
+                                "run_ticks": self.world.ticks - self.world.start_tick, "time": final_time}
+            self.replay.save(os.path.join(self.level, Replay.LAST))  # The run is saved next to the level
+            if pb == 0 or final_time < pb:
+                self.replay.save(os.path.join(self.level, Replay.BEST))
+
+            if self.number > Records.get_progress():  # If this level has not already been completed
+                Records.set_progress(self.number)  # New progress is saved
+            Records.flush()  # The new time and progress are written together
+        if self.number:  # The next built-in level is read while the level beaten screen is shown
+            Preloader.request("game_data/built_in/level" + str(self.number + 1))
+        Scenes.replace(LevelBeaten(self, final_time, beaten))
+
+
+class PauseScreen(Scene):  # Shown on top of the game while it is paused
+    def __init__(self, game):
+        self.game = game
+        self.win = game.win
+        self.fps = Game.FPS
+        self.pause_img = Assets.image("assets/pause_screen.png")  # The background pause image (loaded once)
+
+        resume_img = Assets.image("assets/resume.png")  # The resume image
+        self.resume_btn = Button(self.win, resume_img, (Window.LENGTH/2 - resume_img.get_width()/2, 280), 0)
+        if game.game_type == "custom":  # If it is a custom level
+            save_img = Assets.image("assets/save_quit.png")
+            self.save_btn = Button(self.win, save_img, (Window.LENGTH/2 - save_img.get_width()/2, 500), 0)
+            no_save_img = Assets.image("assets/don't_save.png")  # Don't save button
+            self.no_save_btn = Button(self.win, no_save_img, (Window.LENGTH/2 - no_save_img.get_width()/2, 400), 0)
+        else:
+            quit_img = Assets.image("assets/quit2.png")  # Quit button image
+            self.quit_btn = Button(self.win, quit_img, (Window.LENGTH/2 - quit_img.get_width()/2, 400), 0)
 
-        if self.mode == "play":  # If in play mode pacman, collectables and ghosts need to update
-            Game.pacman.update(keys)  # Pacman is updated
-            for ghost in Game.ghosts:
-                ghost.update()  # Each ghost is updated
-
-            won = True  # Temporarily set to True
-            for collectable in Game.collectables:  # Loops over collectables
-                collectable.update()  # Each one is updated
-                if not collectable.eaten:  # If any collectable is not eaten then won is set to False
-                    won = False
-            if won and self.game_type == "normal":  # If you have won
-                self.level_beaten()  # Level beaten screen
-                self.run = False  # Game is quit
-        else:  # Otherwise an edit mode update is called
-            self.edit.update(keys, self.win)
-        self.pause_btn.update(mouse, pygame.mouse.get_pressed(3)[0])  # Updates the pause button
+    def quit(self, save=False):  # Closes the pause screen and the game
+        if save:
+            self.game.save()  # Game is saved in the background
+        else:
+            self.game.discard()
+        Scenes.pop(2)
 
-        pygame.display.update()  # Display is updated
-        self.clock.tick(self.FPS)  # clock is used to cap FPS
+    def frame(self, events):  # Drawn over the last frame of the game
+        for event in events:  # Loops over all events
+            if event.type == pygame.KEYDOWN:  # Checks for a key press event
+                if event.key == pygame.K_ESCAPE:  # Escape = quit
+                    self.quit(save=self.game.game_type == "custom")  # Custom levels are saved
+                    return
+        self.win.blit(self.pause_img, (Window.LENGTH / 2 - self.pause_img.get_width() / 2, Window.WIDTH / 2 -
+                                       self.pause_img.get_height() / 2))  # Pause image is drawn in the centre
+
+        run_time = self.game.world.run_time()  # The timer doesn't count the time spent paused
+        time_text = self.game.score_font.render(str(round(run_time, 2)), True, (255, 255, 255))  # Time is updated
+        length = 25 * (len(str(int(run_time))) + 2) + 10  # Estimated length of the time box
+        pygame.draw.rect(self.win, Game.BG, (4, 4, length, time_text.get_height() + 2))  # Black box is drawn
+        pygame.draw.rect(self.win, (0, 255, 0), (2, 2, length + 4, time_text.get_height() + 4), 3)  # Green outline
+        self.win.blit(time_text, (5, 5))  # Current time is displayed on screen
 
-    def level_beaten(self):  # Called when a level has been beaten
-        height = 0  # Height of a gray screen
+        mouse = pygame.mouse.get_pos()  # Gets mouse position
+        pressed = pygame.mouse.get_pressed(3)[0]  # If left click
+        if self.resume_btn.update(mouse, pressed):
+            Scenes.pop()  # If resume is pressed the pause screen is closed
+        elif self.game.game_type == "custom":
+            if self.save_btn.update(mouse, pressed):  # If the save button is pressed
+                self.quit(save=True)  # Level is saved in the background and the game is closed
+            elif self.no_save_btn.update(mouse, pressed):  # If the don't save button is pressed
+                self.quit()
+        elif self.quit_btn.update(mouse, pressed):  # If the quit button is pressed
+            self.quit()
+
+
+class LevelBeaten(Scene):  # Shown for 2 seconds after a level has been beaten
+    def __init__(self, game, final_time, start):  # "start" is when the level was beaten
+        self.game = game
+        self.win = game.win
+        self.fps = Game.FPS
+        self.height = 0  # Height of a gray screen
         font = pygame.font.Font("freesansbold.ttf", 64)  # Level beaten font
-        text = font.render("Level Beaten", True, (255, 255, 255))  # Drawn in white
-        time = round((datetime.datetime.now() - Game.start_time).total_seconds(), 2)  # Final time is calculated
-        time_text = font.render(f"Time: {time}", True, (255, 255, 255))  # Drawn in white
-
-        GameData.update_pb(self.level, time)  # New potential PB is updated
-
-        global progress
-        if self.number > progress:  # If this level has not already been completed
-            with open("game_data/progress.txt", "w") as f:  # Loads progress from the progress text file
-                f.truncate()  # Empties previous information
-                f.write(str(self.number))  # New progress is written
-            progress = self.number  # Progress variable is updated
-
-        timer = int(2 * self.FPS)  # Repeats for 2 seconds
-        for i in range(timer):
-            pygame.draw.rect(self.win, (20, 20, 20), (0, 0, Window.LENGTH, height))  # Gray box is drawn
-
-            if height < Window.WIDTH:  # Box increases in width
-                height += 20
-            else:  # Once full size the text appears
-                self.win.blit(text,
-                              (Window.LENGTH / 2 - text.get_width() / 2, Window.WIDTH / 2 - text.get_height() / 2))
-                self.win.blit(time_text, (Window.LENGTH / 2 - time_text.get_width() / 2, Window.WIDTH / 2 +
-                                          text.get_height() / 2 + 50))
-
-            pygame.display.update()  # Screen is updated
-            self.clock.tick(self.FPS)  # Caps FPS
-
-    @staticmethod
-    def clear():  # Clears all objects
-        Game.pacman = PacMan(Window.LENGTH / 2, Window.WIDTH / 2)  # Pacman is created
-        Game.SCROLL_X = 0  # Scroll x and y is reset
-        Game.SCROLL_Y = 0
-        Game.platforms = []  # All lists are reset
-        Game.jump_through = []
-        Game.spikes = []
-        Game.ghosts = []
-        Game.collectables = []
-        Game.moving_platforms = []
-
-
-class CreditScreen:  # Responsible for the credits screen
+        self.text = font.render("Level Beaten", True, (255, 255, 255))  # Drawn in white
+        self.time_text = font.render(f"Time: {final_time}", True, (255, 255, 255))  # Drawn in white
+        self.frames = int(2 * self.fps)  # Repeats for 2 seconds
+        self.start = start  # When the work on the frame started. The first frame includes saving the records
+
+    def frame(self, events):
+        if self.frames == 0:
+            Scenes.pop()  # Back to the level select
+            return
+        self.frames -= 1
+        self.start = self.start or time.perf_counter()
+        pygame.draw.rect(self.win, (20, 20, 20), (0, 0, Window.LENGTH, self.height))  # Gray box is drawn
+
+        if self.height < Window.WIDTH:  # Box increases in width
+            self.height += 20
+        else:  # Once full size the text appears
+            text = self.text
+            self.win.blit(text, (Window.LENGTH / 2 - text.get_width() / 2, Window.WIDTH / 2 - text.get_height() / 2))
+            self.win.blit(self.time_text, (Window.LENGTH / 2 - self.time_text.get_width() / 2, Window.WIDTH / 2 +
+                                           text.get_height() / 2 + 50))
+
+    def present(self):
+        pygame.display.update()  # Screen is updated
+        Telemetry.event("level beaten")
+        Telemetry.frame(self.game.world, self.game.level, time.perf_counter() - self.start)
+        self.start = None
+
+
+class CreditScreen(Scene):  # Responsible for the credits screen
     def __init__(self):  # Initialises the credit screen
         self.win = window.win  # window
         self.credits_img = pygame.image.load("assets/credits.png")  # Credits background image
 
         self.back_btn = Button(self.win, pygame.image.load("assets/back.png"), (10, 10), self.quit)  # Back button class
 
-        self.run = True
-        while self.run:  # Main loop
-            self.game_loop()
+    def resume(self):  # Each time the screen is opened. The click that opened it isn't a click on its buttons
+        for button in (self.back_btn,):
+            button.active = False
 
-    def quit(self):  # If quit run is set to False
-        self.run = False
+    def quit(self):  # Goes back to the screen before
+        Scenes.pop()
 
-    def game_loop(self):  # Main loop of the credits screen
-        for event in pygame.event.get():  # Loops over all events
+    def frame(self, events):  # A frame of the credits screen
+        for event in events:  # Loops over all events
             if event.type == pygame.KEYDOWN:  # Checks for a key press event
-                if event.key == pygame.K_ESCAPE:  # If escape key is pressed the program closes
-                    self.run = False  # This will return the user to the home screen
+                if event.key == pygame.K_ESCAPE:  # If escape key is pressed
+                    self.quit()  # This will return the user to the home screen
 
         mouse = pygame.mouse.get_pos()  # Mouse position
         pressed = pygame.mouse.get_pressed(3)  # If the mouse is pressed
@@ -1577,28 +4098,27 @@ class CreditScreen:  # Responsible for the credits screen
         self.win.fill((0, 0, 0))  # Window is filled black
         self.win.blit(self.credits_img, ((Window.LENGTH / 2) - (self.credits_img.get_width() / 2), 0))  # BG is drawn
         self.back_btn.update(mouse, pressed[0])  # Back button is updated
-        pygame.display.update()  # Screen is updated
 
 
-class StoryLine:  # Responsible for the storyline screen
+class StoryLine(Scene):  # Responsible for the storyline screen
     def __init__(self):
         self.win = window.win  # Window
         self.bg = pygame.image.load("assets/stoyline_bg.png")  # Background is loaded
 
         self.back_btn = Button(self.win, pygame.image.load("assets/back.png"), (10, 10), self.quit)  # Back button class
 
-        self.run = True
-        while self.run:  # Main loop
-            self.game_loop()
+    def resume(self):
+        for button in (self.back_btn,):
+            button.active = False
 
-    def quit(self):  # If the game is quit run is set to False
-        self.run = False
+    def quit(self):  # Goes back to the screen before
+        Scenes.pop()
 
-    def game_loop(self):
-        for event in pygame.event.get():  # Loops over all events
+    def frame(self, events):
+        for event in events:  # Loops over all events
             if event.type == pygame.KEYDOWN:  # Checks for a key press event
-                if event.key == pygame.K_ESCAPE:  # If escape key is pressed the program closes
-                    self.run = False  # This will return the user to the home screen
+                if event.key == pygame.K_ESCAPE:  # If escape key is pressed
+                    self.quit()  # This will return the user to the home screen
 
         mouse = pygame.mouse.get_pos()  # Gets mouse position
         pressed = pygame.mouse.get_pressed(3)  # If the mouse has been pressed
@@ -1606,10 +4126,9 @@ class StoryLine:  # Responsible for the storyline screen
         self.win.fill((0, 0, 0))  # Fills the screen black
         self.win.blit(self.bg, ((Window.LENGTH / 2) - (self.bg.get_width() / 2), 0))  # Background is drawn
         self.back_btn.update(mouse, pressed[0])  # Back button is updated
-        pygame.display.update()  # Screen is updated
 
 
-class HelpScreen:  # Responsible for the help screen page
+class HelpScreen(Scene):  # Responsible for the help screen page
     def __init__(self):  # Initialises the help screen
         self.win = window.win  # Window
         self.img_0 = pygame.image.load("assets/how_to_play_0.png")  # Page 1
@@ -1623,27 +4142,27 @@ class HelpScreen:  # Responsible for the help screen page
                                  (btn_img.get_height() / 2)), self.next_img)  # Buttons are made
         self.back_btn = Button(self.win, pygame.image.load("assets/back.png"), (10, 10), self.quit)  # Back button class
 
-        self.run = True
-        while self.run:  # Main loop
-            self.game_loop()
-
     def next_img(self):  # Cycles to the next image
         self.current_img += 1  # Image is increased by 1
         if self.current_img > 1:
             self.current_img = 0  # Resets to 0
 
-    def quit(self):  # If quit is called it will return to the home page
-        self.run = False
+    def resume(self):
+        for button in (self.left_btn, self.right_btn, self.back_btn):
+            button.active = False
 
-    def game_loop(self):  # Main loop of the help screen
+    def quit(self):  # Goes back to the screen before
+        Scenes.pop()
+
+    def frame(self, events):  # A frame of the help screen
         mouse = pygame.mouse.get_pos()  # Gets mouse position
         pressed = pygame.mouse.get_pressed(3)  # If the mouse has been pressed
         self.win.fill((0, 0, 0))  # Fills the screen black
 
-        for event in pygame.event.get():  # Loops over all events
+        for event in events:  # Loops over all events
             if event.type == pygame.KEYDOWN:  # Checks for a key press event
-                if event.key == pygame.K_ESCAPE:  # If escape key is pressed the program closes
-                    self.run = False  # This will return the user to the home screen
+                if event.key == pygame.K_ESCAPE:  # If escape key is pressed
+                    self.quit()  # This will return the user to the home screen
             if event.type == pygame.MOUSEBUTTONDOWN:  # Mouse press
                 if event.button == 1:  # Left click
                     self.left_btn.update(mouse, True)  # Left and Rick buttons are updated
@@ -1658,10 +4177,38 @@ class HelpScreen:  # Responsible for the help screen page
             self.win.blit(self.img_1, ((Window.LENGTH / 2) - (self.img_0.get_width() / 2), 0))
 
         self.back_btn.update(mouse, pressed[0])  # Back button is updated
-        pygame.display.update()  # Display is updated
 
 
-class LevelSelect:  # Responsible for the leve select screen (both main and custom levels).
+class LevelIndex:  # A sorted list of the level folders in a directory that is only re-scanned when it changes
+    def __init__(self, folder):
+        self.folder = folder
+        self.names = []  # Sorted folder names
+        self.stamp = None  # Modified time of the directory when it was last scanned
+        self.scan()
+
+    def scan(self):  # Reads the directory again, but only if something has been added or removed
+        stamp = os.stat(self.folder).st_mtime_ns
+        if stamp == self.stamp:
+            return False
+        with os.scandir(self.folder) as entries:  # scandir already knows which entries are folders
+            self.names = sorted(entry.name for entry in entries if entry.is_dir())
+        self.stamp = stamp
+        return True
+
+    def remove(self, name):  # Removes one level from the index without scanning the directory again
+        i = bisect.bisect_left(self.names, name)
+        if i < len(self.names) and self.names[i] == name:
+            del self.names[i]
+        self.stamp = os.stat(self.folder).st_mtime_ns  # The deletion doesn't need a scan
+        return i  # The position that the level used to be at
+
+    def __len__(self):
+        return len(self.names)
+
+
+class LevelSelect(Scene):  # Responsible for the leve select screen (both main and custom levels).
+    PAGE_SIZE = 10  # Buttons on each page (two rows of five)
+
     def __init__(self):  # Initialises the screen
         self.win = window.win  # Window
         self.mode = "main"  # Either main or custom
@@ -1684,49 +4231,77 @@ class LevelSelect:  # Responsible for the leve select screen (both main and cust
         self.right_btn = Button(self.win, pygame.transform.flip(btn_img, True, False),
                                 (Window.LENGTH - btn_img.get_width() - 70, 420), lambda: self.change_page(1))  # right
 
-        number = len(os.listdir("game_data/built_in"))  # Number of built-in items
-        self.main_buttons = [[LevelBtn(self.win, x*200 + 165, 250 + (y % 2)*250, "main", 0, num=y*5+x+1)
-                              for x in range(5)] for y in range(number // 5)]  # Loads built in buttons
-        self.main_buttons.append([LevelBtn(self.win, x*200 + 165, 250 + ((number // 5) % 2)*250, "main", 0,
-                                           num=(number // 5)*5+x+1) for x in range(number % 5)])  # Loads buttons
-        self.main_number = number  # Number of buttons
-
-        files = os.listdir("game_data/custom")
-        number = len(files)  # Number of custom items
-        # Loads buttons
-        self.custom_buttons = [[LevelBtn(self.win, x*200 + 165, 250 + (y % 2)*250, "custom", self.delete,
-                                         name=files[y*5+x]) for x in range(5)] for y in range(number // 5)]
-        self.custom_buttons.append([LevelBtn(self.win, x*200 + 165, 250 + ((number // 5) % 2)*250, "custom",
-                                             self.delete, name=files[(number // 5)*5+x]) for x in range(number % 5)])
-        self.custom_number = number  # Number of buttons
+        Records.refresh()  # Every personal best is read in one go (unless they are already cached)
+        self.main_number = len(LevelIndex("game_data/built_in"))  # Number of built-in levels
+        self.custom = LevelIndex("game_data/custom")  # Names of the custom levels
+        self.custom_number = len(self.custom)  # Number of buttons
+        # Buttons are only made for the pages around the current one. Page number -> list of buttons
+        self.pages = {"main": {}, "custom": {}}
 
         img = pygame.image.load("assets/add.png")  # Add button image
-        self.add_btn = Button(self.win, img, ((number % 5)*200 + 190, 270 + ((number // 5) % 2)*250), self.new_custom)
-
-        self.run = True
-        while self.run:  # Main loop of the level select screen
-            self.game_loop()
-
-    def quit(self):  # Called when the escape key or back button is pressed
-        self.run = False
+        self.add_btn = Button(self.win, img, (0, 0), self.new_custom)
+        self.move_add_btn()
+
+    def resume(self):  # Called when the screen is opened and when a level is closed
+        self.enable_buttons = False  # The click that opened the screen isn't a click on a level
+        for button in (self.back_btn, self.main_btn, self.custom_btn, self.left_btn, self.right_btn, self.add_btn):
+            button.active = False
+        Records.refresh()  # Picks up any change made to the records while a level was open
+        self.reload()  # Custom levels may have been added
+
+    def quit(self):  # Goes back to the screen before
+        Scenes.pop()
+
+    def make_page(self, mode, page):  # Creates the buttons for one page
+        buttons = []
+        for i in range(page * self.PAGE_SIZE, min((page + 1) * self.PAGE_SIZE,
+                                                  self.main_number if mode == "main" else self.custom_number)):
+            x, y = (i % 5)*200 + 165, 250 + ((i // 5) % 2)*250  # Position on the page
+            if mode == "main":
+                buttons.append(LevelBtn(self.win, x, y, "main", 0, num=i+1))
+            else:
+                buttons.append(LevelBtn(self.win, x, y, "custom", self.delete, name=self.custom.names[i]))
+        return buttons
+
+    def get_page(self, mode, page):  # Returns the buttons of a page, making them if they aren't cached
+        pages = self.pages[mode]
+        if page not in pages:
+            pages[page] = self.make_page(mode, page)
+        for cached in list(pages):  # Only the current page and the pages either side of it are kept
+            if abs(cached - page) > 1:
+                del pages[cached]
+        return pages[page]
+
+    def preload_page(self):  # Makes one of the pages next to the current page (so changing page is instant)
+        pages = self.pages[self.mode]
+        last = (self.main_number if self.mode == "main" else self.custom_number) // self.PAGE_SIZE
+        for page in (self.page + 1, self.page - 1):
+            if 0 <= page <= last and page not in pages:
+                pages[page] = self.make_page(self.mode, page)
+                return  # Only one page is made each frame
+
+    def move_add_btn(self):  # The add button goes after the last custom level
+        number = self.custom_number
+        self.add_btn.move(((number % 5) * 200 + 190, 270 + ((number // 5) % 2) * 250))
 
     def delete(self, location):  # Deletes a certain level
         shutil.rmtree(os.path.join("./game_data/custom", location))  # Will remove the folder at the given location
-        self.reload()  # All levels are reloaded
-
-    def reload(self):
-        files = os.listdir("game_data/custom")
-        number = len(files)  # Number of custom items
-        self.custom_buttons = [[LevelBtn(self.win, x*200 + 165, 250 + (y % 2)*250, "custom", self.delete,
-                                         name=files[y*5+x]) for x in range(5)] for y in range(number // 5)]  # Buttons
-        self.custom_buttons.append([LevelBtn(self.win, x*200 + 165, 250 + ((number // 5) % 2)*250, "custom",
-                                             self.delete, name=files[(number // 5)*5+x]) for x in range(number % 5)])
-        self.custom_number = number  # Saves number of buttons
-        self.add_btn.move(((number % 5) * 200 + 190, 270 + ((number // 5) % 2) * 250))  # Add button is moved
-
-    def new_custom(self):  # A new custom level is made
-        Game("", "custom")
-        self.reload()  # Levels are reloaded
+        Records.delete("game_data/custom/" + location)  # Its personal best is removed too
+        i = self.custom.remove(location)  # The index is updated without scanning the folder again
+        self.custom_number = len(self.custom)
+        for page in list(self.pages["custom"]):  # Pages after the deleted level have moved along by one
+            if page >= i // self.PAGE_SIZE:
+                del self.pages["custom"][page]
+        self.move_add_btn()
+
+    def reload(self):  # Checks for new custom levels
+        if self.custom.scan():  # Buttons are only remade if the folder has changed
+            self.custom_number = len(self.custom)
+            self.pages["custom"] = {}
+            self.move_add_btn()
+
+    def new_custom(self):  # A new custom level is made (the levels are reloaded when it is closed)
+        Scenes.push(Game("", "custom"))
 
     def change_page(self, x):  # Page is changed by the value of x
         if not self.page_pause > 0:  # Page pause prevents pages swapping too fast
@@ -1744,22 +4319,16 @@ class LevelSelect:  # Responsible for the leve select screen (both main and cust
             self.main_btn.disable = False  # Enable custom button
 
     def render_lvl_btn(self, mouse, pressed):  # Renders the level buttons
-        if self.mode == "main":  # If it is on the main page
-            for row in self.main_buttons[self.page * 2:self.page * 2 + 2]:  # Loops over all buttons
-                for item in row:
-                    item.update(mouse, pressed)  # Buttons are drawn and updated
-        else:  # If it is on the custom page
-            if self.page == self.custom_number // 10:
-                self.add_btn.update(mouse, pressed)  # Add button is drawn and updated
-            for row in self.custom_buttons[self.page * 2:self.page * 2 + 2]:  # Loops over all buttons
-                for item in row:
-                    item.update(mouse, pressed)  # Buttons are drawn and updated
-
-    def game_loop(self):  # Main loop of the level select screen
-        for event in pygame.event.get():  # Loops over all events
+        if self.mode == "custom" and self.page == self.custom_number // 10:  # If it is on the last custom page
+            self.add_btn.update(mouse, pressed)  # Add button is drawn and updated
+        for item in self.get_page(self.mode, self.page):  # Loops over the buttons on this page
+            item.update(mouse, pressed)  # Buttons are drawn and updated
+
+    def frame(self, events):  # A frame of the level select screen
+        for event in events:  # Loops over all events
             if event.type == pygame.KEYDOWN:  # Checks for a key press event
-                if event.key == pygame.K_ESCAPE:  # If escape key is pressed the program closes
-                    self.run = False  # This will return the user to the home screen
+                if event.key == pygame.K_ESCAPE:  # If escape key is pressed
+                    self.quit()  # This will return the user to the home screen
 
         mouse = pygame.mouse.get_pos()  # Gets mouse position
         pressed = pygame.mouse.get_pressed(3)  # If mouse pressed
@@ -1785,12 +4354,16 @@ class LevelSelect:  # Responsible for the leve select screen (both main and cust
         else:
             self.enable_buttons = not pressed[0]  # If the mouse is not pressed buttons are then enabled
 
-        pygame.display.update()  # Display is updated
+        self.preload_page()  # Spare time is used to make the next page
         if self.page_pause > 0:
             self.page_pause -= 1  # Page pause is decreased
 
 
-class HomeScreen:  # Responsible for the home screen of the game
+class HomeScreen(Scene):  # Responsible for the home screen of the game
+    fps = 50
+    # The screens opened by the buttons
+    SCREENS = {"play": LevelSelect, "help": HelpScreen, "credits": CreditScreen, "storyline": StoryLine}
+
     def __init__(self):  # Initialises the home screen
         self.win = window.win  # Window
 
@@ -1815,30 +4388,32 @@ class HomeScreen:  # Responsible for the home screen of the game
         self.title_img = pygame.image.load("assets/title.png")  # Title image
         self.ghosts = [FallingGhost(self.win) for _ in range(40)]  # Falling ghosts are created in a list
 
-        self.clock = pygame.time.Clock()  # Clock is initialised
+        self.screens = {}  # Button name -> the screen it opens. Each screen is made once and kept
+        Startup.mark("home screen")
 
-        self.run = True
-        while self.run:  # Main loop of the home screen
-            self.game_loop()
+    def screen(self, name):  # Returns the screen that a button opens, making it if it hasn't been made yet
+        if name not in self.screens:
+            self.screens[name] = HomeScreen.SCREENS[name]()
+        return self.screens[name]
+
+    def preload(self):  # Makes one of the screens each frame after the first so that opening them is instant
+        for name in HomeScreen.SCREENS:
+            if name not in self.screens:
+                self.screen(name)
+                return
 
     def button_pressed(self, btn):  # If any button has been pressed
-        if btn == "play":
-            LevelSelect()  # Play starts the level select
-        if btn == "credits":
-            CreditScreen()  # Credits starts the credits screen
-        if btn == "help":
-            HelpScreen()  # Help starts the help screen
         if btn == "quit":
-            self.run = False  # Quits the game
-        if btn == "storyline":
-            StoryLine()  # Storyline starts the storyline screen
+            Scenes.pop()  # Quits the game
+        else:  # Play, help, credits or storyline
+            Scenes.push(self.screen(btn))
 
-    def game_loop(self):
-        for event in pygame.event.get():  # Loops over all events
+    def frame(self, events):
+        for event in events:  # Loops over all events
             if event.type == pygame.KEYDOWN:  # Checks for a key press event
                 if event.key == pygame.K_ESCAPE:  # If escape key is pressed the program closes
-                    pygame.quit()  # Quits the game
-                    quit()
+                    Scenes.pop()  # Quits the game
+                    return
 
         mouse = pygame.mouse.get_pos()  # Gets mouse position
         pressed = pygame.mouse.get_pressed(3)  # If mouse is pressed
@@ -1856,16 +4431,155 @@ class HomeScreen:  # Responsible for the home screen of the game
 
         self.win.blit(self.title_img, ((Window.LENGTH / 2) - (self.title_img.get_width() / 2), 30))  # Title is drawn
 
+    def present(self):
         pygame.display.update()  # Screen is updated
-        self.clock.tick(50)  # Clock is used to cap FPS
+        Startup.frame_shown()  # The rest of the game is started once the first frame is on screen
+        self.preload()
 
 
 if __name__ == '__main__':  # Will run at the beginning of the program
-    pygame.mixer.init()  # Initializes pygame's mixer used for sound
-    pygame.mixer.music.load("sounds/Dance_of_the_Pixies.mp3")  # Loads the background music
-    pygame.mixer.music.play(-1)  # Plays music infinitely
-
+    parser = argparse.ArgumentParser(description=title)
+    parser.add_argument("--startup-report", action="store_true", help="print how long each part of start up takes")
+    parser.add_argument("--fps", type=int, default=Game.FPS, help="most frames drawn each second (the game itself "
+                        f"always runs at {World.RATE} ticks a second)")
+    parser.add_argument("--catch-up", type=int, default=FixedStep.MAX_CATCH_UP,
+                        help="most ticks run before a frame is drawn when the game falls behind")
+    parser.add_argument("--late-latch", action="store_true", help="wait for each frame before reading the keys")
+    parser.add_argument("--latency", action="store_true",
+                        help="time key presses from when they are seen until they are on the screen and print the "
+                             "results on exit")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="draw each frame on a second thread while the next one is worked out")
+    parser.add_argument("--pipeline-check", metavar="LEVEL", help="check that frames drawn on the render thread "
+                        "match frames drawn one at a time for --ticks of --replay (or scripted keys) and exit")
+    parser.add_argument("--watch", action="store_true", help="reload level files when they are changed while playing")
+    parser.add_argument("--compile", nargs="*", metavar="LEVEL",
+                        help="compile the given level folders (or every level) and exit")
+    parser.add_argument("--replay", metavar="FILE", help="play back a replay (saved in the level's folder)")
+    parser.add_argument("--level", help="level folder for --replay (the replay's folder by default)")
+    parser.add_argument("--check", action="store_true", help="play --replay without a window and print the result")
+    parser.add_argument("--bench", nargs="*", metavar="LEVEL",
+                        help="time the given levels (or every built-in level and the stress levels) and exit")
+    parser.add_argument("--ticks", type=int, default=Benchmark.TICKS, help="ticks played by each benchmark")
+    parser.add_argument("--out", metavar="FILE", help="save the benchmark or validation results as JSON "
+                                                       "(or the profile as FILE.pstats and FILE.collapsed)")
+    parser.add_argument("--baseline", metavar="FILE", help="compare the benchmark or validation with saved results")
+    parser.add_argument("--generate", metavar="FOLDER", help="save a random level to FOLDER and exit")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated level")
+    parser.add_argument("--platforms", type=int, default=1000, help="number of platforms in the generated level")
+    parser.add_argument("--density", type=float, default=LevelGenerator.DENSITY,
+                        help="platforms for every 1000 pixels of the generated level's width")
+    parser.add_argument("--width", type=int, help="width of the generated level in pixels (instead of --density)")
+    parser.add_argument("--mix", default="", metavar="KIND=RATIO,...",
+                        help="objects of each kind for every platform, e.g. ghost=0.1,spike=0.2")
+    parser.add_argument("--telemetry", action="store_true",
+                        help=f"record the time taken by every frame in {Telemetry.FOLDER}")
+    parser.add_argument("--telemetry-summary", nargs="*", metavar="FILE",
+                        help="print percentiles and hitches from the telemetry files and exit")
+    parser.add_argument("--profile", metavar="LEVEL", help="profile a level played without a window and exit. "
+                                                           "Plays --replay (or scripted keys) for --ticks ticks")
+    parser.add_argument("--no-render", action="store_true", help="don't draw anything while profiling")
+    parser.add_argument("--validate", nargs="*", metavar="PATH",
+                        help="play every replay in the given files or folders (or game_data) on every core and exit")
+    parser.add_argument("--env", metavar="LEVEL", help="play random actions in --envs bot training worlds for --ticks "
+                                                       "ticks, print the steps per second and exit")
+    parser.add_argument("--envs", type=int, default=16, help="number of worlds used by --env")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processes used by --env (0 runs the worlds in this process, -1 uses every core)")
+    parser.add_argument("--memory", metavar="LEVEL", help="print where memory goes when a level is loaded and exit")
+    parser.add_argument("--cycles", type=int, default=Memory.CYCLES, help="load and clear cycles used by --memory")
+    args = parser.parse_args()
+    if args.telemetry_summary is not None:
+        print(Telemetry.summary(args.telemetry_summary or Telemetry.files()))
+        raise SystemExit
+    if args.generate:  # Generates a level without starting the game
+        mix = {kind: float(ratio) for kind, ratio in (item.split("=") for item in args.mix.split(",") if item)}
+        start = time.perf_counter()
+        LevelGenerator(args.seed, args.platforms, args.density, args.width, mix).write(args.generate)
+        print(f"{args.generate}: {time.perf_counter() - start:.2f} s")
+        raise SystemExit
+    if args.compile is not None:  # Compiles levels without starting the game
+        levels = args.compile or [os.path.join(folder, name) for folder in ("game_data/built_in", "game_data/custom")
+                                  for name in LevelIndex(folder).names]
+        for level in levels:
+            start = time.perf_counter()
+            baked = GameData.compile(level)["baked"]
+            print(f"{level}: {baked['hash'][:12]} in {(time.perf_counter() - start) * 1000:.1f} ms")
+        raise SystemExit
+    if args.validate is not None:  # Plays every replay and exits. Exits with 1 if any of them went wrong
+        files = Validator.find(args.validate or ["game_data"])
+        workers = Validator.cores()
+        start = time.perf_counter()
+        results = Validator.run([(args.level or os.path.dirname(file), file) for file in files], workers)
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, "r") as f:
+                baseline = json.load(f)
+        text, problems = Validator.report(results, time.perf_counter() - start, workers, baseline)
+        print(text)
+        if args.out:
+            GameData.write_file(args.out, json.dumps(results, indent=2))
+        print("\n".join(["Problems:"] + problems) if problems else "No problems")
+        raise SystemExit(1 if problems else 0)
+    if args.env:  # Measures how fast bots can be trained on a level
+        workers = Validator.cores() if args.workers < 0 else args.workers
+        rate, rewards = ProcessVectorEnv.bench(GameData.find(args.env), args.envs, args.ticks, workers)
+        print(f"{args.envs} worlds in {max(workers, 1)} processes: {rate:.0f} steps/s (total reward {rewards})")
+        raise SystemExit
+    if (args.replay and args.check) or args.bench is not None or args.profile or args.memory or \
+            args.pipeline_check:  # Run without a window
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        pygame.display.init()
+        pygame.font.init()
+        window = Window()
+    if args.replay and args.check:  # Replays the run as fast as possible and prints how it went
+        print(json.dumps(Replay.play(args.level or os.path.dirname(args.replay), Replay.load(args.replay))))
+        raise SystemExit
+    if args.pipeline_check:  # Exits with 1 if any frame drawn from a snapshot is different
+        replay = Replay.load(args.replay) if args.replay else Replay.scripted(args.ticks)
+        frames, different = RenderThread.check_handoff(GameData.find(args.pipeline_check), replay, args.ticks)
+        print(f"{frames} frames, {len(different)} different" + (f" (ticks {different[:10]})" if different else ""))
+        raise SystemExit(1 if different else 0)
+    if args.memory:
+        print(Memory.report(GameData.find(args.memory), args.cycles))
+        raise SystemExit
+    if args.profile:  # Levels can be given by name (such as level3) or by folder
+        level = GameData.find(args.profile)
+        replay = Replay.load(args.replay) if args.replay else Replay.scripted(args.ticks)
+        Profiler.run(level, replay, args.ticks, not args.no_render, args.out or "profile")
+        raise SystemExit
+    if args.bench is not None:  # Benchmarks the game and exits. Exits with 1 if it is slower than the baseline
+        results = Benchmark.suite(args.bench, args.ticks)
+        if args.out:
+            GameData.write_file(args.out, json.dumps(results, indent=2))
+        if args.baseline:
+            with open(args.baseline, "r") as f:
+                regressions = Benchmark.compare(results, json.load(f))
+            print("\n".join(["Regressions:"] + regressions) if regressions else "No regressions")
+            raise SystemExit(1 if regressions else 0)
+        raise SystemExit
+    Startup.report_enabled = args.startup_report
+    if args.telemetry:
+        Telemetry.enable()
+    HotReload.enabled = args.watch
+    Game.FPS = args.fps
+    Game.late_latch = args.late_latch
+    Game.pipelined = args.pipeline
+    if args.latency:
+        Latency.enable()
+    FixedStep.MAX_CATCH_UP = args.catch_up
+    Startup.mark("imports")
+
+    pygame.display.init()  # Only the display is needed for the home screen
     window = Window()  # Window is initialised
-    HomeScreen()  # Home screen is started
+    Startup.mark("display")
+    Startup.defer("fonts", pygame.font.init)  # Fonts and sound aren't used by the first frame
+    Startup.defer("sound", Startup.start_sound)
+    scenes = [HomeScreen()]  # Home screen is started
+    if args.replay:  # The replay is shown before the home screen
+        Startup.frame_shown()
+        scenes.append(Game(args.level or os.path.dirname(args.replay), "normal", replay=Replay.load(args.replay)))
+    Scenes.run(*scenes)  # Runs until the home screen is closed
 
     pygame.mixer.stop()  # Sounds are stopped